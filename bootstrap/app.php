@@ -36,4 +36,7 @@ $app->bootEloquent();
 // shared collector when the HTTP server forks worker processes.
 $app->get(Adapter::class);
 
+// Compile the route dispatcher once so every forked worker inherits it.
+$app->get('router')->dispatcher();
+
 return $app;
@@ -65,6 +65,12 @@ $server->on('request', function(OpenSwoole\HTTP\Request $req, OpenSwoole\HTTP\Re
   Bamboo\Core\ResponseEmitter::emit($res, $response);
 });
 
+// Workers started by a reload (SIGUSR1 to the master) pick up a rewritten
+// routes.cache; requests themselves never check the file.
+$server->on('workerStart', ServerInstrumentation::registerListener('workerStart', function () use ($app): void {
+  $app->get('router')->reload();
+}));
+
 $server->on('task', function (OpenSwoole\Server $server, int $taskId, int $srcWorkerId, mixed $data): void {
   // Task workers are optional; immediately acknowledge work when present.
 });
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Run several `bin/bench/http` processes in parallel and merge their results.
+
+One harness process saturates a single core long before a many-core Bamboo
+host does, so high-concurrency runs end up measuring the load generator. This
+orchestrator splits `--concurrency` across `--processes` harness processes,
+pins each one to its share of `--cpus`, and lines their windows up with the
+harness' `--start-at` barrier: every process warms up, then starts its measured
+window at the same wall-clock instant.
+
+Each process writes its own CSV row and latency histogram to a scratch
+directory. The merged row adds up requests, errors and per-process throughput
+(the windows overlap), and derives p50/p95/p99 from the merged histogram, since
+percentiles of separate processes cannot be averaged. The row is appended to
+`--csv` in the harness schema, and `--histogram` keeps the merged distribution.
+
+`--harness-arg` forwards any other harness option (`--timeline`, ...) to every
+process. Options the orchestrator sets per process are refused there.
+
+Usage examples
+--------------
+>>> # 256 connections from 8 harness processes pinned to cores 16-23
+>>> python docs/tools/bench-fanout.py --processes 8 --cpus 16-23 \
+...     --target http://127.0.0.1:9501/ --concurrency 256 --duration 60 \
+...     --label baseline-1.0 --csv docs/benchmarks/data/20240601-fanout.csv --histogram
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Sequence
+
+from bench_csv import append_row
+from latency_histogram import histogram_path, merge_files
+
+HARNESS = Path(__file__).resolve().parents[2] / "bin" / "bench" / "http"
+
+# Seconds allowed for every process to start before the warm-up begins.
+SPAWN_SLACK = 1.0
+
+# Harness options set by the orchestrator itself; `--harness-arg` cannot override them.
+MANAGED_OPTIONS = frozenset(
+    (
+        "target",
+        "duration",
+        "concurrency",
+        "warmup",
+        "method",
+        "body",
+        "header",
+        "label",
+        "csv",
+        "histogram",
+        "start-at",
+    )
+)
+
+
+def parse_cpus(spec: str) -> List[int]:
+    """Expand a CPU list such as `0-3,8,10-11`."""
+    cpus: List[int] = []
+    for part in filter(None, (chunk.strip() for chunk in spec.split(","))):
+        low, _, high = part.partition("-")
+        cpus.extend(range(int(low), int(high or low) + 1))
+    return cpus
+
+
+def split_evenly(total: int, parts: int) -> List[int]:
+    base, extra = divmod(total, parts)
+    return [base + (1 if index < extra else 0) for index in range(parts)]
+
+
+def cpu_sets(cpus: Sequence[int], processes: int) -> List[List[int]]:
+    """Contiguous CPU shares per process (round-robin when there are fewer CPUs)."""
+    if not cpus:
+        return [[] for _ in range(processes)]
+    if len(cpus) < processes:
+        return [[cpus[index % len(cpus)]] for index in range(processes)]
+    sets, start = [], 0
+    for size in split_evenly(len(cpus), processes):
+        sets.append(list(cpus[start : start + size]))
+        start += size
+    return sets
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Fan bin/bench/http out over several pinned processes and merge the results.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Harnesses.")
+    parser.add_argument("--cpus", default="", help="CPU list to pin to, e.g. '16-23' or '0,2,4'.")
+    parser.add_argument("--php", default="php", help="PHP binary used to run the harness.")
+    parser.add_argument("--harness", type=Path, default=HARNESS, help="Harness script.")
+    parser.add_argument("--target", default="http://127.0.0.1:9501/", help="URL to exercise.")
+    parser.add_argument("--concurrency", type=int, default=64, help="Total concurrency.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Warm-up seconds.")
+    parser.add_argument("--method", default="GET", help="HTTP method.")
+    parser.add_argument("--body", help="Request body applied to every request.")
+    parser.add_argument(
+        "--header", action="append", default=[], help="Extra 'Name: Value' header (repeatable)."
+    )
+    parser.add_argument("--label", help="Scenario label (defaults to 'METHOD URL').")
+    parser.add_argument("--csv", type=Path, help="Append the merged row to this CSV.")
+    parser.add_argument(
+        "--histogram",
+        nargs="?",
+        const="",
+        help="Append the merged histogram (defaults to the --csv path with .hist.jsonl).",
+    )
+    parser.add_argument(
+        "--keep", type=Path, help="Keep per-process CSVs, histograms and logs in this directory."
+    )
+    parser.add_argument(
+        "--harness-arg",
+        action="append",
+        default=[],
+        help="Extra argument passed through to every harness, e.g. --harness-arg=--timeline.",
+    )
+    return parser.parse_args(argv)
+
+
+def harness_command(
+    args: argparse.Namespace, concurrency: int, scratch: Path, index: int, start_at: float
+) -> List[str]:
+    command = [
+        args.php,
+        str(args.harness),
+        f"--target={args.target}",
+        f"--duration={args.duration}",
+        f"--concurrency={concurrency}",
+        f"--method={args.method}",
+        f"--warmup={args.warmup}",
+        f"--csv={scratch / f'process-{index}.csv'}",
+        f"--histogram={scratch / f'process-{index}.hist.jsonl'}",
+        f"--start-at={start_at:.6f}",
+    ]
+    if args.label:
+        command.append(f"--label={args.label}")
+    if args.body is not None:
+        command.append(f"--body={args.body}")
+    command.extend(f"--header={header}" for header in args.header)
+    command.extend(args.harness_arg)
+    return command
+
+
+def run(args: argparse.Namespace, scratch: Path) -> int:
+    processes = max(1, min(args.processes, args.concurrency))
+    shares = split_evenly(args.concurrency, processes)
+    cpus = parse_cpus(args.cpus)
+    if cpus and not hasattr(os, "sched_setaffinity"):
+        print("[bench-fanout] WARNING: CPU pinning is not supported here", file=sys.stderr)
+        cpus = []
+    elif cpus:
+        unavailable = sorted(set(cpus) - os.sched_getaffinity(0))
+        if unavailable:
+            print(f"[bench-fanout] ERROR: CPUs {unavailable} are not available", file=sys.stderr)
+            return 1
+    pins = cpu_sets(cpus, processes)
+    # The harness appends, so results of an earlier run in --keep must go.
+    for stale in scratch.glob("process-*"):
+        stale.unlink()
+    start_at = time.time() + SPAWN_SLACK + 0.05 * processes + args.warmup + 0.25
+
+    children = []
+    for index, (concurrency, share) in enumerate(zip(shares, pins)):
+        def pin(cpus: List[int] = share) -> None:
+            if cpus:
+                os.sched_setaffinity(0, cpus)
+
+        log = (scratch / f"process-{index}.log").open("w", encoding="utf-8")
+        command = harness_command(args, concurrency, scratch, index, start_at)
+        children.append(
+            (
+                subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, preexec_fn=pin),
+                log,
+            )
+        )
+        where = f" on CPUs {','.join(map(str, share))}" if share else ""
+        print(f"[bench-fanout] process {index}: concurrency {concurrency}{where}")
+
+    failures = 0
+    for index, (child, log) in enumerate(children):
+        if child.wait() != 0:
+            print(f"[bench-fanout] process {index} exited with {child.returncode}", file=sys.stderr)
+            failures += 1
+        log.close()
+    if failures:
+        print(f"[bench-fanout] see the logs in {scratch}", file=sys.stderr)
+        return 1
+
+    rows = []
+    for index in range(processes):
+        with (scratch / f"process-{index}.csv").open("r", encoding="utf-8", newline="") as handle:
+            rows.extend(csv.DictReader(handle))
+    histograms = [scratch / f"process-{index}.hist.jsonl" for index in range(processes)]
+    merged = merge_files(histograms)[None]
+
+    requests = sum(int(row["requests"]) for row in rows)
+    errors = sum(int(row["error_count"]) for row in rows)
+    # Windows overlap, so the aggregate rate is the sum of the per-process rates.
+    throughput = sum(float(row["requests_per_second"]) for row in rows)
+    duration = max(float(row["duration_seconds"]) for row in rows)
+    label = args.label or f"{args.method.upper()} {args.target}"
+    p50, p95, p99 = (merged.percentile(q) for q in (50.0, 95.0, 99.0))
+    print(f"Scenario: {label}")
+    print(f"Processes: {processes} (concurrency {args.concurrency})")
+    print(f"Throughput: {throughput:.2f} requests/second")
+    print(f"Requests: {requests} (errors: {errors})")
+    print(f"Latency p50: {p50:.2f} ms")
+    print(f"Latency p95: {p95:.2f} ms")
+    print(f"Latency p99: {p99:.2f} ms")
+
+    if args.csv is not None:
+        append_row(
+            args.csv,
+            {
+                "scenario": label,
+                "target": args.target,
+                "method": args.method.upper(),
+                "concurrency": args.concurrency,
+                "duration_seconds": round(duration, 4),
+                "requests": requests,
+                "requests_per_second": round(throughput, 4),
+                "p50_ms": round(p50, 4),
+                "p95_ms": round(p95, 4),
+                "p99_ms": round(p99, 4),
+                "error_count": errors,
+                "error_rate": errors / requests if requests else 0.0,
+            },
+        )
+        print(f"CSV row appended to {args.csv}")
+    if args.histogram is not None:
+        target = Path(args.histogram) if args.histogram else histogram_path(args.csv)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        record = merged.to_record(
+            recorded_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            scenario=label,
+            target=args.target,
+            method=args.method.upper(),
+            concurrency=args.concurrency,
+            processes=processes,
+        )
+        with target.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        print(f"Latency histogram appended to {target}")
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.concurrency < 1:
+        print("[bench-fanout] ERROR: --concurrency must be at least 1", file=sys.stderr)
+        return 1
+    if args.histogram == "" and args.csv is None:
+        print("[bench-fanout] ERROR: --histogram needs a path or --csv", file=sys.stderr)
+        return 1
+    for extra in args.harness_arg:
+        if extra.startswith("--") and extra[2:].split("=", 1)[0] in MANAGED_OPTIONS:
+            print(
+                f"[bench-fanout] ERROR: --harness-arg={extra} is set by bench-fanout itself; "
+                "use its own option instead",
+                file=sys.stderr,
+            )
+            return 1
+    if args.keep is not None:
+        args.keep.mkdir(parents=True, exist_ok=True)
+        return run(args, args.keep)
+    with tempfile.TemporaryDirectory(prefix="bench-fanout-") as scratch:
+        return run(args, Path(scratch))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
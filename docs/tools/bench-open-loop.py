@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""Open-loop HTTP load generator for Bamboo benchmarks.
+
+`bin/bench/http` is closed-loop: a new request starts only when another one
+finishes, so a stalled server simply receives less traffic and the stall never
+shows up in the percentiles (coordinated omission). This driver instead sends
+requests on a fixed schedule (`--rate` per second, evenly spaced or Poisson)
+no matter how the server behaves, and measures every latency from the request's
+*intended* send time. Time spent waiting for a free connection, or behind a
+stalled server, is therefore part of the reported latency.
+
+Requests are multiplexed over a pool of `--connections` keep-alive HTTP/1.1
+connections using only the standard library (`asyncio` streams). Results are
+appended to `--csv` using the harness schema from `docs/benchmarks/README.md`
+(the `concurrency` column holds the connection count), so `plot-bench.py`
+charts them unchanged. `--histogram` writes the same `*.hist.jsonl` sidecar as
+the harness.
+
+`--stand-in` starts a local HTTP server in the same event loop (fixed service
+time, optional one-off stall half-way through the window) so the generator can
+be exercised without a running Bamboo instance.
+
+Usage examples
+--------------
+>>> # 2,000 req/s for 60 s against a local server, appended to a dataset
+>>> python docs/tools/bench-open-loop.py --target http://127.0.0.1:9501/ \
+...     --rate 2000 --duration 60 --connections 64 --label open-loop-1.0 \
+...     --csv docs/benchmarks/data/20240601-open-loop.csv --histogram
+
+>>> # Self-check: a 1 s stall must show up in p99
+>>> python docs/tools/bench-open-loop.py --stand-in --stand-in-stall 1.0 --rate 500 --duration 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import sys
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from bench_csv import append_row
+from latency_histogram import LatencyHistogram, histogram_path
+
+# Warn when the generator itself falls this far behind its schedule.
+SCHEDULE_LAG_WARNING = 0.05
+
+
+@dataclass
+class RunResult:
+    requests: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    latencies: array = field(default_factory=lambda: array("d"))
+    status_counts: Dict[int, int] = field(default_factory=dict)
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    max_lag: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.duration if self.duration > 0 else 0.0
+
+
+def percentile(values: Sequence[float], percentile: float) -> float:
+    """Linear interpolation between closest ranks, as `bin/bench/http` computes it."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = percentile / 100 * (len(ordered) - 1)
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+def build_request(target: str, method: str, headers: Sequence[str], body: str | None) -> bytes:
+    parts = urlsplit(target)
+    path = parts.path or "/"
+    if parts.query:
+        path += f"?{parts.query}"
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: keep-alive"]
+    lines.extend(headers)
+    payload = body.encode("utf-8") if body is not None else b""
+    if body is not None:
+        lines.append(f"Content-Length: {len(payload)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload
+
+
+async def read_response(reader: asyncio.StreamReader, method: str) -> Tuple[int, bool]:
+    """Consume one response; return its status and whether the connection stays usable."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed before the status line")
+    version, status = status_line.split(None, 2)[:2]
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    code = int(status)
+    keep_alive = version == b"HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    if method == "HEAD" or code in (204, 304) or 100 <= code < 200:
+        return code, keep_alive
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                return code, keep_alive
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+        return code, keep_alive
+    await reader.read()
+    return code, False
+
+
+class ConnectionPool:
+    """At most `size` keep-alive connections; callers queue for a free one."""
+
+    def __init__(self, target: str, size: int) -> None:
+        parts = urlsplit(target)
+        self.secure = parts.scheme == "https"
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if self.secure else 80)
+        self.idle: asyncio.Queue = asyncio.Queue()
+        for _ in range(size):
+            self.idle.put_nowait(None)
+
+    async def acquire(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        connection = await self.idle.get()
+        if connection is None:
+            try:
+                connection = await asyncio.open_connection(
+                    self.host, self.port, ssl=ssl.create_default_context() if self.secure else None
+                )
+            except BaseException:
+                self.idle.put_nowait(None)
+                raise
+        return connection
+
+    def release(self, connection, reusable: bool) -> None:
+        if not reusable:
+            connection[1].close()
+            connection = None
+        self.idle.put_nowait(connection)
+
+    async def close(self) -> None:
+        while not self.idle.empty():
+            connection = self.idle.get_nowait()
+            if connection is not None:
+                connection[1].close()
+                await asyncio.gather(connection[1].wait_closed(), return_exceptions=True)
+
+
+async def run_open_loop(
+    target: str,
+    *,
+    rate: float,
+    duration: float,
+    connections: int,
+    method: str = "GET",
+    headers: Sequence[str] = (),
+    body: str | None = None,
+    timeout: float = 30.0,
+    arrival: str = "uniform",
+    seed: int | None = None,
+) -> RunResult:
+    """Issue `rate` requests/second for `duration` seconds on a fixed schedule."""
+    loop = asyncio.get_running_loop()
+    pool = ConnectionPool(target, connections)
+    request = build_request(target, method, headers, body)
+    result = RunResult()
+    rng = random.Random(seed)
+
+    async def issue(intended: float) -> None:
+        connection = None
+        reusable = False
+        try:
+            connection = await pool.acquire()
+            reader, writer = connection
+            writer.write(request)
+            await writer.drain()
+            status, reusable = await read_response(reader, method)
+        except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+            result.errors += 1
+            return
+        finally:
+            if connection is not None:
+                pool.release(connection, reusable)
+        latency_ms = (loop.time() - intended) * 1000.0
+        result.latencies.append(latency_ms)
+        result.histogram.record(round(latency_ms * 1000))
+        result.status_counts[status] = result.status_counts.get(status, 0) + 1
+        result.requests += 1
+
+    start = loop.time()
+    deadline = start + duration
+    intended = start
+    tasks: List[asyncio.Task] = []
+    while intended < deadline:
+        delay = intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            result.max_lag = max(result.max_lag, -delay)
+        tasks.append(loop.create_task(issue(intended)))
+        intended += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        result.errors += len(pending)
+    result.duration = max(0.001, loop.time() - start)
+    await pool.close()
+    return result
+
+
+class StandInServer:
+    """Minimal keep-alive HTTP server with a fixed service time and one optional stall."""
+
+    def __init__(self, delay: float, stall: float = 0.0, stall_at: float | None = None) -> None:
+        self.delay = delay
+        self.stall = stall
+        self.stall_at = stall_at
+        self.clients: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        self.clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                length = 0
+                line = await reader.readline()
+                if not line:
+                    break
+                while line not in (b"\r\n", b"\n", b""):
+                    line = await reader.readline()
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                now = loop.time()
+                if self.stall and self.stall_at is not None and now >= self.stall_at:
+                    resume = self.stall_at + self.stall
+                    if now < resume:
+                        await asyncio.sleep(resume - now)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                    b"Content-Length: 2\r\nConnection: keep-alive\r\n\r\nok"
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+
+    async def close(self) -> None:
+        # Closing the transports hands every handler an EOF so it returns normally.
+        tasks = list(self.clients.values())
+        for writer in list(self.clients):
+            writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Drive a fixed request rate and measure latency from intended send times.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--target", default="http://127.0.0.1:9501/", help="URL to exercise.")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Target requests/second.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unrecorded warm-up seconds.")
+    parser.add_argument(
+        "--connections", type=int, default=64, help="Keep-alive connections (CSV concurrency)."
+    )
+    parser.add_argument("--method", default="GET", help="HTTP method.")
+    parser.add_argument("--body", help="Request body applied to every request.")
+    parser.add_argument(
+        "--header", action="append", default=[], help="Extra 'Name: Value' header (repeatable)."
+    )
+    parser.add_argument(
+        "--arrival",
+        choices=("uniform", "poisson"),
+        default="uniform",
+        help="Evenly spaced sends or exponential inter-arrival times.",
+    )
+    parser.add_argument("--seed", type=int, help="Seed for Poisson arrivals.")
+    parser.add_argument(
+        "--timeout", type=float, default=30.0, help="Seconds to wait for stragglers at the end."
+    )
+    parser.add_argument("--label", help="Scenario label (defaults to 'METHOD URL open-loop').")
+    parser.add_argument("--csv", type=Path, help="Append a harness-schema row to this CSV.")
+    parser.add_argument(
+        "--histogram",
+        nargs="?",
+        const="",
+        help="Append a latency histogram line (defaults to the --csv path with .hist.jsonl).",
+    )
+    parser.add_argument(
+        "--stand-in", action="store_true", help="Serve a local stand-in and target it."
+    )
+    parser.add_argument(
+        "--stand-in-delay", type=float, default=2.0, help="Stand-in service time (ms)."
+    )
+    parser.add_argument(
+        "--stand-in-stall",
+        type=float,
+        default=0.0,
+        help="Freeze the stand-in once for this many seconds half-way through the window.",
+    )
+    return parser.parse_args(argv)
+
+
+async def _run(args: argparse.Namespace) -> RunResult:
+    server = stand_in = None
+    target = args.target
+    if args.stand_in:
+        loop = asyncio.get_running_loop()
+        stall_at = loop.time() + args.warmup + args.duration / 2
+        stand_in = StandInServer(args.stand_in_delay / 1000.0, args.stand_in_stall, stall_at)
+        server = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        target = f"http://127.0.0.1:{port}/"
+        args.target = target
+    options = dict(
+        connections=max(1, args.connections),
+        method=args.method.upper(),
+        headers=[entry.strip() for entry in args.header if ":" in entry],
+        body=args.body,
+        timeout=args.timeout,
+        arrival=args.arrival,
+        seed=args.seed,
+    )
+    try:
+        if args.warmup > 0:
+            print(f"[bench-open-loop] warm-up for {args.warmup:.1f} seconds...", file=sys.stderr)
+            await run_open_loop(target, rate=args.rate, duration=args.warmup, **options)
+        return await run_open_loop(target, rate=args.rate, duration=args.duration, **options)
+    finally:
+        if server is not None:
+            server.close()
+            await stand_in.close()
+            await server.wait_closed()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.rate <= 0 or args.duration <= 0:
+        print("[bench-open-loop] ERROR: --rate and --duration must be positive", file=sys.stderr)
+        return 1
+    histogram_file = None
+    if args.histogram is not None:
+        if args.histogram:
+            histogram_file = Path(args.histogram)
+        elif args.csv is not None:
+            histogram_file = histogram_path(args.csv)
+        else:
+            print("[bench-open-loop] ERROR: --histogram needs a path or --csv", file=sys.stderr)
+            return 1
+
+    result = asyncio.run(_run(args))
+    method = args.method.upper()
+    label = args.label or f"{method} {args.target} open-loop"
+    p50, p95, p99 = (percentile(result.latencies, q) for q in (50.0, 95.0, 99.0))
+    print(f"Scenario: {label}")
+    print(f"Target:   {args.target}")
+    print(f"Rate:     {args.rate:.2f} requests/second scheduled ({args.arrival})")
+    print(f"Duration: {args.duration:.2f}s (actual {result.duration:.2f}s)")
+    print(f"Throughput: {result.throughput:.2f} requests/second")
+    print(f"Requests: {result.requests} (errors: {result.errors})")
+    if result.requests:
+        print(f"Latency p50: {p50:.2f} ms")
+        print(f"Latency p95: {p95:.2f} ms")
+        print(f"Latency p99: {p99:.2f} ms")
+    if result.status_counts:
+        print("Status codes:")
+        for status, count in sorted(result.status_counts.items()):
+            print(f"  {status} => {count}")
+    if result.max_lag > SCHEDULE_LAG_WARNING:
+        print(
+            f"[bench-open-loop] WARNING: generator fell {result.max_lag * 1000:.1f} ms behind "
+            "schedule; latencies include that lag. Lower --rate or add generator hosts.",
+            file=sys.stderr,
+        )
+
+    if args.csv is not None:
+        append_row(
+            args.csv,
+            {
+                "scenario": label,
+                "target": args.target,
+                "method": method,
+                "concurrency": args.connections,
+                "duration_seconds": round(result.duration, 4),
+                "requests": result.requests,
+                "requests_per_second": round(result.throughput, 4),
+                "p50_ms": round(p50, 4),
+                "p95_ms": round(p95, 4),
+                "p99_ms": round(p99, 4),
+                "error_count": result.errors,
+                "error_rate": result.errors / result.requests if result.requests else 0.0,
+            },
+        )
+        print(f"CSV row appended to {args.csv}")
+    if histogram_file is not None:
+        histogram_file.parent.mkdir(parents=True, exist_ok=True)
+        record = result.histogram.to_record(
+            recorded_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            scenario=label,
+            target=args.target,
+            method=method,
+            concurrency=args.connections,
+        )
+        with histogram_file.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        print(f"Latency histogram appended to {histogram_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
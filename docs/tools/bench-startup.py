@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Guard the cold-start cost of `plot-bench.py`'s parse-only mode.
+
+CI jobs that only validate CSVs or emit the Markdown index run
+`plot-bench.py --validate-only`, which must never import matplotlib. This script
+times that invocation in fresh interpreters, subtracts the cost of starting a
+bare interpreter, and fails when the median overhead exceeds the budget or when
+matplotlib shows up in the import trace.
+
+Usage examples
+--------------
+>>> python docs/tools/bench-startup.py
+>>> python docs/tools/bench-startup.py docs/benchmarks/data --runs 10 --budget 0.4
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+PLOT_BENCH = Path(__file__).with_name("plot-bench.py")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Fail when plot-bench.py --validate-only cold start exceeds a budget.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        default=[Path("docs/benchmarks/data")],
+        help="CSV file(s) or directories passed to plot-bench.py.",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Timed cold starts per command.")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0.5,
+        help="Maximum median seconds above a bare interpreter start.",
+    )
+    return parser.parse_args()
+
+
+def _time_command(command: Sequence[str], runs: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def imported_modules(command: Sequence[str]) -> List[str]:
+    """Return the top-level modules imported by `command` (via -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        check=False,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    modules: List[str] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        name = line.rsplit("|", 1)[-1].strip()
+        if name and name != "imported package":
+            modules.append(name.split(".")[0])
+    return modules
+
+
+def main() -> int:
+    args = parse_args()
+    command = [str(PLOT_BENCH), "--validate-only", *map(str, args.paths)]
+    runs = max(1, args.runs)
+
+    interpreter = statistics.median(_time_command([sys.executable, "-c", "pass"], runs))
+    samples = _time_command([sys.executable, *command], runs)
+    median = statistics.median(samples)
+    overhead = median - interpreter
+    print(
+        f"[bench-startup] validate-only median {median * 1000:.1f} ms "
+        f"(min {min(samples) * 1000:.1f} ms, max {max(samples) * 1000:.1f} ms, "
+        f"interpreter {interpreter * 1000:.1f} ms, overhead {overhead * 1000:.1f} ms, "
+        f"budget {args.budget * 1000:.0f} ms)"
+    )
+
+    failed = False
+    if "matplotlib" in imported_modules(command):
+        print("[bench-startup] FAIL: --validate-only imported matplotlib", file=sys.stderr)
+        failed = True
+    if overhead > args.budget:
+        print("[bench-startup] FAIL: cold start exceeded the budget", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
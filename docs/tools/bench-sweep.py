@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Sweep concurrency levels with `bin/bench/http` until the server saturates.
+
+Every harness run measures one `--concurrency` value; charts need a series.
+This driver runs a geometric series (`--start`, `--factor`, `--max`) and
+appends every run to the same `--csv` dataset. It stops early when:
+
+* throughput has not grown by `--plateau` percent for `--patience` levels,
+* the error rate exceeds `--max-error-rate`, or
+* p99 exceeds `--max-p99` milliseconds.
+
+With `--adaptive`, the levels between the last two geometric steps around the
+detected knee are filled in afterwards (`--refine` extra runs), so the bend is
+resolved without measuring every level up front. `plot-bench.py` marks the
+knee (see `capacity.find_knee`) on the dataset's charts. The final report
+includes the Universal Scalability Law prediction (`capacity.fit_usl`).
+
+With `--processes N` each level is driven by `bench-fanout.py` instead of a
+single harness process. `--harness-arg` values that bench-fanout takes itself
+(`--histogram`, `--header`...) are passed to it; the others are forwarded to
+every harness process through its `--harness-arg`.
+
+Usage examples
+--------------
+>>> python docs/tools/bench-sweep.py --target http://127.0.0.1:9501/ \
+...     --start 4 --factor 2 --max 1024 --duration 30 --label sweep-1.0 \
+...     --csv docs/benchmarks/data/20240601-sweep.csv --adaptive
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from capacity import find_knee, fit_usl, level_means
+
+ROOT = Path(__file__).resolve().parents[2]
+HARNESS = ROOT / "bin" / "bench" / "http"
+FANOUT = Path(__file__).with_name("bench-fanout.py")
+
+# Harness options bench-fanout.py takes itself; everything else goes through its --harness-arg.
+FANOUT_OPTIONS = ("method", "body", "header", "histogram")
+
+
+def geometric_levels(start: int, factor: float, maximum: int) -> List[int]:
+    levels: List[int] = []
+    level = float(max(1, start))
+    while round(level) <= maximum:
+        if not levels or round(level) > levels[-1]:
+            levels.append(int(round(level)))
+        level *= factor
+    return levels
+
+
+def last_row(csv_path: Path) -> Dict[str, str]:
+    with csv_path.open("r", encoding="utf-8", newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    if not rows:
+        raise ValueError(f"{csv_path} has no rows")
+    return rows[-1]
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run a concurrency sweep and stop once throughput saturates.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--csv", type=Path, required=True, help="Dataset every run appends to.")
+    parser.add_argument("--target", default="http://127.0.0.1:9501/", help="URL to exercise.")
+    parser.add_argument("--label", help="Scenario label shared by every run.")
+    parser.add_argument("--start", type=int, default=4, help="First concurrency level.")
+    parser.add_argument("--factor", type=float, default=2.0, help="Geometric step.")
+    parser.add_argument("--max", type=int, default=1024, help="Highest concurrency level.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Warm-up seconds per level.")
+    parser.add_argument(
+        "--plateau",
+        type=float,
+        default=5.0,
+        help="Minimum throughput gain (percent) that still counts as growth.",
+    )
+    parser.add_argument(
+        "--patience", type=int, default=2, help="Levels without growth before stopping."
+    )
+    parser.add_argument(
+        "--max-error-rate", type=float, default=0.01, help="Stop above this error rate."
+    )
+    parser.add_argument("--max-p99", type=float, help="Stop once p99 exceeds this (ms).")
+    parser.add_argument(
+        "--adaptive", action="store_true", help="Refine the levels around the detected knee."
+    )
+    parser.add_argument("--refine", type=int, default=3, help="Extra levels with --adaptive.")
+    parser.add_argument(
+        "--processes", type=int, default=1, help="Drive each level with bench-fanout.py."
+    )
+    parser.add_argument("--cpus", default="", help="CPU list for bench-fanout.py.")
+    parser.add_argument("--php", default="php", help="PHP binary used to run the harness.")
+    parser.add_argument(
+        "--harness-arg",
+        action="append",
+        default=[],
+        help="Extra argument passed through to every run, e.g. --harness-arg=--histogram.",
+    )
+    return parser.parse_args(argv)
+
+
+def run_level(args: argparse.Namespace, concurrency: int) -> Dict[str, str]:
+    common = [
+        f"--target={args.target}",
+        f"--duration={args.duration}",
+        f"--concurrency={concurrency}",
+        f"--warmup={args.warmup}",
+        f"--csv={args.csv}",
+    ]
+    if args.label:
+        common.append(f"--label={args.label}")
+    if args.processes > 1:
+        command = [sys.executable, str(FANOUT), f"--processes={args.processes}"]
+        command.append(f"--php={args.php}")
+        if args.cpus:
+            command.append(f"--cpus={args.cpus}")
+        command += common
+        for extra in args.harness_arg:
+            if extra.startswith("--") and extra[2:].split("=", 1)[0] in FANOUT_OPTIONS:
+                command.append(extra)
+            else:
+                command.append(f"--harness-arg={extra}")
+    else:
+        command = [args.php, str(HARNESS)] + common + list(args.harness_arg)
+    print(f"[bench-sweep] concurrency {concurrency}: {' '.join(command)}", flush=True)
+    subprocess.run(command, check=True)
+    return last_row(args.csv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    levels = geometric_levels(args.start, args.factor, args.max)
+    measured: List[int] = []
+    throughput: List[float] = []
+    best = 0.0
+    stalled = 0
+    reason = "reached --max"
+    try:
+        for level in levels:
+            row = run_level(args, level)
+            rate = float(row["requests_per_second"])
+            error_rate = float(row.get("error_rate") or 0.0)
+            p99 = float(row.get("p99_ms") or 0.0)
+            measured.append(level)
+            throughput.append(rate)
+            print(
+                f"[bench-sweep] concurrency {level}: {rate:.1f} req/s, p99 {p99:.2f} ms, "
+                f"error rate {error_rate:.4f}"
+            )
+            if error_rate > args.max_error_rate:
+                reason = f"error rate {error_rate:.4f} above {args.max_error_rate}"
+                break
+            if args.max_p99 is not None and p99 > args.max_p99:
+                reason = f"p99 {p99:.2f} ms above {args.max_p99} ms"
+                break
+            if rate > best * (1 + args.plateau / 100.0):
+                best = rate
+                stalled = 0
+            else:
+                best = max(best, rate)
+                stalled += 1
+                if stalled >= args.patience:
+                    reason = f"throughput plateaued for {stalled} level(s)"
+                    break
+
+        knee = find_knee(*level_means(measured, throughput))
+        if args.adaptive and knee is not None and args.refine > 0:
+            position = measured.index(knee)
+            low = measured[max(0, position - 1)]
+            high = measured[min(len(measured) - 1, position + 1)]
+            step = (high - low) / (args.refine + 1)
+            extra = sorted(
+                {round(low + step * index) for index in range(1, args.refine + 1)} - set(measured)
+            )
+            for level in extra:
+                row = run_level(args, level)
+                measured.append(level)
+                throughput.append(float(row["requests_per_second"]))
+            knee = find_knee(*level_means(measured, throughput))
+    except (subprocess.CalledProcessError, OSError, ValueError) as exc:
+        print(f"[bench-sweep] ERROR: {exc}", file=sys.stderr)
+        return 1
+
+    print(f"[bench-sweep] stopped: {reason}")
+    if knee is None:
+        print("[bench-sweep] no saturation knee detected; extend --max")
+    else:
+        print(f"[bench-sweep] saturation knee at concurrency {knee}")
+    fit = fit_usl(measured, throughput)
+    if fit is not None and fit.peak_concurrency is not None:
+        print(
+            f"[bench-sweep] USL predicts a peak of {fit.peak_throughput:.1f} req/s "
+            f"at concurrency {fit.peak_concurrency:.0f} "
+            f"(σ {fit.contention:.4g}, κ {fit.coherency:.4g})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
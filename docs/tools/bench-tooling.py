@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""Benchmark `plot-bench.py` itself on synthetic datasets.
+
+The datasets come from `synthetic.py`: a corpus of many small files (both CSV
+schemas, with metadata sidecars), one multi-million-row file per schema, and a
+smaller corpus to render. They are generated once per scale and seed under
+`--workdir` and reused by later runs.
+
+Every case runs `plot-bench.py --profile` in a fresh interpreter, `--warmup`
+times unrecorded and then `--repeat` times. The stages of each profile report
+become rows of the harness CSV schema (`bench_csv.HARNESS_FIELDS`), appended
+to `--csv`:
+
+* `scenario`: `<case>/<stage>`, e.g. `harness-2000000/parse`
+* `target`: the `plot-bench.py` arguments of the case
+* `method`: `plot-bench`, and `concurrency` is `--jobs`
+* `duration_seconds`: time spent in the stage during the run
+* `requests` / `requests_per_second`: units processed (files, rows, figures or
+  datasets) and their rate
+* `p50_ms` / `p95_ms` / `p99_ms`: time per dataset in the stage
+* `error_count` / `error_rate`: 1 when the run failed
+
+The results can be charted, indexed and compared like any harness run. With
+`--baseline`, the throughput of every scenario is compared to an earlier
+results CSV (`bench_compare`) and the exit status is 1 on a regression. The
+single-file cases also hold the loader to its ingestion target
+(`PARSE_TARGETS`): a median `parse` rate below it fails the run as well.
+
+Usage examples
+--------------
+>>> # Small suite, appended to .cache/plot-bench/tooling-small.csv
+>>> python docs/tools/bench-tooling.py
+
+>>> # Release check against the previous release's results
+>>> python docs/tools/bench-tooling.py --scale large --repeat 5 \\
+...     --csv docs/benchmarks/data/20240601-tooling.csv \\
+...     --baseline docs/benchmarks/data/20240528-tooling.csv --threshold 10
+
+>>> # Only generate datasets: 5000 files, or one 5M-row legacy-schema file
+>>> python docs/tools/bench-tooling.py generate /tmp/corpus --files 5000 --rows 24
+>>> python docs/tools/bench-tooling.py generate /tmp/big --rows 5000000 --schema legacy
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib.util
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import synthetic
+from bench_compare import compare_samples, render_markdown
+from bench_csv import append_row
+
+PLOT_BENCH = Path(__file__).with_name("plot-bench.py")
+
+# Rows/second the `parse` stage must reach on one core, with NumPy and with the
+# pure-Python fallback (docs/benchmarks/README.md, "Ingestion throughput target").
+PARSE_TARGETS = {"numpy": 250_000.0, "python": 150_000.0}
+
+
+@dataclass(frozen=True)
+class Scale:
+    files: int  # datasets in the many-files corpus
+    rows_per_file: int
+    large_rows: int  # rows of each single-file dataset
+    render_files: int  # datasets charted by the render cases
+
+
+SCALES = {
+    "small": Scale(files=200, rows_per_file=20, large_rows=200_000, render_files=10),
+    "large": Scale(files=5000, rows_per_file=20, large_rows=2_000_000, render_files=100),
+}
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    dataset: str
+    arguments: Tuple[str, ...]
+    # (stage, unit): the unit is a count recorded by the stage; `datasets`
+    # falls back to the number of datasets that went through it.
+    stages: Tuple[Tuple[str, str], ...]
+    # (stage, minimum median units per second)
+    targets: Tuple[Tuple[str, float], ...] = ()
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure plot-bench.py throughput on synthetic datasets.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Dataset sizes.")
+    parser.add_argument("--repeat", type=int, default=3, help="Recorded runs per case.")
+    parser.add_argument("--warmup", type=int, default=1, help="Unrecorded runs per case.")
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to the render cases.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic datasets.")
+    parser.add_argument(
+        "--cases",
+        nargs="*",
+        help="Only run cases whose name starts with one of these (corpus, harness, legacy...).",
+    )
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(".cache/plot-bench/synthetic"),
+        help="Where generated datasets are kept between runs.",
+    )
+    parser.add_argument(
+        "--csv",
+        type=Path,
+        help="Results CSV to append to (default: .cache/plot-bench/tooling-<scale>.csv).",
+    )
+    parser.add_argument("--baseline", type=Path, help="Earlier results CSV to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Throughput loss (percent) that counts as a regression.",
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=0.95, help="Confidence required for a regression."
+    )
+    return parser.parse_args(argv)
+
+
+def parse_generate_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="bench-tooling.py generate",
+        description="Write synthetic benchmark CSVs (and .meta.json sidecars).",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("output", type=Path, help="Directory to write the datasets to.")
+    parser.add_argument("--files", type=int, default=1, help="Number of datasets.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows per dataset.")
+    parser.add_argument(
+        "--schema",
+        choices=(*synthetic.SCHEMAS, "mixed"),
+        default="mixed",
+        help="CSV schema; 'mixed' alternates harness and legacy files.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first dataset.")
+    parser.add_argument(
+        "--no-metadata",
+        dest="metadata",
+        action="store_false",
+        default=argparse.SUPPRESS,
+        help="Do not write .meta.json sidecars (default: write them).",
+    )
+    args = parser.parse_args(argv)
+    # The SUPPRESS default keeps a misleading "(default: True)" out of --help.
+    args.metadata = getattr(args, "metadata", True)
+    return args
+
+
+def generate_main(argv: Sequence[str]) -> int:
+    args = parse_generate_args(argv)
+    if args.files < 1 or args.rows < 1:
+        print("[bench-tooling] --files and --rows must be positive", file=sys.stderr)
+        return 1
+    paths = synthetic.generate_corpus(
+        args.output,
+        args.files,
+        args.rows,
+        schema=args.schema,
+        seed=args.seed,
+        metadata=args.metadata,
+    )
+    size = sum(path.stat().st_size for path in paths)
+    print(
+        f"[bench-tooling] wrote {len(paths)} dataset(s) of {args.rows} rows "
+        f"({size / 2**20:.1f} MiB) to {args.output}"
+    )
+    return 0
+
+
+def datasets(scale: Scale, seed: int) -> Dict[str, Callable[[Path], object]]:
+    """Generators of every dataset a scale needs, by directory name."""
+    corpus = f"corpus-{scale.files}x{scale.rows_per_file}"
+    return {
+        corpus: lambda directory: synthetic.generate_corpus(
+            directory, scale.files, scale.rows_per_file, seed=seed
+        ),
+        f"harness-{scale.large_rows}": lambda directory: synthetic.generate_csv(
+            directory / "20240101-harness.csv", scale.large_rows, seed=seed
+        ),
+        f"legacy-{scale.large_rows}": lambda directory: synthetic.generate_csv(
+            directory / "20240101-legacy.csv", scale.large_rows, schema="legacy", seed=seed
+        ),
+        f"render-{scale.render_files}": lambda directory: synthetic.generate_corpus(
+            directory, scale.render_files, scale.rows_per_file, seed=seed
+        ),
+    }
+
+
+def cases(scale: Scale, jobs: int) -> List[Case]:
+    corpus = f"corpus-{scale.files}x{scale.rows_per_file}"
+    render = f"render-{scale.render_files}"
+    selected = [
+        Case(
+            corpus,
+            corpus,
+            ("--validate-only",),
+            (("discover", "files"), ("parse", "rows"), ("metadata", "datasets")),
+        ),
+        Case(
+            f"index-{scale.files}",
+            corpus,
+            ("--summary", "--index", "index.md"),
+            (("index", "datasets"),),
+        ),
+    ]
+    parse_target = PARSE_TARGETS["numpy" if importlib.util.find_spec("numpy") else "python"]
+    for schema in synthetic.SCHEMAS:
+        name = f"{schema}-{scale.large_rows}"
+        selected.append(
+            Case(
+                name,
+                name,
+                ("--validate-only",),
+                (("parse", "rows"), ("fit", "datasets")),
+                (("parse", parse_target),),
+            )
+        )
+    selected.append(
+        Case(
+            f"{render}-svg",
+            render,
+            ("--force", "--backend", "svg", "--jobs", str(jobs)),
+            (("figure", "figures"), ("savefig.svg", "files")),
+        )
+    )
+    if importlib.util.find_spec("matplotlib") is not None:
+        selected.append(
+            Case(
+                f"{render}-png",
+                render,
+                ("--force", "--formats", "png", "--jobs", str(jobs)),
+                (("figure", "figures"), ("savefig.png", "files")),
+            )
+        )
+    return selected
+
+
+def prepare(workdir: Path, name: str, generate: Callable[[Path], object], seed: int) -> Path:
+    """Generate a dataset directory unless a complete one is already there."""
+    directory = workdir / f"v{synthetic.VERSION}-seed{seed}-{name}"
+    marker = directory / ".complete"
+    if not marker.is_file():
+        print(f"[bench-tooling] generating {directory}")
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        generate(directory)
+        marker.write_text("", encoding="utf-8")
+    return directory
+
+
+def _quantile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank quantile."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+def stage_rows(case: Case, report: dict, jobs: int) -> List[dict]:
+    """One harness-schema row per measured stage of a profile report."""
+    rows = []
+    for stage, unit in case.stages:
+        records = [record for record in report["records"] if record["stage"] == stage]
+        seconds = sum(record["wall_s"] for record in records)
+        units = sum(record["counts"].get(unit, 0) for record in records)
+        if unit == "datasets" and not units:
+            units = len(records)
+        timings = [record["wall_s"] * 1000.0 for record in records] or [0.0]
+        rows.append(
+            {
+                "scenario": f"{case.name}/{stage}",
+                "target": " ".join(case.arguments),
+                "method": "plot-bench",
+                "concurrency": jobs,
+                "duration_seconds": round(seconds, 6),
+                "requests": units,
+                "requests_per_second": round(units / seconds, 1) if seconds > 0 else 0.0,
+                "p50_ms": round(_quantile(timings, 0.50), 3),
+                "p95_ms": round(_quantile(timings, 0.95), 3),
+                "p99_ms": round(_quantile(timings, 0.99), 3),
+                "error_count": 0,
+                "error_rate": 0,
+            }
+        )
+    return rows
+
+
+def _failed_rows(case: Case, jobs: int) -> List[dict]:
+    return [
+        {
+            "scenario": f"{case.name}/{stage}",
+            "target": " ".join(case.arguments),
+            "method": "plot-bench",
+            "concurrency": jobs,
+            "duration_seconds": 0,
+            "requests": 0,
+            "requests_per_second": 0,
+            "p50_ms": 0,
+            "p95_ms": 0,
+            "p99_ms": 0,
+            "error_count": 1,
+            "error_rate": 1,
+        }
+        for stage, _ in case.stages
+    ]
+
+
+def run_case(case: Case, directory: Path, args: argparse.Namespace) -> Tuple[List[dict], dict]:
+    """Rows of every recorded run of `case`, and the last profile report."""
+    rows: List[dict] = []
+    report: dict = {}
+    with tempfile.TemporaryDirectory(prefix="bench-tooling-") as scratch:
+        report_path = Path(scratch) / "profile.json"
+        command = [
+            sys.executable,
+            str(PLOT_BENCH),
+            str(directory),
+            "--output",
+            str(Path(scratch) / "charts"),
+            "--profile",
+            str(report_path),
+            *case.arguments,
+        ]
+        for attempt in range(args.warmup + args.repeat):
+            report_path.unlink(missing_ok=True)
+            completed = subprocess.run(
+                command, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+            )
+            if attempt < args.warmup:
+                continue
+            if completed.returncode != 0 or not report_path.is_file():
+                tail = completed.stderr.strip().splitlines()[-1:] or ["no output"]
+                print(f"[bench-tooling] {case.name} failed: {tail[0]}", file=sys.stderr)
+                rows.extend(_failed_rows(case, args.jobs))
+                continue
+            report = json.loads(report_path.read_text(encoding="utf-8"))
+            rows.extend(stage_rows(case, report, args.jobs))
+    return rows, report
+
+
+def describe(case: Case, rows: Sequence[dict]) -> List[str]:
+    """Median throughput per stage over the successful runs."""
+    lines = []
+    for stage, unit in case.stages:
+        scenario = f"{case.name}/{stage}"
+        runs = [row for row in rows if row["scenario"] == scenario and not row["error_count"]]
+        if not runs:
+            continue
+        rate = statistics.median(row["requests_per_second"] for row in runs)
+        seconds = statistics.median(row["duration_seconds"] for row in runs)
+        lines.append(
+            f"{scenario}: {runs[0]['requests']} {unit} in {seconds:.3f} s "
+            f"({rate:,.0f}/s, median of {len(runs)})"
+        )
+    return lines
+
+
+def missed_targets(case: Case, rows: Sequence[dict]) -> List[str]:
+    """Stages of `case` whose median rate over the successful runs is below target."""
+    missed = []
+    for stage, target in case.targets:
+        scenario = f"{case.name}/{stage}"
+        rates = [
+            row["requests_per_second"]
+            for row in rows
+            if row["scenario"] == scenario and not row["error_count"]
+        ]
+        if rates and statistics.median(rates) < target:
+            missed.append(
+                f"{scenario} ran at {statistics.median(rates):,.0f}/s, "
+                f"below its {target:,.0f}/s target"
+            )
+    return missed
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PLOT_BENCH.parent,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def write_metadata(csv_path: Path, args: argparse.Namespace, report: dict) -> Path:
+    """Describe the environment of the latest run in `<results>.meta.json`."""
+    metadata = {
+        "title": f"plot-bench tooling ({args.scale})",
+        "date": date.today().isoformat(),
+        "commit": _git_commit(),
+        "tool_version": report.get("tool_version"),
+        "python_version": platform.python_version(),
+        "numpy": report.get("numpy"),
+        "os": platform.platform(),
+        "hardware": platform.processor() or platform.machine(),
+        "notes": (
+            f"Synthetic datasets (scale {args.scale}, seed {args.seed}); "
+            f"{args.repeat} run(s) per case after {args.warmup} warm-up run(s)."
+        ),
+    }
+    path = csv_path.with_suffix(".meta.json")
+    path.write_text(json.dumps(metadata, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def read_samples(csv_path: Path) -> Dict[Tuple[str, int], Dict[str, List[float]]]:
+    """Throughput per `(scenario, concurrency)` of a results CSV, failed runs excluded."""
+    samples: Dict[Tuple[str, int], Dict[str, List[float]]] = {}
+    with csv_path.open("r", encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            if int(row["error_count"] or 0):
+                continue
+            key = (row["scenario"], int(row["concurrency"]))
+            metrics = samples.setdefault(key, {})
+            metrics.setdefault("throughput", []).append(float(row["requests_per_second"]))
+    return samples
+
+
+def check_baseline(args: argparse.Namespace, rows: Sequence[dict]) -> int:
+    baseline = read_samples(args.baseline)
+    candidate: Dict[Tuple[str, int], Dict[str, List[float]]] = {}
+    for row in rows:
+        if row["error_count"]:
+            continue
+        metrics = candidate.setdefault((row["scenario"], row["concurrency"]), {})
+        metrics.setdefault("throughput", []).append(float(row["requests_per_second"]))
+    comparison = compare_samples(
+        baseline, candidate, threshold=args.threshold, confidence=args.confidence
+    )
+    print(render_markdown(comparison, threshold=args.threshold, confidence=args.confidence))
+    regressions = [row for row in comparison if row.status == "regression"]
+    if regressions:
+        print(
+            f"[bench-tooling] FAIL: {len(regressions)} scenario(s) regressed against "
+            f"{args.baseline}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "generate":
+        return generate_main(sys.argv[2:])
+    args = parse_args(sys.argv[1:])
+    if args.repeat < 1:
+        print("[bench-tooling] --repeat must be at least 1", file=sys.stderr)
+        return 1
+    scale = SCALES[args.scale]
+    csv_path = args.csv or Path(f".cache/plot-bench/tooling-{args.scale}.csv")
+    generators = datasets(scale, args.seed)
+    selected = [
+        case
+        for case in cases(scale, args.jobs)
+        if not args.cases or any(case.name.startswith(prefix) for prefix in args.cases)
+    ]
+    if not selected:
+        print("[bench-tooling] no case matches --cases", file=sys.stderr)
+        return 1
+
+    results: List[dict] = []
+    report: dict = {}
+    failed = False
+    missed: List[str] = []
+    for case in selected:
+        directory = prepare(args.workdir, case.dataset, generators[case.dataset], args.seed)
+        rows, last = run_case(case, directory, args)
+        report = last or report
+        failed = failed or any(row["error_count"] for row in rows)
+        for line in describe(case, rows):
+            print(f"[bench-tooling] {line}")
+        missed.extend(missed_targets(case, rows))
+        results.extend(rows)
+
+    for row in results:
+        append_row(csv_path, row)
+    write_metadata(csv_path, args, report)
+    print(f"[bench-tooling] appended {len(results)} row(s) to {csv_path}")
+    for line in missed:
+        print(f"[bench-tooling] FAIL: {line}", file=sys.stderr)
+    status = 1 if failed or missed else 0
+    if args.baseline:
+        status = max(status, check_baseline(args, results))
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
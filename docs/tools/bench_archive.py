@@ -0,0 +1,337 @@
+"""Compact typed binary archive of a benchmark CSV, read through `mmap`.
+
+Re-reading CSV text on every chart regeneration costs far more than the
+numbers themselves. An archive (`<dataset>.bba`) stores the same table
+column-wise so it can be mapped into memory and used without parsing::
+
+    offset 0   magic b"BAMBOOBA", format version (u32), manifest length (u32)
+    16         manifest: UTF-8 JSON with the row count, the column directory,
+               the string dictionary and the dataset metadata
+    aligned    one fixed-width little-endian column after another, each
+               starting on an 8-byte boundary
+
+Each column gets the narrowest fixed-width type that holds every value
+exactly:
+
+* `int`: every cell is an integer; stored as int8/16/32/64.
+* `decimal`: every cell is a number that equals `mantissa / 10**scale` for a
+  `scale` of at most `MAX_SCALE` (`p99_ms`, `requests_per_second`...). The
+  integer mantissas are stored as int8/16/32/64.
+* `float`: any other numeric column, stored as float64. Empty cells are NaN.
+* `string`: anything else, stored as uint8/16/32 codes into the shared
+  dictionary, so `scenario`, `target` and `method` usually cost one byte a row.
+
+The metadata block is the dataset's `.meta.json` object, stored verbatim.
+
+`Archive.column` reads straight from the mapping. With NumPy, `int`, `float`
+and `string` columns are `numpy.frombuffer` views: nothing is copied and pages
+are only read when touched. `decimal` columns are scaled with one vectorised
+division. The `array` fallback copies each column once with `frombytes`.
+Neither path parses any text.
+
+`archive_to_csv` writes the columns back in their original order, and every
+value round-trips exactly. Numbers are written in their shortest form, with
+integral floats lacking a `.0` as the harness writes them. Only the spelling of
+a number can differ from the source file, never its value.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+ARCHIVE_SUFFIX = ".bba"
+
+MAGIC = b"BAMBOOBA"
+
+# Bumped whenever the layout changes; readers refuse other versions.
+FORMAT_VERSION = 1
+
+# Most decimal places a `decimal` column may keep.
+MAX_SCALE = 9
+
+_PREAMBLE = struct.Struct("<8sII")
+
+# Stored dtype -> `array` typecode.
+_TYPECODES = {
+    "<i1": "b",
+    "<i2": "h",
+    "<i4": "i",
+    "<i8": "q",
+    "<u1": "B",
+    "<u2": "H",
+    "<u4": "I",
+    "<f8": "d",
+}
+
+_ALIGNMENT = 8
+
+# Integers above this lose precision as float64, so mantissas must stay below.
+_EXACT_INTEGER = 2**53
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _int_dtype(values: Sequence[int], *, signed: bool = True) -> str:
+    low, high = (min(values), max(values)) if len(values) else (0, 0)
+    for width in (1, 2, 4, 8):
+        bits = width * 8
+        if signed and -(2 ** (bits - 1)) <= low and high < 2 ** (bits - 1):
+            return f"<i{width}"
+        if not signed and high < 2**bits:
+            return f"<u{width}"
+    raise OverflowError("Integer out of 64-bit range")
+
+
+def _decimal(values: Sequence[float]) -> Tuple[int, Sequence[int]] | None:
+    """`(scale, mantissas)` with `mantissa / 10**scale == value` for every value."""
+    if np is not None:
+        floats = np.asarray(values, dtype=np.float64)
+        for scale in range(MAX_SCALE + 1):
+            factor = 10**scale
+            mantissas = np.rint(floats * factor)
+            if (np.abs(mantissas) < _EXACT_INTEGER).all() and (mantissas / factor == floats).all():
+                return scale, mantissas.astype(np.int64).tolist()
+        return None
+    for scale in range(MAX_SCALE + 1):
+        factor = 10**scale
+        mantissas = []
+        for value in values:
+            if value != value or abs(value) * factor >= _EXACT_INTEGER:
+                return None
+            mantissa = round(value * factor)
+            if mantissa / factor != value:
+                break
+            mantissas.append(mantissa)
+        else:
+            return scale, mantissas
+    return None
+
+
+def _encode_column(values: Sequence[str], dictionary: Dict[str, int]) -> Tuple[dict, array]:
+    """Directory entry and packed values of one CSV column."""
+    try:
+        integers = list(map(int, values))
+        dtype = _int_dtype(integers)
+        return {"type": "int", "dtype": dtype}, array(_TYPECODES[dtype], integers)
+    except (ValueError, OverflowError):
+        pass
+    try:
+        floats = [float(value) if value.strip() else math.nan for value in values]
+    except ValueError:
+        codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+        dtype = _int_dtype(codes, signed=False)
+        return {"type": "string", "dtype": dtype}, array(_TYPECODES[dtype], codes)
+    decimal = _decimal(floats)
+    if decimal is not None:
+        scale, mantissas = decimal
+        dtype = _int_dtype(mantissas)
+        entry = {"type": "decimal", "dtype": dtype, "scale": scale}
+        return entry, array(_TYPECODES[dtype], mantissas)
+    return {"type": "float", "dtype": "<f8"}, array("d", floats)
+
+
+def write_archive(
+    path: Path,
+    fieldnames: Sequence[str],
+    rows: Sequence[Sequence[str]],
+    metadata: dict | None = None,
+) -> None:
+    """Write CSV `rows` (lists of strings in `fieldnames` order) as an archive."""
+    dictionary: Dict[str, int] = {}
+    columns = list(zip(*rows)) if rows else [() for _ in fieldnames]
+    encoded = [_encode_column(values, dictionary) for values in columns]
+    directory = [{"name": name, **entry} for name, (entry, _) in zip(fieldnames, encoded)]
+    manifest = {
+        "rows": len(rows),
+        "columns": directory,
+        "dictionary": sorted(dictionary, key=dictionary.__getitem__),
+        "metadata": metadata or {},
+    }
+    # Offsets are part of the manifest, so lay out until its length settles.
+    data_start = 0
+    while True:
+        offset = data_start
+        for entry, (_, values) in zip(directory, encoded):
+            entry["offset"] = offset
+            offset = _align(offset + len(values) * values.itemsize)
+        payload = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        if _align(_PREAMBLE.size + len(payload)) == data_start:
+            break
+        data_start = _align(_PREAMBLE.size + len(payload))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        handle.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(payload)))
+        handle.write(payload)
+        for entry, (_, values) in zip(directory, encoded):
+            handle.write(b"\0" * (entry["offset"] - handle.tell()))
+            if sys.byteorder == "big":
+                values.byteswap()
+            handle.write(values.tobytes())
+
+
+def _read_manifest(handle, path: Path) -> dict:
+    preamble = handle.read(_PREAMBLE.size)
+    if len(preamble) < _PREAMBLE.size:
+        raise ValueError(f"{path} is too short to be a benchmark archive")
+    magic, version, length = _PREAMBLE.unpack(preamble)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a benchmark archive")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} uses archive format {version}; expected {FORMAT_VERSION}")
+    try:
+        return json.loads(handle.read(length).decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError(f"Corrupt manifest in {path}: {exc}") from exc
+
+
+class Archive:
+    """Read-only, memory-mapped view of a `.bba` file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with path.open("rb") as handle:
+            manifest = _read_manifest(handle, path)
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.rows: int = manifest["rows"]
+        self.metadata: dict = manifest["metadata"]
+        self.dictionary: List[str] = manifest["dictionary"]
+        self._columns: Dict[str, dict] = {entry["name"]: entry for entry in manifest["columns"]}
+        for entry in self._columns.values():
+            if entry.get("dtype") not in _TYPECODES:
+                raise ValueError(f"Column {entry['name']!r} in {path} has an unknown type")
+            end = entry["offset"] + self.rows * int(entry["dtype"][2:])
+            if end > len(self._map):
+                raise ValueError(f"Column {entry['name']!r} runs past the end of {path}")
+
+    @property
+    def fieldnames(self) -> List[str]:
+        return list(self._columns)
+
+    def kind(self, name: str) -> str:
+        """`int`, `decimal`, `float` or `string`."""
+        return self._columns[name]["type"]
+
+    def _raw(self, entry: dict):
+        dtype = entry["dtype"]
+        if np is not None:
+            return np.frombuffer(self._map, dtype=dtype, count=self.rows, offset=entry["offset"])
+        values = array(_TYPECODES[dtype])
+        stop = entry["offset"] + self.rows * values.itemsize
+        with memoryview(self._map) as view:
+            values.frombytes(view[entry["offset"] : stop])
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def column(self, name: str):
+        """Values in their stored width; `decimal` as float64, `string` as codes."""
+        entry = self._columns[name]
+        raw = self._raw(entry)
+        if entry["type"] != "decimal":
+            return raw
+        factor = 10 ** entry["scale"]
+        if np is not None:
+            return raw / factor
+        return array("d", [mantissa / factor for mantissa in raw])
+
+    def strings(self, name: str) -> List[str]:
+        dictionary = self.dictionary
+        codes = self.column(name)
+        return [dictionary[code] for code in (codes.tolist() if np is not None else codes)]
+
+    def distinct(self, name: str) -> set[str]:
+        codes = self.column(name)
+        unique = np.unique(codes).tolist() if np is not None else set(codes)
+        return {self.dictionary[code] for code in unique}
+
+    def close(self) -> None:
+        # Views handed out by `column` keep the mapping alive until released.
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_metadata(path: Path) -> dict:
+    """The metadata block of an archive, without mapping its columns."""
+    with path.open("rb") as handle:
+        return _read_manifest(handle, path)["metadata"]
+
+
+def _format_number(value: float) -> str:
+    if math.isnan(value):
+        return ""
+    if value.is_integer() and abs(value) < 1e16:
+        return str(int(value))
+    return repr(value)
+
+
+def text_columns(archive: Archive) -> List[List[str]]:
+    """Every column as CSV text, in the original column order."""
+    columns = []
+    for name in archive.fieldnames:
+        kind = archive.kind(name)
+        if kind == "string":
+            columns.append(archive.strings(name))
+            continue
+        values = archive.column(name)
+        if np is not None:
+            values = values.tolist()
+        if kind == "int":
+            columns.append([str(value) for value in values])
+        else:
+            columns.append([_format_number(value) for value in values])
+    return columns
+
+
+def csv_to_archive(csv_path: Path, archive_path: Path, metadata: dict | None = None) -> int:
+    """Convert a CSV (plus its metadata object) into an archive; returns the rows."""
+    with csv_path.open("r", encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        fieldnames = next(reader, None)
+        if not fieldnames:
+            raise ValueError(f"{csv_path} is missing a header row")
+        rows = [row for row in reader if row]
+    for line, row in enumerate(rows, start=2):
+        if len(row) != len(fieldnames):
+            raise ValueError(
+                f"{csv_path} line {line} has {len(row)} fields, expected {len(fieldnames)}"
+            )
+    write_archive(archive_path, fieldnames, rows, metadata)
+    return len(rows)
+
+
+def archive_to_csv(archive_path: Path, csv_path: Path) -> tuple[int, dict]:
+    """Write an archive back as CSV; returns the rows and the metadata block."""
+    with Archive(archive_path) as archive:
+        fieldnames = archive.fieldnames
+        columns = text_columns(archive)
+        metadata = archive.metadata
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle, lineterminator="\n")
+        writer.writerow(fieldnames)
+        writer.writerows(zip(*columns))
+    return (len(columns[0]) if columns else 0), metadata
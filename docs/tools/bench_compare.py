@@ -0,0 +1,228 @@
+"""Regression statistics behind `plot-bench.py compare`.
+
+Samples are grouped by `(scenario, concurrency)`; each group maps a metric
+name (`throughput` or a `latency_*` key) to the values observed across runs.
+For every metric present on both sides the relative change of the mean is
+computed. When both sides hold repeated runs, a percentile bootstrap over the
+ratio of means attaches a confidence interval. A regression only counts when it
+is beyond the threshold with the required confidence: the whole interval must
+sit past the threshold. Single-run groups have no interval; a change past the
+threshold is reported as `inconclusive` unless `point_estimates` opts into
+judging them on the point estimate alone.
+
+Resampling is vectorised with NumPy when it is installed (one `(resamples, n)`
+index matrix per group) and falls back to a seeded pure-Python loop otherwise.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+GroupKey = Tuple[str, int]
+Samples = Dict[GroupKey, Dict[str, List[float]]]
+
+# Metrics where a larger value is an improvement; everything else is latency.
+HIGHER_IS_BETTER = frozenset({"throughput"})
+
+
+@dataclass
+class ComparisonRow:
+    scenario: str
+    concurrency: int
+    metric: str
+    baseline_mean: float
+    candidate_mean: float
+    delta_pct: float
+    ci_low_pct: float | None
+    ci_high_pct: float | None
+    baseline_runs: int
+    candidate_runs: int
+    status: str
+
+    def to_dict(self) -> dict:
+        # NaN is not valid JSON; report undefined deltas as null.
+        return {
+            key: None if isinstance(value, float) and math.isnan(value) else value
+            for key, value in asdict(self).items()
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "ComparisonRow":
+        values = dict(payload)
+        for key in ("baseline_mean", "candidate_mean", "delta_pct"):
+            if values.get(key) is None:
+                values[key] = math.nan
+        return cls(**values)
+
+
+def _mean(values: Sequence[float]) -> float:
+    return math.fsum(values) / len(values)
+
+
+def _bootstrap_means(values: Sequence[float], resamples: int, rng) -> Sequence[float]:
+    if np is not None:
+        data = np.asarray(values, dtype=np.float64)
+        picks = rng.integers(0, len(data), size=(resamples, len(data)))
+        return data[picks].mean(axis=1)
+    size = len(values)
+    return [
+        math.fsum(values[rng.randrange(size)] for _ in range(size)) / size
+        for _ in range(resamples)
+    ]
+
+
+def _quantile(values: Sequence[float], q: float) -> float:
+    if np is not None:
+        return float(np.quantile(values, q))
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def bootstrap_delta_ci(
+    baseline: Sequence[float],
+    candidate: Sequence[float],
+    *,
+    confidence: float,
+    resamples: int,
+    rng,
+) -> tuple[float, float]:
+    """Percentile bootstrap interval for the relative change of the mean (%)."""
+    base_means = _bootstrap_means(baseline, resamples, rng)
+    cand_means = _bootstrap_means(candidate, resamples, rng)
+    if np is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            deltas = (np.asarray(cand_means) / np.asarray(base_means) - 1.0) * 100.0
+        deltas = deltas[np.isfinite(deltas)]
+    else:
+        deltas = [(c / b - 1.0) * 100.0 for b, c in zip(base_means, cand_means) if b]
+    if not len(deltas):
+        return math.nan, math.nan
+    alpha = (1.0 - confidence) / 2.0
+    return _quantile(deltas, alpha), _quantile(deltas, 1.0 - alpha)
+
+
+def _classify(
+    metric: str,
+    delta: float,
+    low: float | None,
+    high: float | None,
+    threshold: float,
+    point_estimates: bool = False,
+) -> str:
+    # Express everything as "positive = worse" so one rule covers both directions.
+    sign = -1.0 if metric in HIGHER_IS_BETTER else 1.0
+    worse = delta * sign
+    if low is None or high is None or math.isnan(low):
+        if not point_estimates:
+            return "inconclusive" if abs(worse) > threshold else "ok"
+        if worse > threshold:
+            return "regression"
+        return "improved" if worse < -threshold else "ok"
+    worse_low, worse_high = sorted((low * sign, high * sign))
+    if worse_low > threshold:
+        return "regression"
+    if worse_high < -threshold:
+        return "improved"
+    if abs(worse) > threshold:
+        return "inconclusive"
+    return "ok"
+
+
+def compare_samples(
+    baseline: Samples,
+    candidate: Samples,
+    *,
+    threshold: float = 5.0,
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+    point_estimates: bool = False,
+) -> List[ComparisonRow]:
+    """Compare every metric of every group present on both sides.
+
+    Groups without an interval only count as regressions or improvements when
+    `point_estimates` is set; otherwise a change past the threshold is
+    `inconclusive`.
+    """
+    rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+    rows: List[ComparisonRow] = []
+    for key in sorted(set(baseline) & set(candidate)):
+        scenario, concurrency = key
+        base_metrics = baseline[key]
+        cand_metrics = candidate[key]
+        for metric in sorted(set(base_metrics) & set(cand_metrics)):
+            base_values = base_metrics[metric]
+            cand_values = cand_metrics[metric]
+            if not base_values or not cand_values:
+                continue
+            base_mean = _mean(base_values)
+            cand_mean = _mean(cand_values)
+            delta = (cand_mean / base_mean - 1.0) * 100.0 if base_mean else math.nan
+            low = high = None
+            if len(base_values) > 1 and len(cand_values) > 1 and resamples > 0:
+                low, high = bootstrap_delta_ci(
+                    base_values,
+                    cand_values,
+                    confidence=confidence,
+                    resamples=resamples,
+                    rng=rng,
+                )
+            rows.append(
+                ComparisonRow(
+                    scenario=scenario,
+                    concurrency=concurrency,
+                    metric=metric,
+                    baseline_mean=base_mean,
+                    candidate_mean=cand_mean,
+                    delta_pct=delta,
+                    ci_low_pct=low,
+                    ci_high_pct=high,
+                    baseline_runs=len(base_values),
+                    candidate_runs=len(cand_values),
+                    status=_classify(metric, delta, low, high, threshold, point_estimates),
+                )
+            )
+    return rows
+
+
+def render_markdown(
+    rows: Sequence[ComparisonRow],
+    *,
+    threshold: float,
+    confidence: float,
+    labels: Dict[str, str] | None = None,
+) -> str:
+    labels = labels or {}
+    lines = [
+        "## Regression check",
+        "",
+        f"Threshold ±{threshold:g}% at {confidence * 100:g}% confidence.",
+        "",
+        "| Scenario | Concurrency | Metric | Baseline | Candidate | Δ % | CI | Status |",
+        "| --- | ---: | --- | ---: | ---: | ---: | --- | --- |",
+    ]
+    for row in rows:
+        interval = (
+            f"{row.ci_low_pct:+.1f} … {row.ci_high_pct:+.1f}"
+            if row.ci_low_pct is not None and row.ci_high_pct is not None
+            else "n/a"
+        )
+        status = f"**{row.status}**" if row.status == "regression" else row.status
+        lines.append(
+            f"| {row.scenario} | {row.concurrency} | {labels.get(row.metric, row.metric)} "
+            f"| {row.baseline_mean:.2f} | {row.candidate_mean:.2f} | {row.delta_pct:+.1f} "
+            f"| {interval} | {status} |"
+        )
+    lines.append("")
+    return "\n".join(lines)
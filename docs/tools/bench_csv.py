@@ -0,0 +1,39 @@
+"""Harness CSV schema shared by the Python load drivers.
+
+`bin/bench/http --csv` writes these columns (documented in
+`docs/benchmarks/README.md`); drivers that produce their own rows append them
+in the same order so `plot-bench.py` reads every dataset the same way.
+"""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Dict
+
+# Column order of `bin/bench/http --csv`.
+HARNESS_FIELDS = (
+    "scenario",
+    "target",
+    "method",
+    "concurrency",
+    "duration_seconds",
+    "requests",
+    "requests_per_second",
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "error_count",
+    "error_rate",
+)
+
+
+def append_row(path: Path, row: Dict[str, object]) -> None:
+    """Append `row`, writing the header first when the file is new."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not path.exists()
+    with path.open("a", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        if new_file:
+            writer.writerow(HARNESS_FIELDS)
+        writer.writerow([row[name] for name in HARNESS_FIELDS])
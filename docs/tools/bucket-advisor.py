@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""Propose `histogram_buckets` for `etc/metrics.php` from observed latencies.
+
+Prometheus histograms only know how many observations fell below each bucket
+boundary; `histogram_quantile()` interpolates linearly inside the bucket that
+holds the requested rank. With the shipped defaults (50 ms and up) a service
+answering in 20-40 ms puts nearly every request in the first bucket and the
+server-side p50/p95/p99 are guesses. Every extra boundary also costs a row per
+label set in the `SwooleTableAdapter` value table, so the boundary count is a
+budget.
+
+The advisor builds the observed latency distribution from benchmark output:
+
+* `*.hist.jsonl` sidecars written by `bin/bench/http --histogram` (preferred,
+  full distribution), or
+* harness CSVs, whose p50/p95/p99 columns are joined into a piecewise-linear
+  distribution per row (a coarse approximation used when no sidecar exists).
+
+Candidate boundaries are "nice" two-significant-digit values around the
+observed quantiles. A dynamic programme picks the `--buckets` boundaries that
+minimise the summed relative error of the estimated p50/p95/p99 (with a small
+weight on a few neighbouring quantiles so spare boundaries still spread out).
+The error of the current configuration and of the proposal is printed together
+with the `--metric` entry, ready to paste into the `histogram_buckets` array of
+`etc/metrics.php`. Unless `--config` says otherwise, the current configuration
+and the default data directory are resolved against the repository root.
+
+Usage examples
+--------------
+>>> python docs/tools/bucket-advisor.py docs/benchmarks/data
+>>> python docs/tools/bucket-advisor.py data/run.hist.jsonl --buckets 10 --include 1.0 5.0
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import re
+import sys
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from latency_histogram import bucket_bounds, histogram_path, merge_files
+from prometheus_text import histogram_quantile
+
+ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_METRIC = "bamboo_http_request_duration_seconds"
+
+# Quantiles that only break ties between otherwise equal bucket layouts.
+SECONDARY_QUANTILES = (0.1, 0.25, 0.75, 0.9, 0.999)
+SECONDARY_WEIGHT = 0.01
+
+# Significant-digit mantissas used for candidate boundaries (1.0, 1.1, ... 9.9).
+_MANTISSAS = [value / 10 for value in range(10, 100)]
+
+_BUCKET_ENTRY = re.compile(r"'([^']+)'\s*=>\s*\[([^\]]*)\]")
+
+
+class Distribution:
+    """Mixture of piecewise-linear cumulative counts over latency in seconds."""
+
+    def __init__(self) -> None:
+        self.components: List[Tuple[List[float], List[float]]] = []
+        self.sources: List[str] = []
+
+    @property
+    def count(self) -> float:
+        return sum(cumulative[-1] for _, cumulative in self.components)
+
+    @property
+    def maximum(self) -> float:
+        return max(values[-1] for values, _ in self.components)
+
+    def add(self, values: List[float], cumulative: List[float], source: str) -> None:
+        if len(values) >= 2 and cumulative[-1] > 0:
+            self.components.append((values, cumulative))
+            self.sources.append(source)
+
+    def cdf(self, value: float) -> float:
+        """Number of observations at or below `value`."""
+        total = 0.0
+        for values, cumulative in self.components:
+            if value <= values[0]:
+                continue
+            if value >= values[-1]:
+                total += cumulative[-1]
+                continue
+            index = bisect_right(values, value)
+            low, high = values[index - 1], values[index]
+            share = (value - low) / (high - low) if high > low else 1.0
+            total += cumulative[index - 1] + (cumulative[index] - cumulative[index - 1]) * share
+        return total
+
+    def quantile(self, quantile: float) -> float:
+        rank = quantile * self.count
+        low, high = 0.0, self.maximum
+        for _ in range(64):
+            middle = (low + high) / 2
+            if self.cdf(middle) < rank:
+                low = middle
+            else:
+                high = middle
+        return high
+
+
+def _from_histograms(path: Path, distribution: Distribution) -> None:
+    for histogram in merge_files([path]).values():
+        values: List[float] = [0.0]
+        cumulative: List[float] = [0.0]
+        seen = 0
+        for index in sorted(histogram.counts):
+            lowest, highest = bucket_bounds(index, histogram.precision_bits)
+            if lowest / 1e6 > values[-1]:
+                values.append(lowest / 1e6)
+                cumulative.append(seen)
+            seen += histogram.counts[index]
+            values.append((highest + 1) / 1e6)
+            cumulative.append(seen)
+        distribution.add(values, cumulative, str(path))
+
+
+def _from_csv(path: Path, distribution: Distribution) -> None:
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            try:
+                p50, p95, p99 = (float(row[f"p{q}_ms"]) / 1000.0 for q in (50, 95, 99))
+                weight = float(row.get("requests") or 1.0)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 < p50 <= p95 <= p99:
+                continue
+            # Extrapolate the last percent with the p95 -> p99 slope.
+            tail = p99 + (p99 - p95) / 4.0 if p99 > p95 else p99 * 1.1
+            distribution.add(
+                [0.0, p50, p95, p99, tail],
+                [0.0, 0.5 * weight, 0.95 * weight, 0.99 * weight, weight],
+                f"{path} (percentile columns)",
+            )
+
+
+def load_distribution(paths: Sequence[Path]) -> Distribution:
+    """Read histogram sidecars where available and CSV percentiles otherwise."""
+    files: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.csv")))
+            files.extend(sorted(path.rglob("*.hist.jsonl")))
+        else:
+            files.append(path)
+    distribution = Distribution()
+    histograms = {path for path in files if path.name.endswith(".hist.jsonl")}
+    for path in files:
+        if path in histograms:
+            _from_histograms(path, distribution)
+        elif histogram_path(path) not in histograms:
+            _from_csv(path, distribution)
+    return distribution
+
+
+def load_configured_buckets(config: Path) -> Dict[str, List[float]]:
+    """Extract the `histogram_buckets` entries from `etc/metrics.php`."""
+    text = config.read_text(encoding="utf-8")
+    start = text.find("'histogram_buckets'")
+    if start < 0:
+        return {}
+    buckets: Dict[str, List[float]] = {}
+    for name, values in _BUCKET_ENTRY.findall(text, text.find("[", start) + 1):
+        buckets[name] = [float(value) for value in values.split(",") if value.strip()]
+    return buckets
+
+
+def estimate(distribution: Distribution, bounds: Sequence[float], quantile: float) -> float:
+    """What `histogram_quantile()` reports for `distribution` bucketed at `bounds`."""
+    buckets = [(bound, distribution.cdf(bound)) for bound in sorted(bounds)]
+    buckets.append((math.inf, distribution.count))
+    return histogram_quantile(quantile, buckets)
+
+
+def candidates(observed: Sequence[float], include: Sequence[float]) -> List[float]:
+    """Two-significant-digit boundaries spanning 1/4 to 4x of the observed quantiles."""
+    low, high = min(observed) / 4.0, max(observed) * 4.0
+    values = set(include)
+    for exponent in range(math.floor(math.log10(low)), math.ceil(math.log10(high)) + 1):
+        for mantissa in _MANTISSAS:
+            value = float(f"{mantissa * 10 ** exponent:.6g}")
+            if low <= value <= high:
+                values.add(value)
+    return sorted(values)
+
+
+def propose(
+    distribution: Distribution,
+    quantiles: Sequence[float],
+    budget: int,
+    include: Sequence[float] = (),
+) -> List[float]:
+    """Choose `budget` boundaries minimising the weighted relative quantile error.
+
+    The estimate for a quantile only depends on the two boundaries around it,
+    so the layout is solved exactly over the candidate grid: `best[k][j]` is
+    the lowest error of `k` boundaries ending at candidate `j`.
+    """
+    targets = [(q, 1.0) for q in quantiles]
+    targets += [(q, SECONDARY_WEIGHT) for q in SECONDARY_QUANTILES if q not in quantiles]
+    truths = [(distribution.quantile(q), q, weight) for q, weight in targets]
+    total = distribution.count
+    grid = candidates([truth for truth, _, _ in truths], include)
+    forced = sorted(set(include))
+    free = max(0, budget - len(forced))
+    if free == 0:
+        return forced[:budget] if budget else []
+    grid = [value for value in grid if value not in forced]
+    counts = [distribution.cdf(value) for value in grid]
+
+    def error(truth: float, guess: float) -> float:
+        return abs(guess - truth) / truth if truth else 0.0
+
+    def bracket_cost(lower: float, lower_count: float, upper: float, upper_count: float) -> float:
+        cost = 0.0
+        for truth, q, weight in truths:
+            if lower < truth <= upper:
+                share = upper_count - lower_count
+                rank = q * total - lower_count
+                guess = lower + (upper - lower) * (rank / share) if share > 0 else upper
+                cost += weight * error(truth, guess)
+        return cost
+
+    def tail_cost(upper: float) -> float:
+        return sum(weight * error(truth, upper) for truth, _, weight in truths if truth > upper)
+
+    size = len(grid)
+    layers = min(free, size)
+    best = [[math.inf] * size for _ in range(layers + 1)]
+    parent = [[-1] * size for _ in range(layers + 1)]
+    for j in range(size):
+        best[1][j] = bracket_cost(0.0, 0.0, grid[j], counts[j])
+    pair = [
+        [bracket_cost(grid[i], counts[i], grid[j], counts[j]) for j in range(size)]
+        for i in range(size)
+    ]
+    for k in range(2, layers + 1):
+        for j in range(k - 1, size):
+            for i in range(k - 2, j):
+                cost = best[k - 1][i] + pair[i][j]
+                if cost < best[k][j]:
+                    best[k][j] = cost
+                    parent[k][j] = i
+    end = min(range(size), key=lambda j: best[layers][j] + tail_cost(grid[j]))
+    chosen: List[float] = []
+    k = layers
+    while end >= 0 and k >= 1:
+        chosen.append(grid[end])
+        end = parent[k][end]
+        k -= 1
+    return sorted(set(chosen) | set(forced))
+
+
+def _format_bounds(bounds: Sequence[float]) -> str:
+    return "[" + ", ".join(f"{bound:g}" for bound in bounds) + "]"
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Propose histogram bucket boundaries from benchmark latency distributions.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        default=[ROOT / "docs" / "benchmarks" / "data"],
+        help="*.hist.jsonl files, harness CSVs or directories containing them.",
+    )
+    parser.add_argument("--buckets", type=int, default=7, help="Finite boundaries to propose.")
+    parser.add_argument(
+        "--quantiles",
+        nargs="+",
+        type=float,
+        default=[0.5, 0.95, 0.99],
+        help="Quantiles whose estimation error is minimised.",
+    )
+    parser.add_argument(
+        "--include",
+        nargs="+",
+        type=float,
+        default=[],
+        help="Boundaries (seconds) that must be kept, e.g. the request timeout.",
+    )
+    parser.add_argument("--metric", default=DEFAULT_METRIC, help="Metric the proposal is for.")
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=ROOT / "etc" / "metrics.php",
+        help="Current metrics config.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.buckets < 1:
+        print("[bucket-advisor] ERROR: --buckets must be at least 1", file=sys.stderr)
+        return 1
+    try:
+        distribution = load_distribution(args.paths)
+    except (OSError, ValueError) as exc:
+        print(f"[bucket-advisor] ERROR: {exc}", file=sys.stderr)
+        return 1
+    if not distribution.components:
+        print("[bucket-advisor] ERROR: no latency data found", file=sys.stderr)
+        return 1
+
+    configured: Dict[str, List[float]] = {}
+    if args.config.is_file():
+        configured = load_configured_buckets(args.config)
+    else:
+        print(
+            f"[bucket-advisor] WARNING: {args.config} not found; "
+            "there are no current buckets to compare with",
+            file=sys.stderr,
+        )
+    current = configured.get(args.metric) or configured.get("default") or []
+    proposed = propose(distribution, args.quantiles, args.buckets, args.include)
+
+    for source in sorted(set(distribution.sources)):
+        print(f"[bucket-advisor] read {source}")
+    print(f"[bucket-advisor] {distribution.count:.0f} observations")
+    print()
+    print(f"{'quantile':<10}{'observed':>12}{'current':>22}{'proposed':>22}")
+    for quantile in args.quantiles:
+        truth = distribution.quantile(quantile)
+        cells = [f"p{quantile * 100:g}".ljust(10), f"{truth * 1000:10.2f}ms"]
+        for bounds in (current, proposed):
+            if not bounds:
+                cells.append(f"{'n/a':>22}")
+                continue
+            guess = estimate(distribution, bounds, quantile)
+            drift = (guess - truth) / truth * 100 if truth else math.nan
+            cells.append(f"{guess * 1000:10.2f}ms ({drift:+6.1f}%)")
+        print("".join(cells))
+    print()
+    # Each label set stores one row per bucket, one for +Inf and one for the sum.
+    print(
+        f"Value-table rows per label set: current {len(current) + 2}, "
+        f"proposed {len(proposed) + 2}"
+    )
+    print()
+
+    print(f"Entry for the 'histogram_buckets' array of {args.config}:")
+    print(f"    '{args.metric}' => {_format_bounds(proposed)},")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
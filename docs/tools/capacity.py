@@ -0,0 +1,488 @@
+"""Capacity analysis of concurrency sweeps.
+
+A sweep measures throughput at increasing concurrency levels. Throughput first
+grows almost linearly, then flattens once a resource saturates, and may drop
+again under contention. The *knee* is the level where the curve bends: beyond
+it extra concurrency mostly buys latency. It is located with the Kneedle
+method: both axes are normalised to [0, 1] (concurrency on a log scale, since
+sweeps are geometric) and the knee is the level whose normalised throughput
+lies furthest above the diagonal, considering only levels up to the peak.
+
+The Universal Scalability Law models the whole curve instead:
+
+    X(N) = λN / (1 + σ(N - 1) + κN(N - 1))
+
+λ is the throughput of a single client, σ the contention coefficient
+(serialised work: locks, a shared queue) and κ the coherency coefficient
+(cross-talk that grows with every pair of clients). With κ > 0 throughput
+peaks at N* = sqrt((1 - σ) / κ) and falls afterwards; with κ = 0 it only
+approaches the ceiling λ/σ. By Little's law the mean response time of a
+closed-loop client at concurrency N is N / X(N). `fit_usl` fits the three
+coefficients by least squares and `usl_band` bootstraps a prediction band, so
+the peak can be read off a sweep that stopped short of it.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Sweeps with fewer distinct levels have no meaningful bend.
+MIN_KNEE_LEVELS = 3
+
+# Minimum normalised distance above the diagonal that counts as a bend.
+KNEE_MIN_DISTANCE = 0.05
+
+# Three coefficients need at least one more distinct level to be constrained.
+MIN_USL_LEVELS = 4
+
+# Levenberg-Marquardt iterations for a fit and for every bootstrap refit.
+USL_ITERATIONS = 200
+USL_REFIT_ITERATIONS = 30
+
+# Points a prediction band resamples; larger datasets are subsampled first.
+USL_BAND_POINTS = 2000
+
+
+def level_stats(
+    concurrency: Sequence[int], values: Sequence[float]
+) -> Tuple[List[int], List[int], List[float], List[float]]:
+    """Runs, mean and sum of squared deviations of `values` per level, sorted by level."""
+    if np is not None:
+        levels, inverse, counts = np.unique(
+            np.asarray(concurrency).astype(np.int64), return_inverse=True, return_counts=True
+        )
+        floats = np.asarray(values, dtype=np.float64)
+        means = np.bincount(inverse, weights=floats, minlength=len(levels)) / np.maximum(counts, 1)
+        deviations = np.bincount(
+            inverse, weights=(floats - means[inverse]) ** 2, minlength=len(levels)
+        )
+        return levels.tolist(), counts.tolist(), means.tolist(), deviations.tolist()
+    # Welford's update keeps the deviations accurate for large, similar values.
+    stats: Dict[int, List[float]] = {}
+    for level, value in zip(concurrency, values):
+        entry = stats.setdefault(int(level), [0, 0.0, 0.0])
+        entry[0] += 1
+        delta = float(value) - entry[1]
+        entry[1] += delta / entry[0]
+        entry[2] += delta * (float(value) - entry[1])
+    levels = sorted(stats)
+    return (
+        levels,
+        [stats[level][0] for level in levels],
+        [stats[level][1] for level in levels],
+        [stats[level][2] for level in levels],
+    )
+
+
+def level_means(
+    concurrency: Sequence[int], values: Sequence[float]
+) -> Tuple[List[int], List[float]]:
+    """Average `values` per concurrency level (repeated runs), sorted by level."""
+    levels, _, means, _ = level_stats(concurrency, values)
+    return levels, means
+
+
+def find_knee(levels: Sequence[int], throughput: Sequence[float]) -> int | None:
+    """Concurrency level at the saturation knee, or None when the curve has no bend."""
+    if len(levels) < MIN_KNEE_LEVELS:
+        return None
+    peak = max(range(len(throughput)), key=throughput.__getitem__)
+    if peak == 0:
+        # Throughput only falls: the first level is already past saturation.
+        return levels[0]
+    xs = [math.log2(max(level, 1)) for level in levels[: peak + 1]]
+    ys = list(throughput[: peak + 1])
+    x_span = xs[-1] - xs[0]
+    y_span = ys[-1] - ys[0]
+    if x_span <= 0 or y_span <= 0:
+        return None
+    distances = [(y - ys[0]) / y_span - (x - xs[0]) / x_span for x, y in zip(xs, ys)]
+    best = max(range(len(distances)), key=distances.__getitem__)
+    if distances[best] > KNEE_MIN_DISTANCE:
+        return levels[best]
+    # No bend before the peak: saturated at the peak if throughput drops after
+    # it, otherwise the sweep has not reached saturation yet.
+    return levels[peak] if peak < len(levels) - 1 else None
+
+
+@dataclass(frozen=True)
+class UslFit:
+    """Universal Scalability Law coefficients fitted to a sweep."""
+
+    throughput_per_client: float  # λ, requests/second at N = 1
+    contention: float  # σ
+    coherency: float  # κ
+    levels: int
+    r_squared: float
+
+    def throughput(self, concurrency: float) -> float:
+        n = float(concurrency)
+        return (
+            self.throughput_per_client
+            * n
+            / (1.0 + self.contention * (n - 1.0) + self.coherency * n * (n - 1.0))
+        )
+
+    def response_time_ms(self, concurrency: float) -> float:
+        """Mean response time at `concurrency` by Little's law (closed loop)."""
+        rate = self.throughput(concurrency)
+        return 1000.0 * concurrency / rate if rate > 0 else math.inf
+
+    @property
+    def peak_concurrency(self) -> float | None:
+        """Concurrency with the highest throughput; None when the curve never turns."""
+        if self.coherency <= 0:
+            return None
+        return math.sqrt(max(1.0 - self.contention, 0.0) / self.coherency)
+
+    @property
+    def peak_throughput(self) -> float | None:
+        """Throughput at `peak_concurrency`, or the λ/σ ceiling when κ is zero."""
+        peak = self.peak_concurrency
+        if peak is not None:
+            return self.throughput(max(peak, 1.0))
+        if self.contention > 0:
+            return self.throughput_per_client / self.contention
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "peak_concurrency": self.peak_concurrency,
+            "peak_throughput": self.peak_throughput,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "UslFit":
+        return cls(
+            throughput_per_client=float(payload["throughput_per_client"]),
+            contention=float(payload["contention"]),
+            coherency=float(payload["coherency"]),
+            levels=int(payload["levels"]),
+            r_squared=float(payload["r_squared"]),
+        )
+
+
+def _solve3(matrix: List[List[float]], vector: List[float]) -> List[float] | None:
+    """Gaussian elimination with partial pivoting for a 3x3 system."""
+    rows = [list(row) + [value] for row, value in zip(matrix, vector)]
+    for column in range(3):
+        pivot = max(range(column, 3), key=lambda index: abs(rows[index][column]))
+        if abs(rows[pivot][column]) < 1e-300:
+            return None
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        for index in range(column + 1, 3):
+            factor = rows[index][column] / rows[column][column]
+            for offset in range(column, 4):
+                rows[index][offset] -= factor * rows[column][offset]
+    solution = [0.0, 0.0, 0.0]
+    for index in (2, 1, 0):
+        tail = sum(rows[index][offset] * solution[offset] for offset in range(index + 1, 3))
+        solution[index] = (rows[index][3] - tail) / rows[index][index]
+    return solution
+
+
+def _clamp(params: Sequence[float]) -> List[float]:
+    lam, sigma, kappa = params
+    return [max(lam, 1e-12), min(max(sigma, 0.0), 1.0), max(kappa, 0.0)]
+
+
+def _sse(
+    params: Sequence[float], ns: Sequence[float], ys: Sequence[float], weights: Sequence[float]
+) -> float:
+    lam, sigma, kappa = params
+    return sum(
+        weight * (y - lam * n / (1.0 + sigma * (n - 1.0) + kappa * n * (n - 1.0))) ** 2
+        for n, y, weight in zip(ns, ys, weights)
+    )
+
+
+def _initial_guess(
+    ns: Sequence[float], ys: Sequence[float], weights: Sequence[float]
+) -> List[float]:
+    """Coefficients from the linearised form N/X = a + bN + cN^2."""
+    sums = [[0.0] * 3 for _ in range(3)]
+    rhs = [0.0] * 3
+    for n, y, weight in zip(ns, ys, weights):
+        if y <= 0:
+            continue
+        basis = (1.0, n, n * n)
+        for row in range(3):
+            rhs[row] += weight * basis[row] * n / y
+            for column in range(3):
+                sums[row][column] += weight * basis[row] * basis[column]
+    coefficients = _solve3(sums, rhs)
+    if coefficients is not None and sum(coefficients) > 0:
+        a, b, c = coefficients
+        lam = 1.0 / (a + b + c)
+        kappa = c * lam
+        return _clamp([lam, b * lam + kappa, kappa])
+    return _clamp([max(y / n for n, y in zip(ns, ys)), 0.0, 0.0])
+
+
+def _levenberg_marquardt(
+    params: List[float],
+    ns: Sequence[float],
+    ys: Sequence[float],
+    weights: Sequence[float],
+    iterations: int,
+) -> List[float]:
+    """Weighted least squares; `ys` are level means and `weights` their run counts."""
+    damping = 1e-3
+    error = _sse(params, ns, ys, weights)
+    for _ in range(iterations):
+        lam, sigma, kappa = params
+        jtj = [[0.0] * 3 for _ in range(3)]
+        jtr = [0.0] * 3
+        for n, y, weight in zip(ns, ys, weights):
+            denominator = 1.0 + sigma * (n - 1.0) + kappa * n * (n - 1.0)
+            predicted = lam * n / denominator
+            scale = -predicted / denominator
+            gradient = (n / denominator, scale * (n - 1.0), scale * n * (n - 1.0))
+            residual = y - predicted
+            for row in range(3):
+                jtr[row] += weight * gradient[row] * residual
+                for column in range(3):
+                    jtj[row][column] += weight * gradient[row] * gradient[column]
+        while damping < 1e12:
+            # Marquardt's diagonal scaling copes with λ and κ being orders of
+            # magnitude apart.
+            damped = [list(row) for row in jtj]
+            for index in range(3):
+                damped[index][index] *= 1.0 + damping
+            step = _solve3(damped, jtr)
+            if step is None:
+                return params
+            candidate = _clamp([value + delta for value, delta in zip(params, step)])
+            candidate_error = _sse(candidate, ns, ys, weights)
+            if candidate_error < error:
+                converged = error - candidate_error <= 1e-12 * max(error, 1e-300)
+                params, error, damping = candidate, candidate_error, max(damping / 10.0, 1e-12)
+                if converged:
+                    return params
+                break
+            damping *= 10.0
+        else:
+            return params
+    return params
+
+
+def _sse_batch(params, ns, ys, weights):
+    """`_sse` of every row of `params` (k, 3) against the same row of `ys` (k, levels)."""
+    lam, sigma, kappa = params[:, :1], params[:, 1:2], params[:, 2:]
+    predicted = lam * ns / (1.0 + sigma * (ns - 1.0) + kappa * ns * (ns - 1.0))
+    return ((ys - predicted) ** 2 * weights).sum(axis=1)
+
+
+def _levenberg_marquardt_batch(params, ns, ys, weights, iterations: int):
+    """`_levenberg_marquardt` of many series at once with NumPy.
+
+    Row r of `params` (k, 3) starts the fit of row r of `ys` (k, levels); every
+    row keeps its own damping and stops on its own, exactly like the scalar
+    version would.
+    """
+    params = np.array(params, dtype=np.float64)
+    damping = np.full(len(params), 1e-3)
+    error = _sse_batch(params, ns, ys, weights)
+    active = np.ones(len(params), dtype=bool)
+    diagonal = np.arange(3)
+    for _ in range(iterations):
+        rows = np.flatnonzero(active)
+        if not rows.size:
+            break
+        lam, sigma, kappa = (params[rows, column, None] for column in range(3))
+        denominator = 1.0 + sigma * (ns - 1.0) + kappa * ns * (ns - 1.0)
+        predicted = lam * ns / denominator
+        scale = -predicted / denominator
+        gradient = np.stack(
+            (ns / denominator, scale * (ns - 1.0), scale * ns * (ns - 1.0)), axis=2
+        )
+        weighted = gradient * weights[:, None]
+        jtj = np.einsum("kli,klj->kij", weighted, gradient)
+        jtr = np.einsum("kli,kl->ki", weighted, ys[rows] - predicted)
+        searching = np.ones(len(rows), dtype=bool)
+        while searching.any():
+            local = np.flatnonzero(searching)
+            index = rows[local]
+            damped = jtj[local].copy()
+            damped[:, diagonal, diagonal] *= 1.0 + damping[index, None]
+            # Out of damping, or a singular system: the scalar fit stops here too.
+            stuck = (damping[index] >= 1e12) | ~(np.abs(np.linalg.det(damped)) > 1e-300)
+            active[index[stuck]] = False
+            searching[local[stuck]] = False
+            local, index, damped = local[~stuck], index[~stuck], damped[~stuck]
+            if not local.size:
+                break
+            step = np.linalg.solve(damped, jtr[local, :, None])[:, :, 0]
+            candidate = params[index] + step
+            candidate[:, 0] = np.maximum(candidate[:, 0], 1e-12)
+            candidate[:, 1] = np.clip(candidate[:, 1], 0.0, 1.0)
+            candidate[:, 2] = np.maximum(candidate[:, 2], 0.0)
+            candidate_error = _sse_batch(candidate, ns, ys[index], weights)
+            better = candidate_error < error[index]
+            improved = index[better]
+            converged = error[improved] - candidate_error[better] <= 1e-12 * np.maximum(
+                error[improved], 1e-300
+            )
+            params[improved] = candidate[better]
+            error[improved] = candidate_error[better]
+            damping[improved] = np.maximum(damping[improved] / 10.0, 1e-12)
+            active[improved[converged]] = False
+            damping[index[~better]] *= 10.0
+            searching[local[better]] = False
+    return params
+
+
+def fit_usl(concurrency: Sequence[int], throughput: Sequence[float]) -> UslFit | None:
+    """Fit the Universal Scalability Law to every (concurrency, throughput) point.
+
+    The fit runs on the mean of each level, weighted by its run count. That is
+    the same least-squares problem as fitting every run: the squared error of
+    the points is the spread within each level plus the weighted error of the
+    means, and the model cannot change the spread. A level with more runs pulls
+    harder; a noisier level does not. The spread only enters R², and the cost
+    does not grow with the row count. Returns None with fewer than
+    `MIN_USL_LEVELS` distinct levels.
+    """
+    levels, counts, means, deviations = level_stats(concurrency, throughput)
+    if len(levels) < MIN_USL_LEVELS or levels[0] < 1:
+        return None
+    ns = [float(level) for level in levels]
+    weights = [float(count) for count in counts]
+    params = _levenberg_marquardt(
+        _initial_guess(ns, means, weights), ns, means, weights, USL_ITERATIONS
+    )
+    within = sum(deviations)
+    grand = sum(weight * mean for weight, mean in zip(weights, means)) / sum(weights)
+    total = within + sum(weight * (mean - grand) ** 2 for weight, mean in zip(weights, means))
+    error = _sse(params, ns, means, weights) + within
+    r_squared = 1.0 - error / total if total > 0 else 1.0
+    lam, sigma, kappa = params
+    return UslFit(lam, sigma, kappa, len(levels), r_squared)
+
+
+def usl_band(
+    fit: UslFit,
+    concurrency: Sequence[int],
+    throughput: Sequence[float],
+    grid: Sequence[float],
+    *,
+    confidence: float = 0.9,
+    resamples: int = 200,
+    seed: int = 0,
+) -> Tuple[List[float], List[float]]:
+    """Lower and upper prediction bounds of throughput at every `grid` point.
+
+    Relative residuals are resampled onto the fitted curve, the model is
+    refitted, and each refit's curve is scaled by another resampled residual,
+    so the band covers both the coefficient uncertainty and the run-to-run
+    noise of a single measurement. Datasets larger than `USL_BAND_POINTS` are
+    subsampled, which only widens the coefficient part of the band. With NumPy
+    every resample is drawn at once and the refits run side by side.
+    """
+    if np is not None:
+        return _usl_band_numpy(fit, concurrency, throughput, grid, confidence, resamples, seed)
+    rng = random.Random(seed)
+    picked: Sequence[int] = range(len(concurrency))
+    if len(concurrency) > USL_BAND_POINTS:
+        picked = sorted(rng.sample(picked, USL_BAND_POINTS))
+    ns = [float(concurrency[index]) for index in picked]
+    ys = [float(throughput[index]) for index in picked]
+    fitted = [fit.throughput(n) for n in ns]
+    residuals = [y / f - 1.0 for y, f in zip(ys, fitted) if f > 0]
+    if not residuals:
+        return [fit.throughput(n) for n in grid], [fit.throughput(n) for n in grid]
+    levels = sorted(set(ns))
+    position = {level: slot for slot, level in enumerate(levels)}
+    slots = [position[n] for n in ns]
+    weights = [float(slots.count(slot)) for slot in range(len(levels))]
+    start = [fit.throughput_per_client, fit.contention, fit.coherency]
+    predictions: List[List[float]] = [[] for _ in grid]
+    for _ in range(resamples):
+        sums = [0.0] * len(levels)
+        for slot, f in zip(slots, fitted):
+            sums[slot] += f * (1.0 + rng.choice(residuals))
+        means = [total / weight for total, weight in zip(sums, weights)]
+        lam, sigma, kappa = _levenberg_marquardt(
+            list(start), levels, means, weights, USL_REFIT_ITERATIONS
+        )
+        refit = UslFit(lam, sigma, kappa, fit.levels, fit.r_squared)
+        noise = 1.0 + rng.choice(residuals)
+        for slot, n in zip(predictions, grid):
+            slot.append(refit.throughput(n) * noise)
+    tail = (1.0 - confidence) / 2.0
+    lower, upper = [], []
+    for slot in predictions:
+        slot.sort()
+        lower.append(slot[min(len(slot) - 1, int(tail * len(slot)))])
+        upper.append(slot[min(len(slot) - 1, int((1.0 - tail) * len(slot)))])
+    return lower, upper
+
+
+def _usl_band_numpy(
+    fit: UslFit,
+    concurrency: Sequence[int],
+    throughput: Sequence[float],
+    grid: Sequence[float],
+    confidence: float,
+    resamples: int,
+    seed: int,
+) -> Tuple[List[float], List[float]]:
+    """`usl_band` with one `(resamples, points)` draw of residual indices."""
+    rng = np.random.default_rng(seed)
+    ns = np.asarray(concurrency, dtype=np.float64)
+    ys = np.asarray(throughput, dtype=np.float64)
+    if len(ns) > USL_BAND_POINTS:
+        picked = np.sort(rng.choice(len(ns), USL_BAND_POINTS, replace=False))
+        ns, ys = ns[picked], ys[picked]
+    lam, sigma, kappa = fit.throughput_per_client, fit.contention, fit.coherency
+    fitted = lam * ns / (1.0 + sigma * (ns - 1.0) + kappa * ns * (ns - 1.0))
+    positive = fitted > 0
+    residuals = ys[positive] / fitted[positive] - 1.0
+    points = np.asarray(grid, dtype=np.float64)
+    if not residuals.size:
+        curve = [fit.throughput(n) for n in grid]
+        return curve, list(curve)
+    levels, slots, counts = np.unique(ns, return_inverse=True, return_counts=True)
+    weights = counts.astype(np.float64)
+    # Per-level sums of every resample in one product with the level indicator.
+    indicator = np.zeros((len(ns), len(levels)))
+    indicator[np.arange(len(ns)), slots] = 1.0
+    draws = rng.integers(0, residuals.size, size=(resamples, len(ns)))
+    means = (fitted * (1.0 + residuals[draws])) @ indicator / weights
+    start = np.tile([lam, sigma, kappa], (resamples, 1))
+    refits = _levenberg_marquardt_batch(start, levels, means, weights, USL_REFIT_ITERATIONS)
+    noise = 1.0 + residuals[rng.integers(0, residuals.size, size=resamples)]
+    rl, rs, rk = refits[:, :1], refits[:, 1:2], refits[:, 2:]
+    predictions = rl * points / (1.0 + rs * (points - 1.0) + rk * points * (points - 1.0))
+    predictions = np.sort(predictions * noise[:, None], axis=0)
+    tail = (1.0 - confidence) / 2.0
+    count = len(predictions)
+    lower = predictions[min(count - 1, int(tail * count))]
+    upper = predictions[min(count - 1, int((1.0 - tail) * count))]
+    return lower.tolist(), upper.tolist()
+
+
+def compare_usl(baseline: UslFit, candidate: UslFit) -> Dict[str, Tuple[float | None, ...]]:
+    """Baseline value, candidate value and change in percent for each coefficient."""
+    rows: Dict[str, Tuple[float | None, ...]] = {}
+    before, after = baseline.to_dict(), candidate.to_dict()
+    for key in (
+        "throughput_per_client",
+        "contention",
+        "coherency",
+        "peak_concurrency",
+        "peak_throughput",
+    ):
+        old, new = before[key], after[key]
+        delta = (new - old) / old * 100.0 if old and new is not None else None
+        rows[key] = (old, new, delta)
+    return rows
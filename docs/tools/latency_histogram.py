@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Read and merge the latency histograms written by `bin/bench/http --histogram`.
+
+Each line of a `*.hist.jsonl` file describes one harness run::
+
+    {"version": 1, "scenario": "baseline-1.0", "concurrency": 64, "unit": "us",
+     "precision_bits": 7, "count": 157632, "min": 811, "max": 90211,
+     "sum": 2947718400, "buckets": [index, count, index, count, ...]}
+
+Latencies are integral microseconds mapped onto a log-linear layout: values
+below ``2**precision_bits`` have a bucket each, and every higher power of two is
+split into ``2**(precision_bits - 1)`` equal-width buckets. Histograms with the
+same precision merge by adding bucket counts, so any number of runs (or load
+generator hosts) can be combined in memory bounded by the bucket count rather
+than the number of requests.
+
+Usage examples
+--------------
+>>> # p50/p99/p99.9 over every run in a file
+>>> python docs/tools/latency_histogram.py docs/benchmarks/data/20240528-baseline.hist.jsonl
+
+>>> # Per-concurrency percentiles merged across several hosts
+>>> python docs/tools/latency_histogram.py host-a.hist.jsonl host-b.hist.jsonl \
+...     --by-concurrency --percentiles 50 99 99.9 99.99
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence
+
+DEFAULT_PRECISION_BITS = 7
+FORMAT_VERSION = 1
+
+
+def bucket_index(value: int, precision_bits: int = DEFAULT_PRECISION_BITS) -> int:
+    sub_buckets = 1 << precision_bits
+    if value < sub_buckets:
+        return max(0, value)
+    shift = value.bit_length() - precision_bits
+    half = sub_buckets >> 1
+    return sub_buckets + (shift - 1) * half + ((value >> shift) - half)
+
+
+def bucket_bounds(index: int, precision_bits: int = DEFAULT_PRECISION_BITS) -> tuple[int, int]:
+    """Return the inclusive `(lowest, highest)` microsecond values of a bucket."""
+    sub_buckets = 1 << precision_bits
+    if index < sub_buckets:
+        return index, index
+    half = sub_buckets >> 1
+    shift, offset = divmod(index - sub_buckets, half)
+    shift += 1
+    mantissa = offset + half
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+def percentile_key(percentile: float) -> str:
+    """Column name for a percentile, matching `LATENCY_LABELS` (99.9 -> latency_p999)."""
+    return "latency_p" + f"{percentile:g}".replace(".", "")
+
+
+class LatencyHistogram:
+    """Sparse log-linear histogram of latencies in microseconds."""
+
+    def __init__(self, precision_bits: int = DEFAULT_PRECISION_BITS) -> None:
+        self.precision_bits = precision_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.minimum: int | None = None
+        self.maximum: int | None = None
+        self.total = 0
+
+    def record(self, value: int, count: int = 1) -> None:
+        index = bucket_index(value, self.precision_bits)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        if other.precision_bits != self.precision_bits:
+            raise ValueError(
+                f"Cannot merge histograms with precision {other.precision_bits}"
+                f" into precision {self.precision_bits}"
+            )
+        counts = self.counts
+        for index, count in other.counts.items():
+            counts[index] = counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.minimum is not None and (self.minimum is None or other.minimum < self.minimum):
+            self.minimum = other.minimum
+        if other.maximum is not None and (self.maximum is None or other.maximum > self.maximum):
+            self.maximum = other.maximum
+        return self
+
+    def percentile(self, percentile: float) -> float:
+        """Return the given percentile in milliseconds (NaN when empty)."""
+        if not self.count:
+            return float("nan")
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                lowest, highest = bucket_bounds(index, self.precision_bits)
+                value = (lowest + highest) / 2
+                if self.minimum is not None:
+                    value = max(value, self.minimum)
+                if self.maximum is not None:
+                    value = min(value, self.maximum)
+                return value / 1000.0
+        return (self.maximum or 0) / 1000.0
+
+    def mean(self) -> float:
+        return self.total / self.count / 1000.0 if self.count else float("nan")
+
+    @classmethod
+    def from_record(cls, record: dict) -> "LatencyHistogram":
+        if record.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported histogram version {record.get('version')!r}")
+        if record.get("unit", "us") != "us":
+            raise ValueError(f"Unsupported histogram unit {record.get('unit')!r}")
+        histogram = cls(int(record.get("precision_bits", DEFAULT_PRECISION_BITS)))
+        buckets = record.get("buckets") or []
+        if len(buckets) % 2:
+            raise ValueError("Histogram buckets must be index/count pairs")
+        for index, count in zip(buckets[::2], buckets[1::2]):
+            histogram.counts[int(index)] = histogram.counts.get(int(index), 0) + int(count)
+        histogram.count = int(record.get("count", sum(histogram.counts.values())))
+        histogram.total = int(record.get("sum", 0))
+        if histogram.count:
+            histogram.minimum = int(record["min"]) if "min" in record else None
+            histogram.maximum = int(record["max"]) if "max" in record else None
+        return histogram
+
+    def to_record(self, **fields: object) -> dict:
+        buckets: List[int] = []
+        for index in sorted(self.counts):
+            buckets.extend((index, self.counts[index]))
+        return {
+            "version": FORMAT_VERSION,
+            **fields,
+            "unit": "us",
+            "precision_bits": self.precision_bits,
+            "count": self.count,
+            "min": self.minimum or 0,
+            "max": self.maximum or 0,
+            "sum": self.total,
+            "buckets": buckets,
+        }
+
+
+def histogram_path(csv_path: Path) -> Path:
+    """Sidecar written by `bin/bench/http --csv=... --histogram`."""
+    return csv_path.with_suffix(".hist.jsonl")
+
+
+def iter_records(path: Path) -> Iterator[dict]:
+    """Stream histogram records one line at a time."""
+    with path.open("r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(
+                    f"Invalid histogram JSON in {path} line {line_number}: {exc}"
+                ) from exc
+            if not isinstance(record, dict):
+                raise ValueError(f"Histogram line {line_number} in {path} is not an object")
+            yield record
+
+
+def merge_files(
+    paths: Iterable[Path],
+    *,
+    key: Callable[[dict], object] = lambda record: None,
+) -> Dict[object, LatencyHistogram]:
+    """Merge every record from `paths`, grouped by `key(record)`."""
+    merged: Dict[object, LatencyHistogram] = {}
+    for path in paths:
+        for record in iter_records(path):
+            histogram = LatencyHistogram.from_record(record)
+            group = key(record)
+            if group in merged:
+                merged[group].merge(histogram)
+            else:
+                merged[group] = histogram
+    return merged
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Merge bench harness latency histograms and print percentiles.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("paths", nargs="+", type=Path, help="*.hist.jsonl files to merge.")
+    parser.add_argument(
+        "--percentiles",
+        nargs="+",
+        type=float,
+        default=[50.0, 90.0, 95.0, 99.0, 99.9],
+        help="Percentiles to report.",
+    )
+    parser.add_argument(
+        "--by-concurrency",
+        action="store_true",
+        help="Report each concurrency level separately instead of one merged histogram.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    def by_concurrency(record: dict) -> object:
+        return int(record.get("concurrency", 0)) if args.by_concurrency else None
+
+    try:
+        merged = merge_files(args.paths, key=by_concurrency)
+    except (OSError, ValueError) as exc:
+        print(f"[latency-histogram] ERROR: {exc}", file=sys.stderr)
+        return 1
+    for group in sorted(merged, key=lambda item: (item is not None, item or 0)):
+        histogram = merged[group]
+        prefix = "all runs" if group is None else f"concurrency {group}"
+        bits = [f"p{q:g} {histogram.percentile(q):.3f} ms" for q in args.percentiles]
+        summary = f"{histogram.count} requests, mean {histogram.mean():.3f} ms"
+        print(f"{prefix}: {summary}, " + ", ".join(bits))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
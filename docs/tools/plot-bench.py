@@ -1,179 +1,4 @@
 #!/usr/bin/env python3
-"""Generate throughput and latency charts from Bamboo benchmark CSV files."""
-
-from __future__ import annotations
-
-import argparse
-import csv
-import sys
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Iterable, List
-
-
-@dataclass
-class DataPoint:
-    concurrency: int
-    requests_per_second: float
-    p50_ms: float
-    p95_ms: float
-    p99_ms: float
-
-
-@dataclass
-class Dataset:
-    label: str
-    source: Path
-    points: List[DataPoint]
-
-
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(
-        description="Plot throughput and latency trends for Bamboo benchmark runs",
-    )
-    parser.add_argument(
-        "data_dir",
-        type=Path,
-        nargs="?",
-        default=Path("docs/benchmarks/data"),
-        help="Directory containing CSV benchmark results.",
-    )
-    parser.add_argument(
-        "--output",
-        type=Path,
-        default=Path("docs/benchmarks"),
-        help="Directory where charts will be written.",
-    )
-    parser.add_argument(
-        "--formats",
-        default="png",
-        help="Comma separated list of output formats (png,pdf,svg).",
-    )
-    parser.add_argument(
-        "--datasets",
-        nargs="*",
-        help="Optional list of dataset basenames to include (matches CSV stem).",
-    )
-    parser.add_argument(
-        "--title-prefix",
-        default="Bamboo v1.0 benchmarks",
-        help="Prefix added to generated chart titles.",
-    )
-    return parser.parse_args()
-
-
-def main() -> int:
-    args = parse_args()
-    formats = [ext.strip() for ext in args.formats.split(",") if ext.strip()]
-    if not formats:
-        print("No output formats specified.", file=sys.stderr)
-        return 1
-
-    datasets = load_datasets(args.data_dir, args.datasets)
-    if not datasets:
-        print(f"No benchmark datasets found in {args.data_dir}.")
-        return 0
-
-    try:
-        import matplotlib.pyplot as plt
-    except ImportError:  # pragma: no cover - dependency check
-        print(
-            "matplotlib is required to render charts. Install it with 'pip install matplotlib'.",
-            file=sys.stderr,
-        )
-        return 1
-
-    args.output.mkdir(parents=True, exist_ok=True)
-
-    throughput_fig = plot_throughput(plt, datasets, args.title_prefix)
-    latency_fig = plot_latency(plt, datasets, args.title_prefix)
-
-    for fmt in formats:
-        ext = fmt.lower()
-        throughput_path = args.output / f"throughput.{ext}"
-        latency_path = args.output / f"latency.{ext}"
-        throughput_fig.savefig(throughput_path, dpi=180, bbox_inches="tight")
-        latency_fig.savefig(latency_path, dpi=180, bbox_inches="tight")
-        print(f"Wrote {throughput_path.relative_to(Path.cwd())}")
-        print(f"Wrote {latency_path.relative_to(Path.cwd())}")
-
-    plt.close(throughput_fig)
-    plt.close(latency_fig)
-    return 0
-
-
-def load_datasets(data_dir: Path, filter_names: Iterable[str] | None) -> List[Dataset]:
-    if not data_dir.exists():
-        return []
-
-    selected = {Path(name).stem for name in filter_names} if filter_names else None
-    datasets: List[Dataset] = []
-
-    for csv_path in sorted(data_dir.glob("*.csv")):
-        if selected is not None and csv_path.stem not in selected:
-            continue
-
-        with csv_path.open(newline="") as handle:
-            reader = csv.DictReader(handle)
-            points: List[DataPoint] = []
-            label: str | None = None
-            for row in reader:
-                try:
-                    label = row.get("scenario") or label or csv_path.stem
-                    concurrency = int(float(row["concurrency"]))
-                    rps = float(row["requests_per_second"])
-                    p50 = float(row.get("p50_ms", 0.0))
-                    p95 = float(row.get("p95_ms", 0.0))
-                    p99 = float(row.get("p99_ms", 0.0))
-                except (KeyError, TypeError, ValueError) as exc:
-                    print(f"Skipping row in {csv_path.name}: {exc}", file=sys.stderr)
-                    continue
-                points.append(DataPoint(concurrency, rps, p50, p95, p99))
-
-        if not points:
-            continue
-
-        points.sort(key=lambda p: p.concurrency)
-        datasets.append(Dataset(label or csv_path.stem, csv_path, points))
-
-    return datasets
-
-
-def plot_throughput(plt, datasets: List[Dataset], title_prefix: str):
-    fig, ax = plt.subplots(figsize=(7.5, 4.5))
-    for dataset in datasets:
-        x = [point.concurrency for point in dataset.points]
-        y = [point.requests_per_second for point in dataset.points]
-        ax.plot(x, y, marker="o", label=dataset.label)
-
-    ax.set_title(f"{title_prefix} – throughput")
-    ax.set_xlabel("Concurrent requests")
-    ax.set_ylabel("Requests / second")
-    ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.6)
-    ax.legend(loc="best")
-    return fig
-
-
-def plot_latency(plt, datasets: List[Dataset], title_prefix: str):
-    fig, ax = plt.subplots(figsize=(7.5, 4.5))
-    for dataset in datasets:
-        x = [point.concurrency for point in dataset.points]
-        p50 = [point.p50_ms for point in dataset.points]
-        p99 = [point.p99_ms for point in dataset.points]
-        ax.plot(x, p50, marker="o", label=f"{dataset.label} p50")
-        ax.plot(x, p99, marker="o", linestyle="--", label=f"{dataset.label} p99")
-
-    ax.set_title(f"{title_prefix} – latency")
-    ax.set_xlabel("Concurrent requests")
-    ax.set_ylabel("Latency (ms)")
-    ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.6)
-    ax.legend(loc="best")
-    return fig
-
-
-if __name__ == "__main__":
-    raise SystemExit(main())
-#!/usr/bin/env python3
 """Plot Bamboo benchmark results and emit MkDocs-friendly artefacts.
 
 The utility scans one or more directories for CSV files following the
@@ -181,10 +6,60 @@ The utility scans one or more directories for CSV files following the
 matplotlib. Metadata stored in `<dataset>.meta.json` is surfaced in chart captions
 and can optionally be exported to a Markdown include for the documentation site.
 
+Both CSV dialects produced by the tooling are understood: the harness schema
+(`requests_per_second`, `p50_ms`/`p95_ms`/`p99_ms`) and the legacy chart schema
+(`rps`, `latency_p50`/`latency_p99`/...). Percentile columns are normalised to the
+`latency_*` keys listed in `LATENCY_LABELS`.
+
+Datasets are loaded column-wise: rows are read in chunks of `CHUNK_ROWS`, only the
+columns that are charted are transposed, and every numeric column is converted in
+bulk into a typed array (NumPy when installed, `array('d')`/`array('q')`
+otherwise). Sorting by concurrency and missing-value masking operate on whole
+columns. The loader targets at least 250,000 rows/second with NumPy and
+150,000 rows/second with the `array` fallback on a single core (see
+`docs/benchmarks/README.md`).
+
 Dependencies
 ------------
 * Python 3.10+
-* matplotlib >= 3.7 (`python -m pip install matplotlib>=3.7`)
+* matplotlib >= 3.7 (`python -m pip install matplotlib>=3.7`), imported lazily and
+  pinned to the headless Agg backend; `--validate-only`/`--summary` never load it
+* numpy (optional, speeds up ingestion of large CSV files)
+
+Latency histograms written by `bin/bench/http --histogram` next to a CSV
+(`<dataset>.hist.jsonl`, read via `latency_histogram.py`) are merged per
+concurrency level to add the `HISTOGRAM_PERCENTILES` (p99.9) series. Pairs of
+`/metrics` scrapes recorded by `bin/bench/http --server-metrics`
+(`<dataset>.server.jsonl`) add the server-side quantiles of the same runs, and
+the difference per percentile and concurrency level is reported as the time
+spent outside the kernel (network, client, accept queue and worker queueing).
+
+Per-interval timelines (`bin/bench/http --timeline`, `<dataset>.timeline.jsonl`,
+read via `timeline.py`) are rendered as a separate `<dataset>.timeline.<format>`
+chart of throughput, latency quantiles and errors over time. Each series is
+reduced to `TIMELINE_POINTS` points with Largest-Triangle-Three-Buckets, so soak
+tests with millions of intervals render quickly and keep their spikes.
+
+Datasets may also be `.bba` archives (`bench_archive.py`): typed fixed-width
+columns that are memory-mapped instead of parsed. `archive export` converts
+CSVs (and their `.meta.json`) into archives and `archive import` converts them
+back to the CSV schema.
+
+The `query` subcommand keeps a SQLite index of every run (`run_index.py`),
+refreshed incrementally from the CSVs and their metadata sidecars, and selects
+runs by scenario, concurrency, commit, PHP version or any other metadata key
+without parsing the archive. `--chart` renders only the matching rows.
+
+Sweeps with at least four concurrency levels are fitted with the Universal
+Scalability Law (`capacity.fit_usl`): the throughput panel overlays the fitted
+curve and its prediction band, and the summary, index and `compare` report
+the contention/coherency coefficients and the predicted peak.
+
+`--profile REPORT.json` times every stage of the build (`profiling.py`):
+discovery, parsing, metadata, fitting, figure construction and each `savefig`,
+per dataset and in total, with CPU time, peak memory and row/figure counts.
+A one-line summary is printed and `--cprofile` dumps a `cProfile` run of the
+slowest dataset.
 
 Usage examples
 --------------
@@ -196,22 +71,94 @@ Usage examples
 ...     --output docs/benchmarks/charts \
 ...     --formats png svg \
 ...     --index benchmark-charts.md
+
+>>> # Render a large archive on every available core
+>>> python docs/tools/plot-bench.py docs/benchmarks/data --jobs 0
+
+>>> # Validate CSVs in CI without importing matplotlib
+>>> python docs/tools/plot-bench.py --validate-only
+
+>>> # Gate a candidate run against the previous release (exit 1 on regression)
+>>> python docs/tools/plot-bench.py compare --baseline data/v1.0 --candidate data/v1.1 \
+...     --threshold 5 --json compare.json --markdown compare.md
+
+>>> # Only parse rows appended since the previous run
+>>> python docs/tools/plot-bench.py --checkpoint-dir .cache/plot-bench
+
+>>> # Server-side rates and quantiles between two saved /metrics scrapes
+>>> python docs/tools/plot-bench.py metrics before.prom after.prom --elapsed 60 \
+...     --name 20240528-baseline --markdown server.md
+
+>>> # Baseline runs on PHP 8.4 since commit 1a2b3c at concurrency 64, charted
+>>> python docs/tools/plot-bench.py query --where scenario=baseline* \
+...     --where php_version=8.4* --where concurrency=64 --since-commit 1a2b3c \
+...     --chart baseline-php84 --backend svg
+
+>>> # Archive a CSV history, chart it from the archives, restore a CSV
+>>> python docs/tools/plot-bench.py archive export docs/benchmarks/data
+>>> python docs/tools/plot-bench.py archive import data/20240528-baseline.bba --output /tmp
+
+>>> # Find out where a slow docs build spends its time
+>>> python docs/tools/plot-bench.py --force --profile profile.json --cprofile slowest.prof
+
+>>> # Compare every dataset on shared throughput/latency charts
+>>> python docs/tools/plot-bench.py --overview --datasets 20240528-baseline
 """
 
 from __future__ import annotations
 
 import argparse
+import cProfile
 import csv
+import gc
+import hashlib
+import io
 import json
+import math
 import os
+import platform
+import re
+import sqlite3
 import sys
-from dataclasses import dataclass
-from datetime import datetime
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing, contextmanager, redirect_stderr, redirect_stdout
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import cached_property
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
 from textwrap import fill
-from typing import Dict, Iterable, List, Sequence
-
-import matplotlib.pyplot as plt
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+import svg_chart
+from bench_archive import ARCHIVE_SUFFIX, Archive, archive_to_csv, csv_to_archive
+from bench_archive import read_metadata as read_archive_metadata
+from bench_compare import ComparisonRow, Samples, compare_samples, render_markdown
+from capacity import UslFit, compare_usl, find_knee, fit_usl, level_means, usl_band
+from latency_histogram import histogram_path, merge_files, percentile_key
+from profiling import Profiler, summary_line
+from prometheus_text import merge_server_files, read_snapshot, server_metrics_path
+from prometheus_text import summarize_circuit_breakers, summarize_http
+from prometheus_text import render_markdown as render_metrics_markdown
+from run_index import PERCENTILES, metadata_for, open_index
+from run_index import query as query_runs
+from run_index import refresh as refresh_runs
+from timeline import TimelineRun, lttb, read_timeline, timeline_path
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Bump whenever chart output changes so cached renders are invalidated.
+TOOL_VERSION = "2.6.3"
+
+# Render cache manifest written inside --output.
+CACHE_FILENAME = ".plot-bench-cache.json"
 
 LATENCY_LABELS: Dict[str, str] = {
     "latency_p50": "p50",
@@ -221,23 +168,130 @@ LATENCY_LABELS: Dict[str, str] = {
     "latency_p999": "p99.9",
 }
 
+# Throughput column names in order of preference (harness schema first).
+THROUGHPUT_COLUMNS = ("requests_per_second", "rps")
+
+# Percentiles derived from a `<dataset>.hist.jsonl` sidecar when the CSV lacks them.
+HISTOGRAM_PERCENTILES = (99.9,)
+
+# Number of CSV rows converted per batch; bounds the memory held as strings.
+CHUNK_ROWS = 65536
+
+# On-disk layout version of --checkpoint-dir entries.
+CHECKPOINT_VERSION = 1
+
+# Bytes before the checkpointed offset that must be unchanged to trust it.
+CHECKPOINT_GUARD_BYTES = 4096
+
+_PERCENTILE_COLUMN = re.compile(r"^p(\d+)_ms$")
+
+# Points of the fitted USL curve drawn on the throughput panel.
+USL_GRID_POINTS = 120
+
+# How far past the highest measured level the USL curve may extrapolate.
+USL_EXTRAPOLATION = 4.0
+
+# Points kept per timeline series after LTTB downsampling (spread over the runs).
+TIMELINE_POINTS = 1000
+
+# Timelines longer than this are charted in minutes instead of seconds.
+TIMELINE_MINUTES_AFTER = 2 * 3600
+
+# Metadata keys shown in the chart caption, in order.
+CAPTION_KEYS = (
+    "commit",
+    "php_version",
+    "openswoole_version",
+    "wrk_version",
+    "os",
+    "hardware",
+    "notes",
+)
+
+# Rendering backends: matplotlib (any format) or the built-in SVG writer.
+BACKENDS = ("matplotlib", "svg")
+
+# Charts are only ever written to files, so matplotlib runs headless.
+MATPLOTLIB_BACKEND = "Agg"
+
+_pyplot_module = None
+
+# Stage timings for --profile; disabled (and free) otherwise.
+_profiler = Profiler()
+
+
+class UslCurve(NamedTuple):
+    """A USL fit drawn over a concurrency grid, with its prediction band."""
+
+    grid: List[float]
+    fitted: List[float]
+    lower: List[float]
+    upper: List[float]
+
+
+@dataclass
+class ChartPoints:
+    """(levels, means) pairs of a dataset: one point per concurrency level."""
+
+    rps: tuple[List[int], List[float]]
+    latencies: Dict[str, tuple[List[int], List[float]]]
+    server_latencies: Dict[str, tuple[List[int], List[float]]]
+
 
 @dataclass
 class BenchmarkDataset:
-    """In-memory representation of a benchmark CSV and its metadata."""
+    """In-memory representation of a benchmark CSV and its metadata.
+
+    `concurrency`, `rps` and every `latencies` entry are typed column arrays
+    (``numpy.ndarray`` or ``array.array``) sorted by concurrency, and so are the
+    `server_latencies` derived from `/metrics` scrapes. `reconciliation` holds
+    one client/server/overhead row per concurrency level and percentile.
+    `knee` is the saturation knee of the throughput curve (`capacity.find_knee`)
+    and `usl` the Universal Scalability Law fit of it (`capacity.fit_usl`).
+    `usl_curve` is the grid, fitted throughput and prediction band the charts
+    draw for that fit, computed once when the dataset is loaded.
+    """
 
     csv_path: Path
     scenario: str
     title: str
-    concurrency: List[int]
-    rps: List[float]
-    latencies: Dict[str, List[float]]
+    concurrency: Sequence[int]
+    rps: Sequence[float]
+    latencies: Dict[str, Sequence[float]]
     metadata: Dict[str, str]
+    server_latencies: Dict[str, Sequence[float]] = field(default_factory=dict)
+    reconciliation: List[dict] = field(default_factory=list)
+    knee: int | None = None
+    usl: UslFit | None = None
+    usl_curve: UslCurve | None = None
 
     @property
     def slug(self) -> str:
         return self.csv_path.stem
 
+    @cached_property
+    def points(self) -> ChartPoints:
+        """What both chart backends plot: the runs of each level averaged.
+
+        Repeated sweeps then draw one line instead of zig-zagging across each
+        other, and a chart grows with the number of levels, not of rows.
+        """
+        concurrency = self.concurrency
+        return ChartPoints(
+            rps=_level_means(concurrency, self.rps),
+            latencies={
+                key: _level_means(concurrency, values) for key, values in self.latencies.items()
+            },
+            server_latencies={
+                key: _level_means(concurrency, values)
+                for key, values in self.server_latencies.items()
+            },
+        )
+
+    @property
+    def rows(self) -> int:
+        return len(self.concurrency)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -261,7 +315,7 @@ def parse_args() -> argparse.Namespace:
         "--formats",
         nargs="+",
         default=["png"],
-        help="Image formats to render (passed to matplotlib).",
+        help="Image formats to render (passed to matplotlib, space or comma separated).",
     )
     parser.add_argument(
         "--dpi",
@@ -269,6 +323,17 @@ def parse_args() -> argparse.Namespace:
         default=144,
         help="Image resolution in dots per inch.",
     )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="matplotlib",
+        help="Chart renderer; 'svg' writes SVG itself without matplotlib (implies --formats svg).",
+    )
+    parser.add_argument(
+        "--datasets",
+        nargs="*",
+        help="Optional list of dataset basenames to include (matches CSV stem).",
+    )
     parser.add_argument(
         "--index",
         type=Path,
@@ -277,6 +342,71 @@ def parse_args() -> argparse.Namespace:
             "lists generated charts and metadata for MkDocs includes."
         ),
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Worker processes used to parse and render datasets (0 = one per CPU).",
+    )
+    parser.add_argument(
+        "--comparison",
+        type=Path,
+        help="JSON report from `plot-bench.py compare` appended to the --index output.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render every dataset even when the render cache is up to date.",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=Path,
+        help=(
+            "Enable incremental ingestion: parsed columns and byte offsets are kept "
+            "here so append-only CSVs only parse their new rows."
+        ),
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Parse every CSV and report problems without rendering (never imports matplotlib).",
+    )
+    mode.add_argument(
+        "--summary",
+        action="store_true",
+        help="Print a per-dataset summary (and --index) without rendering charts.",
+    )
+    parser.add_argument(
+        "--overview",
+        action="store_true",
+        help="Also write throughput/latency charts comparing every dataset.",
+    )
+    parser.add_argument(
+        "--title-prefix",
+        default="Bamboo v1.0 benchmarks",
+        help="Prefix added to the overview chart titles.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="REPORT",
+        help=(
+            "Record wall/CPU time, peak memory and row/figure counts per stage and "
+            "dataset, write them to this JSON file and print a one-line summary. "
+            "Cached datasets are not parsed; add --force to profile a full build."
+        ),
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        metavar="STATS",
+        help=(
+            "With --profile, re-run the slowest dataset under cProfile afterwards and "
+            "dump the statistics here (read them with `python -m pstats`)."
+        ),
+    )
     parser.add_argument(
         "--no-recursive",
         dest="recursive",
@@ -291,19 +421,53 @@ def _warn(message: str) -> None:
     print(f"[plot-bench] WARNING: {message}", file=sys.stderr)
 
 
+def _utc_timestamp() -> str:
+    """Current UTC time as an ISO 8601 string with a `Z` suffix."""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+def _pyplot():
+    """Import matplotlib on first use; parse-only paths never pay for it."""
+    global _pyplot_module
+    if _pyplot_module is None:
+        import matplotlib
+
+        matplotlib.use(MATPLOTLIB_BACKEND)
+        import matplotlib.pyplot
+
+        _pyplot_module = matplotlib.pyplot
+    return _pyplot_module
+
+
+def split_formats(values: Iterable[str]) -> List[str]:
+    formats: List[str] = []
+    for value in values:
+        for ext in value.split(","):
+            ext = ext.strip().lower().lstrip(".")
+            if ext and ext not in formats:
+                formats.append(ext)
+    return formats
+
+
 def discover_csv_files(paths: Sequence[Path], recursive: bool) -> List[Path]:
+    """CSV files and `.bba` archives under `paths`.
+
+    When a directory holds both `<dataset>.csv` and `<dataset>.bba`, the archive
+    is used unless the CSV was modified after it.
+    """
     csv_files: List[Path] = []
     for path in paths:
         if path.is_dir():
-            iterator: Iterable[Path]
-            iterator = path.rglob("*.csv") if recursive else path.glob("*.csv")
-            for csv_path in iterator:
-                if csv_path.is_file():
-                    csv_files.append(csv_path)
-        elif path.suffix.lower() == ".csv" and path.is_file():
+            for pattern in ("*.csv", f"*{ARCHIVE_SUFFIX}"):
+                iterator: Iterable[Path]
+                iterator = path.rglob(pattern) if recursive else path.glob(pattern)
+                for csv_path in iterator:
+                    if csv_path.is_file():
+                        csv_files.append(csv_path)
+        elif path.suffix.lower() in (".csv", ARCHIVE_SUFFIX) and path.is_file():
             csv_files.append(path)
         else:
-            _warn(f"Skipping {path} (not a CSV file or directory)")
+            _warn(f"Skipping {path} (not a CSV file, archive or directory)")
     # Deduplicate while preserving order.
     seen: set[Path] = set()
     unique_files: List[Path] = []
@@ -312,6 +476,16 @@ def discover_csv_files(paths: Sequence[Path], recursive: bool) -> List[Path]:
         if resolved not in seen:
             seen.add(resolved)
             unique_files.append(csv_path)
+    archived = {path.with_suffix("") for path in unique_files if path.suffix == ARCHIVE_SUFFIX}
+    for csv_path in [path for path in unique_files if path.suffix == ".csv"]:
+        if csv_path.with_suffix("") not in archived:
+            continue
+        archive_path = csv_path.with_suffix(ARCHIVE_SUFFIX)
+        if csv_path.stat().st_mtime_ns > archive_path.stat().st_mtime_ns:
+            _warn(f"{archive_path} is older than {csv_path}; reading the CSV")
+            unique_files.remove(archive_path)
+        else:
+            unique_files.remove(csv_path)
     return sorted(unique_files)
 
 
@@ -326,175 +500,1237 @@ def parse_float(value: str, *, allow_empty: bool = False) -> float | None:
     return float(text)
 
 
-def load_metadata(csv_path: Path) -> Dict[str, str]:
-    for candidate in (csv_path.with_suffix(".meta.json"), csv_path.with_suffix(".json")):
-        if candidate.exists() and candidate.is_file():
-            try:
-                with candidate.open("r", encoding="utf-8") as meta_file:
-                    payload = json.load(meta_file)
-            except json.JSONDecodeError as exc:  # pragma: no cover - defensive
-                raise ValueError(f"Invalid JSON in {candidate}: {exc}") from exc
-            if not isinstance(payload, dict):
-                raise ValueError(f"Metadata file {candidate} must contain a JSON object")
-            converted: Dict[str, str] = {}
-            for key, raw in payload.items():
-                if raw is None:
-                    continue
-                if isinstance(raw, (str, int, float, bool)):
-                    converted[key] = str(raw)
-                else:
-                    converted[key] = json.dumps(raw, sort_keys=True)
-            return converted
-    return {}
-
-
-def load_dataset(csv_path: Path) -> BenchmarkDataset:
-    with csv_path.open("r", encoding="utf-8", newline="") as handle:
-        reader = csv.DictReader(handle)
-        if reader.fieldnames is None:
-            raise ValueError("CSV file is missing a header row")
-        rows: List[dict] = []
-        latency_keys: set[str] = set()
-        for index, row in enumerate(reader, start=2):  # header is line 1
-            try:
-                concurrency = int(row["concurrency"].strip())
-            except (KeyError, AttributeError) as exc:
-                raise ValueError("Required column 'concurrency' missing from CSV") from exc
-            except ValueError as exc:
-                raise ValueError(
-                    f"Invalid concurrency value '{row.get('concurrency')}' at line {index}"
-                ) from exc
-            try:
-                rps = parse_float(row["rps"])
-            except KeyError as exc:
-                raise ValueError("Required column 'rps' missing from CSV") from exc
-            except ValueError as exc:
-                raise ValueError(f"Invalid rps value '{row.get('rps')}' at line {index}") from exc
-            data_row = {
-                "concurrency": concurrency,
-                "rps": rps,
-            }
-            scenario_value = row.get("scenario")
-            if scenario_value:
-                data_row["scenario"] = scenario_value.strip()
-            for key, value in row.items():
-                if key.startswith("latency_"):
-                    latency_keys.add(key)
-                    try:
-                        parsed = parse_float(value, allow_empty=True)
-                    except ValueError:
-                        _warn(
-                            f"Unable to parse {key!r}='{value}' in {csv_path} line {index}; field dropped"
-                        )
-                        parsed = None
-                    data_row[key] = parsed
-            rows.append(data_row)
-    if not rows:
-        raise ValueError("CSV contains no data rows")
-    rows.sort(key=lambda item: item["concurrency"])
-    concurrency = [row["concurrency"] for row in rows]
-    rps = [float(row["rps"]) for row in rows]
-    scenario_candidates = {row.get("scenario") for row in rows if row.get("scenario")}
-    scenario = scenario_candidates.pop() if len(scenario_candidates) == 1 else csv_path.stem
-    latencies: Dict[str, List[float]] = {}
-    for key in latency_keys:
-        values = [row.get(key) for row in rows]
-        if any(value is None for value in values):
-            _warn(
-                f"Column {key!r} in {csv_path} has missing values; omitting from chart"
-            )
-            continue
-        latencies[key] = [float(value) for value in values if value is not None]
-    metadata = load_metadata(csv_path)
-    title = metadata.get("title") or scenario.replace("-", " ").title()
-    return BenchmarkDataset(
-        csv_path=csv_path,
-        scenario=scenario,
-        title=title,
-        concurrency=concurrency,
-        rps=rps,
-        latencies=latencies,
-        metadata=metadata,
-    )
+def latency_key(column: str) -> str | None:
+    """Map a CSV column to its `LATENCY_LABELS` key (`p99_ms` -> `latency_p99`)."""
+    if column.startswith("latency_"):
+        return column
+    match = _PERCENTILE_COLUMN.match(column)
+    if match:
+        return f"latency_p{match.group(1)}"
+    return None
 
 
-def render_dataset(
-    dataset: BenchmarkDataset, output_dir: Path, formats: Sequence[str], dpi: int
-) -> Dict[str, Path]:
-    output_dir.mkdir(parents=True, exist_ok=True)
-    if not dataset.concurrency:
-        raise ValueError(f"Dataset {dataset.csv_path} has no concurrency values")
-    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+def _float_column(values: Sequence[str]):
+    """Convert CSV strings to a float array in one pass.
 
-    # Throughput plot
-    axes[0].plot(dataset.concurrency, dataset.rps, marker="o", color="#0B6EFD")
-    axes[0].set_title("Throughput")
-    axes[0].set_xlabel("Concurrent clients")
-    axes[0].set_ylabel("Requests / second")
-    axes[0].grid(True, linestyle="--", alpha=0.4)
+    Empty cells become NaN. Returns the array together with the offsets of
+    cells that were present but could not be parsed (also stored as NaN).
+    """
+    try:
+        if np is not None:
+            return np.array(values, dtype=np.float64), []
+        return array("d", map(float, values)), []
+    except ValueError:
+        pass
+    parsed: List[float] = []
+    invalid: List[int] = []
+    for offset, value in enumerate(values):
+        try:
+            number = parse_float(value, allow_empty=True)
+        except ValueError:
+            number = None
+            invalid.append(offset)
+        parsed.append(math.nan if number is None else number)
+    if np is not None:
+        return np.array(parsed, dtype=np.float64), invalid
+    return array("d", parsed), invalid
+
+
+def _int_column(values: Sequence[str]):
+    """Convert CSV strings to an int64 array; raises on the first bad cell."""
+    try:
+        if np is not None:
+            return np.array(values, dtype=np.int64), None
+        return array("q", map(int, values)), None
+    except ValueError:
+        pass
+    parsed: List[int] = []
+    for offset, value in enumerate(values):
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None, offset
+        if not number.is_integer():
+            return None, offset
+        parsed.append(int(number))
+    if np is not None:
+        return np.array(parsed, dtype=np.int64), None
+    return array("q", parsed), None
 
-    # Latency plot
-    if dataset.latencies:
-        for key, values in sorted(dataset.latencies.items()):
-            label = LATENCY_LABELS.get(key, key)
-            axes[1].plot(dataset.concurrency, values, marker="o", label=label)
-        axes[1].set_title("Latency")
-        axes[1].set_xlabel("Concurrent clients")
-        axes[1].set_ylabel("Milliseconds")
-        axes[1].grid(True, linestyle="--", alpha=0.4)
-        axes[1].legend()
-    else:
-        axes[1].set_visible(False)
-        fig.set_size_inches(6, 5)
 
-    fig.suptitle(dataset.title)
+def _float_array(values: Sequence[float]):
+    if np is not None:
+        return np.array(values, dtype=np.float64)
+    return array("d", values)
 
-    if dataset.metadata:
-        summary_keys = [
-            "commit",
-            "php_version",
-            "openswoole_version",
-            "wrk_version",
-            "os",
-            "hardware",
-            "notes",
-        ]
-        summary_bits = [
-            f"{key.replace('_', ' ').title()}: {dataset.metadata[key]}"
-            for key in summary_keys
-            if dataset.metadata.get(key)
-        ]
-        if summary_bits:
-            caption = fill(" • ".join(summary_bits), width=100)
-            fig.text(0.5, 0.02, caption, ha="center", va="bottom", fontsize=8)
-    fig.tight_layout(rect=(0, 0.05, 1, 0.95))
 
-    output_paths: Dict[str, Path] = {}
-    for image_format in formats:
-        suffix = image_format.lower().lstrip(".")
-        output_path = output_dir / f"{dataset.slug}.{suffix}"
-        fig.savefig(output_path, dpi=dpi, format=suffix)
-        output_paths[suffix] = output_path
-        print(f"[plot-bench] wrote {output_path}")
-    plt.close(fig)
-    return output_paths
+def _int_array(values: Sequence[int]):
+    if np is not None:
+        return np.array(values, dtype=np.int64)
+    return array("q", values)
 
 
-def write_markdown_index(
-    manifest: List[tuple[BenchmarkDataset, Dict[str, Path]]],
-    output_dir: Path,
-    index_path: Path,
-    preferred_format: str,
-) -> None:
-    if not manifest:
-        return
-    if not index_path.is_absolute():
-        index_path = output_dir / index_path
+def _concat(chunks: List, typecode: str):
+    if np is not None:
+        if not chunks:
+            return np.empty(0, dtype=np.int64 if typecode == "q" else np.float64)
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    merged = array(typecode)
+    for chunk in chunks:
+        merged.extend(chunk)
+    return merged
+
+
+def _has_nan(values) -> bool:
+    if np is not None:
+        return bool(np.isnan(values).any())
+    return any(value != value for value in values)
+
+
+def _is_sorted(values) -> bool:
+    if np is not None:
+        return bool((values[1:] >= values[:-1]).all())
+    return all(a <= b for a, b in zip(values, islice(values, 1, None)))
+
+
+def _sort_order(values):
+    if np is not None:
+        return np.argsort(values, kind="stable")
+    return sorted(range(len(values)), key=values.__getitem__)
+
+
+def _take(values, order):
+    if np is not None:
+        return values[order]
+    return array(values.typecode, map(values.__getitem__, order))
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Suspend the cyclic GC while parsing; row lists never form cycles."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _read_columns(reader, fieldnames: List[str], columns: Dict[str, int], *, first_line: int):
+    """Yield `(line, {name: [str, ...]})` batches containing only `columns`."""
+    width = len(fieldnames)
+    names = list(columns)
+    getter = itemgetter(*columns.values())
+    line = first_line
+    while True:
+        chunk = list(filter(None, islice(reader, CHUNK_ROWS)))
+        if not chunk:
+            return
+        if set(map(len, chunk)) != {width}:
+            # Mirror csv.DictReader: pad short rows, ignore trailing extras.
+            chunk = [row + [""] * (width - len(row)) if len(row) < width else row for row in chunk]
+        yield line, dict(zip(names, zip(*map(getter, chunk))))
+        line += len(chunk)
+
+
+@dataclass
+class _CsvSchema:
+    """Column layout resolved from a CSV header row."""
+
+    fieldnames: List[str]
+    throughput: str
+    columns: Dict[str, int]
+    latency: Dict[str, str]
+
+
+@dataclass
+class _RawColumns:
+    """Parsed columns in file order, before sorting and missing-value masking."""
+
+    concurrency: Sequence[int]
+    rps: Sequence[float]
+    latencies: Dict[str, Sequence[float]]
+    scenarios: set[str]
+
+    @property
+    def rows(self) -> int:
+        return len(self.concurrency)
+
+    def extend(self, other: "_RawColumns") -> "_RawColumns":
+        return _RawColumns(
+            concurrency=_concat([self.concurrency, other.concurrency], "q"),
+            rps=_concat([self.rps, other.rps], "d"),
+            latencies={
+                key: _concat([values, other.latencies[key]], "d")
+                for key, values in self.latencies.items()
+            },
+            scenarios=_merge_scenarios(self.scenarios, other.scenarios),
+        )
+
+
+def _merge_scenarios(*groups: Iterable[str]) -> set[str]:
+    # Only "exactly one distinct label" matters, so two candidates are enough.
+    merged: set[str] = set()
+    for group in groups:
+        for value in group:
+            value = value.strip() if value else ""
+            if value:
+                merged.add(value)
+                if len(merged) > 1:
+                    return merged
+    return merged
+
+
+def _parse_header(header: bytes) -> _CsvSchema:
+    fieldnames = next(csv.reader([header.decode("utf-8")]), None)
+    if not fieldnames:
+        raise ValueError("CSV file is missing a header row")
+    return _resolve_schema(fieldnames)
+
+
+def _resolve_schema(fieldnames: List[str]) -> _CsvSchema:
+    positions = {name.strip(): index for index, name in enumerate(fieldnames)}
+    if "concurrency" not in positions:
+        raise ValueError("Required column 'concurrency' missing from CSV")
+    throughput_column = next((name for name in THROUGHPUT_COLUMNS if name in positions), None)
+    if throughput_column is None:
+        raise ValueError("Required column 'requests_per_second' (or 'rps') missing from CSV")
+
+    columns: Dict[str, int] = {
+        "concurrency": positions["concurrency"],
+        throughput_column: positions[throughput_column],
+    }
+    latency_columns: Dict[str, str] = {}
+    # Explicit latency_* columns win over their p*_ms equivalents.
+    for name in sorted(positions, key=lambda item: not item.startswith("latency_")):
+        key = latency_key(name)
+        if key is not None and key not in latency_columns.values():
+            latency_columns[name] = key
+            columns[name] = positions[name]
+    if "scenario" in positions:
+        columns["scenario"] = positions["scenario"]
+    return _CsvSchema(fieldnames, throughput_column, columns, latency_columns)
+
+
+def _line_chunks(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Up to CHUNK_ROWS lines at a time, never splitting a quoted field."""
+    iterator = iter(lines)
+    while True:
+        chunk = list(islice(iterator, CHUNK_ROWS))
+        if not chunk:
+            return
+        # An odd number of quotes leaves a quoted field open on the next line.
+        quotes = "".join(chunk).count('"')
+        while quotes % 2:
+            extra = next(iterator, None)
+            if extra is None:
+                break
+            chunk.append(extra)
+            quotes += extra.count('"')
+        yield chunk
+
+
+def _numeric_batch(chunk: List[str], schema: _CsvSchema) -> Dict | None:
+    """The numeric columns of `chunk` parsed by NumPy's C reader.
+
+    Returns None whenever the chunk needs the csv path: an empty, malformed or
+    out-of-range cell, a fractional concurrency or a missing throughput. That
+    path then parses it again and reports the offending line.
+    """
+    names = [name for name in schema.columns if name != "scenario"]
+    try:
+        table = np.loadtxt(
+            chunk,
+            delimiter=",",
+            quotechar='"',
+            comments=None,
+            usecols=[schema.columns[name] for name in names],
+            dtype=np.float64,
+            ndmin=2,
+        )
+    except ValueError:
+        return None
+    if not len(table):
+        return None
+    columns = dict(zip(names, table.T))
+    concurrency = columns["concurrency"]
+    if not (np.abs(concurrency) < 2**53).all() or (concurrency != np.trunc(concurrency)).any():
+        return None
+    if np.isnan(columns[schema.throughput]).any():
+        return None
+    columns["concurrency"] = concurrency.astype(np.int64)
+    # Columns of the C-ordered table are strided views; copy them out compactly.
+    return {name: np.ascontiguousarray(values) for name, values in columns.items()}
+
+
+def _chunk_scenarios(chunk: List[str], schema: _CsvSchema) -> set[str]:
+    """Distinct scenario labels of `chunk`."""
+    index = schema.columns["scenario"]
+    if index == 0:
+        # The label is everything up to the first comma unless quoting gets involved.
+        labels: set[str] = set()
+        for label in {line.partition(",")[0] for line in chunk}:
+            if '"' in label:
+                if len(label) < 2 or label[0] != '"' or label[-1] != '"' or '"' in label[1:-1]:
+                    break
+                label = label[1:-1]
+            labels.add(label)
+        else:
+            return labels
+    return {row[index] for row in csv.reader(chunk) if len(row) > index}
+
+
+def _parse_rows(
+    lines: Iterable[str], schema: _CsvSchema, csv_path: Path, *, first_line: int
+) -> _RawColumns:
+    """Columns of the rows in `lines`.
+
+    With NumPy, numeric cells are parsed in C a chunk at a time; a chunk it
+    cannot take as is (empty cells, typos) goes through `csv.reader` instead.
+    """
+    concurrency_chunks: List = []
+    rps_chunks: List = []
+    latency_chunks: Dict[str, List] = {key: [] for key in schema.latency.values()}
+    scenario_values: set[str] = set()
+    throughput_column = schema.throughput
+    line = first_line
+    for chunk in _line_chunks(lines):
+        if "scenario" in schema.columns and len(scenario_values) < 2:
+            scenario_values = _merge_scenarios(scenario_values, _chunk_scenarios(chunk, schema))
+        numeric = _numeric_batch(chunk, schema) if np is not None else None
+        if numeric is not None:
+            concurrency_chunks.append(numeric["concurrency"])
+            rps_chunks.append(numeric[throughput_column])
+            for column, key in schema.latency.items():
+                latency_chunks[key].append(numeric[column])
+            line += len(numeric["concurrency"])
+            continue
+        batches = _read_columns(
+            csv.reader(chunk), schema.fieldnames, schema.columns, first_line=line
+        )
+        for line, batch in batches:
+            concurrency, rps, latencies = _convert_batch(batch, line, schema, csv_path)
+            concurrency_chunks.append(concurrency)
+            rps_chunks.append(rps)
+            for key, values in latencies.items():
+                latency_chunks[key].append(values)
+            line += len(concurrency)
+
+    return _RawColumns(
+        concurrency=_concat(concurrency_chunks, "q"),
+        rps=_concat(rps_chunks, "d"),
+        latencies={key: _concat(chunks, "d") for key, chunks in latency_chunks.items()},
+        scenarios=scenario_values,
+    )
+
+
+def _convert_batch(batch: Dict[str, Sequence[str]], line: int, schema: _CsvSchema, csv_path: Path):
+    """Typed concurrency, throughput and latency columns of a `_read_columns` batch."""
+    concurrency, bad = _int_column(batch["concurrency"])
+    if concurrency is None:
+        raise ValueError(
+            f"Invalid concurrency value '{batch['concurrency'][bad]}' at line {line + bad}"
+        )
+
+    throughput_column = schema.throughput
+    rps, invalid = _float_column(batch[throughput_column])
+    if invalid or _has_nan(rps):
+        offset = invalid[0] if invalid else next(
+            index for index, value in enumerate(rps) if value != value
+        )
+        raise ValueError(
+            f"Invalid {throughput_column} value '{batch[throughput_column][offset]}'"
+            f" at line {line + offset}"
+        )
+
+    latencies = {}
+    for column, key in schema.latency.items():
+        values, invalid = _float_column(batch[column])
+        for offset in invalid:
+            _warn(
+                f"Unable to parse {column!r}='{batch[column][offset]}' in {csv_path}"
+                f" line {line + offset}; field dropped"
+            )
+        latencies[key] = values
+    return concurrency, rps, latencies
+
+
+def _checkpoint_location(checkpoint_dir: Path, csv_path: Path) -> Path:
+    digest = hashlib.sha256(str(csv_path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return checkpoint_dir / f"{csv_path.stem}-{digest}"
+
+
+def _column_files(location: Path, keys: Iterable[str]) -> Dict[str, tuple[Path, str]]:
+    files = {"concurrency": (location / "concurrency.bin", "q"), "rps": (location / "rps.bin", "d")}
+    for key in keys:
+        files[key] = (location / f"{key}.bin", "d")
+    return files
+
+
+def _read_column_file(path: Path, typecode: str, rows: int):
+    with path.open("rb") as handle:
+        payload = handle.read(rows * 8)
+    if len(payload) != rows * 8:
+        raise ValueError(f"{path} is shorter than recorded")
+    if np is not None:
+        return np.frombuffer(payload, dtype=np.int64 if typecode == "q" else np.float64).copy()
+    values = array(typecode)
+    values.frombytes(payload)
+    return values
+
+
+def _load_checkpoint(
+    checkpoint_dir: Path, csv_path: Path, handle, header: bytes, size: int
+) -> tuple[int, int, _RawColumns] | None:
+    """Return `(offset, next_line, columns)` while the checkpoint is a prefix of the file."""
+    location = _checkpoint_location(checkpoint_dir, csv_path)
+    try:
+        state = json.loads((location / "state.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if (
+        state.get("version") != CHECKPOINT_VERSION
+        or state.get("byteorder") != sys.byteorder
+        or state.get("header_sha256") != hashlib.sha256(header).hexdigest()
+    ):
+        return None
+    offset = int(state.get("offset", 0))
+    if offset < len(header) or offset > size:
+        return None  # Truncated or rewritten.
+    guard_start = max(len(header), offset - CHECKPOINT_GUARD_BYTES)
+    handle.seek(guard_start)
+    guard = handle.read(offset - guard_start)
+    if hashlib.sha256(guard).hexdigest() != state.get("guard_sha256"):
+        return None
+    rows = int(state.get("rows", 0))
+    files = _column_files(location, state.get("latency_keys", []))
+    try:
+        columns = {
+            key: _read_column_file(path, typecode, rows) for key, (path, typecode) in files.items()
+        }
+    except (OSError, ValueError):
+        return None
+    raw = _RawColumns(
+        concurrency=columns.pop("concurrency"),
+        rps=columns.pop("rps"),
+        latencies=columns,
+        scenarios=set(state.get("scenarios", [])),
+    )
+    return offset, int(state.get("next_line", 2)), raw
+
+
+def _save_checkpoint(
+    checkpoint_dir: Path,
+    csv_path: Path,
+    handle,
+    header: bytes,
+    offset: int,
+    next_line: int,
+    total: _RawColumns,
+    appended: _RawColumns,
+) -> None:
+    """Append the newly parsed rows to the per-column files and advance the offset."""
+    location = _checkpoint_location(checkpoint_dir, csv_path)
+    location.mkdir(parents=True, exist_ok=True)
+    base_rows = total.rows - appended.rows
+    columns = {"concurrency": appended.concurrency, "rps": appended.rps, **appended.latencies}
+    for key, (path, _typecode) in _column_files(location, appended.latencies).items():
+        with path.open("ab" if base_rows else "wb") as column_file:
+            # Drop bytes left behind by an interrupted save before appending.
+            column_file.truncate(base_rows * 8)
+            column_file.seek(base_rows * 8)
+            column_file.write(columns[key].tobytes())
+    guard_start = max(len(header), offset - CHECKPOINT_GUARD_BYTES)
+    handle.seek(guard_start)
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "source": str(csv_path),
+        "byteorder": sys.byteorder,
+        "header_sha256": hashlib.sha256(header).hexdigest(),
+        "guard_sha256": hashlib.sha256(handle.read(offset - guard_start)).hexdigest(),
+        "offset": offset,
+        "next_line": next_line,
+        "rows": total.rows,
+        "latency_keys": sorted(total.latencies),
+        "scenarios": sorted(total.scenarios),
+    }
+    staging = location / "state.json.tmp"
+    staging.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(staging, location / "state.json")
+
+
+def _archive_columns(path: Path) -> _RawColumns:
+    """Columns of a `.bba` archive, decoded from the mapping without parsing text."""
+    archive = Archive(path)
+    schema = _resolve_schema(archive.fieldnames)
+
+    def numeric(name: str, typecode: str):
+        kind = archive.kind(name)
+        if kind == "string" or (typecode == "q" and kind != "int"):
+            expected = "integers" if typecode == "q" else "numbers"
+            raise ValueError(f"Column {name!r} does not hold {expected}")
+        values = archive.column(name)
+        # Narrow stored widths are widened to the loader's int64/float64 columns.
+        if np is not None:
+            return values.astype(np.int64 if typecode == "q" else np.float64, copy=False)
+        return values if values.typecode == typecode else array(typecode, values)
+
+    rps = numeric(schema.throughput, "d")
+    if _has_nan(rps):
+        raise ValueError(f"Column {schema.throughput!r} has missing values")
+    latencies = {}
+    for column, key in schema.latency.items():
+        if archive.kind(column) == "string":
+            _warn(f"Column {column!r} in {path} is not numeric; field dropped")
+            continue
+        latencies[key] = numeric(column, "d")
+    scenarios: set[str] = set()
+    if "scenario" in schema.columns and archive.kind("scenario") == "string":
+        scenarios = _merge_scenarios(archive.distinct("scenario"))
+    return _RawColumns(
+        concurrency=numeric("concurrency", "q"), rps=rps, latencies=latencies, scenarios=scenarios
+    )
+
+
+class _ByteRange(io.RawIOBase):
+    """The next `length` bytes of `handle`, as a stream that ends there."""
+
+    def __init__(self, handle, length: int) -> None:
+        self._handle = handle
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._handle.readinto(memoryview(buffer)[: min(len(buffer), self._remaining)])
+        self._remaining -= count
+        return count
+
+
+def _complete_rows_end(handle, start: int, size: int, block: int = 65536) -> int:
+    """Offset just past the last newline in `[start, size)`, or `start` if none."""
+    end = size
+    while end > start:
+        begin = max(start, end - block)
+        handle.seek(begin)
+        newline = handle.read(end - begin).rfind(b"\n")
+        if newline >= 0:
+            return begin + newline + 1
+        end = begin
+    return start
+
+
+def _csv_columns(csv_path: Path, checkpoint_dir: Path | None) -> _RawColumns:
+    with csv_path.open("rb") as handle, _gc_paused():
+        header = handle.readline()
+        schema = _parse_header(header)
+        size = os.fstat(handle.fileno()).st_size
+        start, next_line, raw = len(header), 2, None
+        if checkpoint_dir is not None:
+            restored = _load_checkpoint(checkpoint_dir, csv_path, handle, header, size)
+            if restored is not None:
+                start, next_line, raw = restored
+        # A trailing partial row (the harness is mid-write) is left for next time.
+        boundary = _complete_rows_end(handle, start, size)
+        handle.seek(start)
+        # Streamed in CHUNK_ROWS batches; the text is never held in memory whole.
+        lines = io.TextIOWrapper(
+            io.BufferedReader(_ByteRange(handle, boundary - start)), encoding="utf-8", newline=""
+        )
+        appended = _parse_rows(lines, schema, csv_path, first_line=next_line)
+        raw = appended if raw is None else raw.extend(appended)
+        next_line += appended.rows
+        if checkpoint_dir is not None and appended.rows:
+            _save_checkpoint(
+                checkpoint_dir, csv_path, handle, header, boundary, next_line, raw, appended
+            )
+    return raw
+
+
+def load_dataset(csv_path: Path, *, checkpoint_dir: Path | None = None) -> BenchmarkDataset:
+    """Parse a benchmark CSV (or map a `.bba` archive) into column arrays.
+
+    With `checkpoint_dir`, the columns parsed so far are persisted next to the
+    byte offset they cover, and later calls only parse rows appended since.
+    A truncated file, a changed header or rewritten bytes before the offset
+    trigger a full reparse. Archives need no parsing and are never checkpointed.
+    """
+    timer = _profiler.timer(csv_path.stem)
+    if csv_path.suffix == ARCHIVE_SUFFIX:
+        raw = _archive_columns(csv_path)
+    else:
+        raw = _csv_columns(csv_path, checkpoint_dir)
+    if not raw.rows:
+        raise ValueError("CSV contains no data rows")
+    concurrency = raw.concurrency
+    rps = raw.rps
+    latencies: Dict[str, Sequence[float]] = {}
+    for key, values in raw.latencies.items():
+        if _has_nan(values):
+            _warn(f"Column {key!r} in {csv_path} has missing values; omitting from chart")
+            continue
+        latencies[key] = values
+
+    if not _is_sorted(concurrency):
+        order = _sort_order(concurrency)
+        concurrency = _take(concurrency, order)
+        rps = _take(rps, order)
+        latencies = {key: _take(values, order) for key, values in latencies.items()}
+    timer.lap("parse", rows=raw.rows)
+
+    latencies.update(histogram_latencies(csv_path, concurrency, skip=latencies))
+    server = server_latencies(csv_path, concurrency, latencies)
+    reconciliation = reconcile_latencies(concurrency, latencies, server)
+    timer.lap("sidecars")
+
+    scenario = raw.scenarios.pop() if len(raw.scenarios) == 1 else csv_path.stem
+    metadata = load_metadata(csv_path)
+    title = metadata.get("title") or scenario.replace("-", " ").title()
+    timer.lap("metadata")
+
+    knee = find_knee(*level_means(concurrency, rps))
+    usl = fit_usl(concurrency, rps)
+    curve = usl_curve(concurrency, rps, usl) if usl is not None else None
+    timer.lap("fit")
+    return BenchmarkDataset(
+        csv_path=csv_path,
+        scenario=scenario,
+        title=title,
+        concurrency=concurrency,
+        rps=rps,
+        latencies=latencies,
+        metadata=metadata,
+        server_latencies=server,
+        reconciliation=reconciliation,
+        knee=knee,
+        usl=usl,
+        usl_curve=curve,
+    )
+
+
+def _spread(concurrency: Sequence[int], levels: List[int], per_level: List[float]):
+    """Broadcast one value per concurrency level onto the (sorted) rows."""
+    if np is not None:
+        positions = np.searchsorted(np.asarray(levels), concurrency)
+        return np.asarray(per_level, dtype=np.float64)[positions]
+    lookup = dict(zip(levels, per_level))
+    return _float_array([lookup[level] for level in concurrency])
+
+
+def histogram_latencies(
+    csv_path: Path, concurrency: Sequence[int], *, skip: Iterable[str] = ()
+) -> Dict[str, Sequence[float]]:
+    """Derive `HISTOGRAM_PERCENTILES` columns from the dataset's histogram sidecar.
+
+    Histograms are merged per concurrency level, so repeated runs (or several
+    load generator hosts) at the same level contribute to one distribution.
+    """
+    sidecar = histogram_path(csv_path)
+    wanted = {percentile_key(q): q for q in HISTOGRAM_PERCENTILES}
+    for key in skip:
+        wanted.pop(key, None)
+    if not wanted or not sidecar.is_file():
+        return {}
+    try:
+        merged = merge_files([sidecar], key=lambda record: int(record.get("concurrency", 0)))
+    except ValueError as exc:
+        _warn(f"Ignoring latency histograms in {sidecar}: {exc}")
+        return {}
+    levels = sorted({int(level) for level in concurrency})
+    missing = [level for level in levels if level not in merged]
+    if missing:
+        _warn(f"{sidecar} has no histogram for concurrency {missing}; skipping derived percentiles")
+        return {}
+    derived: Dict[str, Sequence[float]] = {}
+    for key, percentile in wanted.items():
+        per_level = [merged[level].percentile(percentile) for level in levels]
+        derived[key] = _spread(concurrency, levels, per_level)
+    return derived
+
+
+def _key_percentile(key: str) -> float:
+    """Inverse of `percentile_key` (`latency_p999` -> 99.9)."""
+    digits = key.rsplit("_p", 1)[-1]
+    return float(digits if len(digits) <= 2 else f"{digits[:2]}.{digits[2:]}")
+
+
+def server_latencies(
+    csv_path: Path, concurrency: Sequence[int], keys: Iterable[str]
+) -> Dict[str, Sequence[float]]:
+    """Server-side quantiles (ms) for `keys` from the `/metrics` scrape sidecar.
+
+    Each run contributes the bucket deltas of `*_http_request_duration_seconds`
+    between the scrapes taken around its measured window; runs at the same
+    concurrency level are merged before `histogram_quantile` is applied, so the
+    values are only as precise as the configured buckets.
+    """
+    sidecar = server_metrics_path(csv_path)
+    if not sidecar.is_file():
+        return {}
+    try:
+        merged = merge_server_files([sidecar], key=lambda record: int(record.get("concurrency", 0)))
+    except ValueError as exc:
+        _warn(f"Ignoring server metrics in {sidecar}: {exc}")
+        return {}
+    levels = sorted({int(level) for level in concurrency})
+    missing = [level for level in levels if level not in merged or not merged[level].count]
+    if missing:
+        _warn(f"{sidecar} has no server samples for concurrency {missing}; skipping reconciliation")
+        return {}
+    derived: Dict[str, Sequence[float]] = {}
+    for key in keys:
+        quantile = _key_percentile(key) / 100.0
+        per_level = [merged[level].quantile(quantile) * 1000.0 for level in levels]
+        derived[key] = _spread(concurrency, levels, per_level)
+    return derived
+
+
+def reconcile_latencies(
+    concurrency: Sequence[int],
+    client: Dict[str, Sequence[float]],
+    server: Dict[str, Sequence[float]],
+) -> List[dict]:
+    """Client vs server latency per concurrency level and percentile.
+
+    Repeated client runs at one level are averaged; the overhead is the part of
+    the end-to-end latency spent outside the middleware pipeline.
+    """
+    rows: List[dict] = []
+    for key in sorted(server, key=_key_percentile):
+        client_values = _to_list(client[key])
+        server_values = _to_list(server[key])
+        for level, start, stop in _concurrency_runs(concurrency):
+            client_ms = math.fsum(client_values[start:stop]) / (stop - start)
+            server_ms = server_values[start]
+            rows.append(
+                {
+                    "concurrency": level,
+                    "latency": key,
+                    "client_ms": client_ms,
+                    "server_ms": server_ms,
+                    "overhead_ms": client_ms - server_ms,
+                }
+            )
+    rows.sort(key=lambda row: (row["concurrency"], _key_percentile(row["latency"])))
+    return rows
+
+
+def load_datasets(
+    paths: Sequence[Path],
+    filter_names: Iterable[str] | None = None,
+    *,
+    recursive: bool = True,
+    checkpoint_dir: Path | None = None,
+) -> List[BenchmarkDataset]:
+    """Discover and load every dataset, skipping files that fail to parse."""
+    selected = {Path(name).stem for name in filter_names} if filter_names else None
+    datasets: List[BenchmarkDataset] = []
+    for csv_path in discover_csv_files(paths, recursive=recursive):
+        if selected is not None and csv_path.stem not in selected:
+            continue
+        try:
+            datasets.append(load_dataset(csv_path, checkpoint_dir=checkpoint_dir))
+        except ValueError as exc:
+            _warn(f"Skipping {csv_path}: {exc}")
+    return datasets
+
+
+def find_metadata_file(csv_path: Path) -> Path | None:
+    for candidate in (csv_path.with_suffix(".meta.json"), csv_path.with_suffix(".json")):
+        if candidate.exists() and candidate.is_file():
+            return candidate
+    return None
+
+
+def read_metadata_file(candidate: Path) -> dict:
+    try:
+        with candidate.open("r", encoding="utf-8") as meta_file:
+            payload = json.load(meta_file)
+    except json.JSONDecodeError as exc:  # pragma: no cover - defensive
+        raise ValueError(f"Invalid JSON in {candidate}: {exc}") from exc
+    if not isinstance(payload, dict):
+        raise ValueError(f"Metadata file {candidate} must contain a JSON object")
+    return payload
+
+
+def load_metadata(csv_path: Path) -> Dict[str, str]:
+    """Sidecar metadata as strings; a sidecar overrides an archive's own block."""
+    payload = read_archive_metadata(csv_path) if csv_path.suffix == ARCHIVE_SUFFIX else {}
+    candidate = find_metadata_file(csv_path)
+    if candidate is not None:
+        payload = {**payload, **read_metadata_file(candidate)}
+    converted: Dict[str, str] = {}
+    for key, raw in payload.items():
+        if raw is None:
+            continue
+        if isinstance(raw, (str, int, float, bool)):
+            converted[key] = str(raw)
+        else:
+            converted[key] = json.dumps(raw, sort_keys=True)
+    return converted
+
+
+def caption_text(metadata: Dict[str, str]) -> str | None:
+    """Chart caption built from the `CAPTION_KEYS` present in the metadata."""
+    bits = [
+        f"{key.replace('_', ' ').title()}: {metadata[key]}"
+        for key in CAPTION_KEYS
+        if metadata.get(key)
+    ]
+    return " • ".join(bits) if bits else None
+
+
+def render_dataset(
+    dataset: BenchmarkDataset, output_dir: Path, formats: Sequence[str], dpi: int
+) -> Dict[str, Path]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if not dataset.rows:
+        raise ValueError(f"Dataset {dataset.csv_path} has no concurrency values")
+    timer = _profiler.timer(dataset.slug)
+    plt = _pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+
+    # Throughput plot
+    points = dataset.points
+    axes[0].plot(*points.rps, marker="o", color="#0B6EFD")
+    axes[0].set_title("Throughput")
+    axes[0].set_xlabel("Concurrent clients")
+    axes[0].set_ylabel("Requests / second")
+    axes[0].grid(True, linestyle="--", alpha=0.4)
+    if dataset.usl is not None:
+        plot_usl(axes[0], dataset)
+    if dataset.knee is not None:
+        for axis in axes:
+            axis.axvline(dataset.knee, color="#DC3545", linestyle=":", linewidth=1.2)
+        axes[0].annotate(
+            f"knee @ {dataset.knee}",
+            xy=(dataset.knee, 0.05),
+            xycoords=("data", "axes fraction"),
+            xytext=(4, 0),
+            textcoords="offset points",
+            color="#DC3545",
+            fontsize=8,
+        )
+
+    # Latency plot
+    if dataset.latencies:
+        for key, values in sorted(points.latencies.items()):
+            label = LATENCY_LABELS.get(key, key)
+            line = axes[1].plot(*values, marker="o", label=label)[0]
+            server = points.server_latencies.get(key)
+            if server is not None:
+                axes[1].plot(
+                    *server,
+                    marker="x",
+                    linestyle="--",
+                    color=line.get_color(),
+                    label=f"server {label}",
+                )
+        axes[1].set_title("Latency")
+        axes[1].set_xlabel("Concurrent clients")
+        axes[1].set_ylabel("Milliseconds")
+        axes[1].grid(True, linestyle="--", alpha=0.4)
+        axes[1].legend()
+    else:
+        axes[1].set_visible(False)
+        fig.set_size_inches(6, 5)
+
+    fig.suptitle(dataset.title)
+
+    caption = caption_text(dataset.metadata)
+    if caption:
+        fig.text(0.5, 0.02, fill(caption, width=100), ha="center", va="bottom", fontsize=8)
+    fig.tight_layout(rect=(0, 0.05, 1, 0.95))
+    timer.lap("figure", figures=1)
+
+    output_paths: Dict[str, Path] = {}
+    for image_format in formats:
+        suffix = image_format.lower().lstrip(".")
+        output_path = output_dir / f"{dataset.slug}.{suffix}"
+        fig.savefig(output_path, dpi=dpi, format=suffix)
+        output_paths[suffix] = output_path
+        print(f"[plot-bench] wrote {output_path}")
+        timer.lap(f"savefig.{suffix}", files=1, bytes=output_path.stat().st_size)
+    plt.close(fig)
+    return output_paths
+
+
+def _level_means(concurrency: Sequence[int], values: Sequence[float]):
+    """`capacity.level_means` of the rows whose value is not missing (NaN)."""
+    if np is not None:
+        floats = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(floats)
+        return level_means(np.asarray(concurrency)[present], floats[present])
+    pairs = [(level, value) for level, value in zip(concurrency, values) if value == value]
+    return level_means([pair[0] for pair in pairs], [pair[1] for pair in pairs])
+
+
+def render_dataset_svg(dataset: BenchmarkDataset, output_dir: Path) -> Dict[str, Path]:
+    """`render_dataset` for the SVG backend: same panels and points, no matplotlib."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if not dataset.rows:
+        raise ValueError(f"Dataset {dataset.csv_path} has no concurrency values")
+    timer = _profiler.timer(dataset.slug)
+    points = dataset.points
+    throughput = svg_chart.Panel(
+        title="Throughput", xlabel="Concurrent clients", ylabel="Requests / second"
+    )
+    throughput.series.append(
+        svg_chart.Series(None, *points.rps, color="#0B6EFD")
+    )
+    fit = dataset.usl
+    if fit is not None:
+        grid, fitted, lower, upper = dataset.usl_curve
+        throughput.bands.append(svg_chart.Band(grid, lower, upper, "#0B6EFD", opacity=0.12))
+        throughput.series.append(
+            svg_chart.Series(
+                _usl_label(fit), grid, fitted, color="#0B6EFD", dash="6 3", marker=None, width=1
+            )
+        )
+        peak = fit.peak_concurrency
+        if peak is not None and peak <= grid[-1]:
+            throughput.points.append(
+                svg_chart.Point(
+                    peak,
+                    fit.peak_throughput,
+                    "#0B6EFD",
+                    f"peak {fit.peak_throughput:.0f} req/s @ {peak:.0f}",
+                )
+            )
+    panels = [throughput]
+    if dataset.latencies:
+        latency = svg_chart.Panel(
+            title="Latency", xlabel="Concurrent clients", ylabel="Milliseconds"
+        )
+        for index, (key, values) in enumerate(sorted(points.latencies.items())):
+            label = LATENCY_LABELS.get(key, key)
+            color = svg_chart.PALETTE[index % len(svg_chart.PALETTE)]
+            latency.series.append(svg_chart.Series(label, *values, color))
+            server = points.server_latencies.get(key)
+            if server is not None:
+                latency.series.append(
+                    svg_chart.Series(
+                        f"server {label}",
+                        *server,
+                        color,
+                        dash="6 3",
+                        marker="cross",
+                    )
+                )
+        panels.append(latency)
+    if dataset.knee is not None:
+        throughput.vlines.append(svg_chart.VLine(dataset.knee, "#DC3545", f"knee @ {dataset.knee}"))
+        for panel in panels[1:]:
+            panel.vlines.append(svg_chart.VLine(dataset.knee, "#DC3545"))
+
+    document = svg_chart.render_figure(
+        panels, title=dataset.title, caption=caption_text(dataset.metadata)
+    )
+    timer.lap("figure", figures=1)
+    output_path = output_dir / f"{dataset.slug}.svg"
+    output_path.write_text(document, encoding="utf-8")
+    print(f"[plot-bench] wrote {output_path}")
+    timer.lap("savefig.svg", files=1, bytes=output_path.stat().st_size)
+    return {"svg": output_path}
+
+
+def usl_grid(
+    concurrency: Sequence[int], fit: UslFit, points: int = USL_GRID_POINTS
+) -> List[float]:
+    """Concurrency values the fitted curve is drawn at: the sweep, up to past the peak."""
+    low, high = float(concurrency[0]), float(concurrency[-1])
+    peak = fit.peak_concurrency
+    if peak is not None and peak > high:
+        high = min(peak * 1.25, high * USL_EXTRAPOLATION)
+    step = (high - low) / (points - 1)
+    return [low + step * index for index in range(points)]
+
+
+def usl_curve(concurrency: Sequence[int], rps: Sequence[float], fit: UslFit) -> UslCurve:
+    """Grid, fitted throughput and prediction band of a USL fit of sorted rows."""
+    grid = usl_grid(concurrency, fit)
+    lower, upper = usl_band(fit, concurrency, rps, grid)
+    return UslCurve(grid, [fit.throughput(n) for n in grid], lower, upper)
+
+
+def _usl_label(fit: UslFit) -> str:
+    return f"USL σ={fit.contention:.3g} κ={fit.coherency:.3g}"
+
+
+def plot_usl(axis, dataset: BenchmarkDataset) -> None:
+    fit = dataset.usl
+    grid, fitted, lower, upper = dataset.usl_curve
+    axis.fill_between(grid, lower, upper, color="#0B6EFD", alpha=0.12, linewidth=0)
+    axis.plot(grid, fitted, color="#0B6EFD", linestyle="--", linewidth=1, label=_usl_label(fit))
+    peak = fit.peak_concurrency
+    if peak is not None and peak <= grid[-1]:
+        axis.plot([peak], [fit.peak_throughput], marker="*", color="#0B6EFD", markersize=10)
+        axis.annotate(
+            f"peak {fit.peak_throughput:.0f} req/s @ {peak:.0f}",
+            xy=(peak, fit.peak_throughput),
+            xytext=(0, 8),
+            textcoords="offset points",
+            ha="center",
+            color="#0B6EFD",
+            fontsize=8,
+        )
+    axis.legend(loc="center right", fontsize=8)
+
+
+def describe_usl(fit: UslFit) -> str:
+    """One-line summary of a fit for the console and the chart index."""
+    text = (
+        f"USL fit over {fit.levels} levels (R² {fit.r_squared:.3f}): "
+        f"λ {fit.throughput_per_client:.1f} req/s per client, "
+        f"contention σ {fit.contention:.4g}, coherency κ {fit.coherency:.4g}"
+    )
+    peak = fit.peak_concurrency
+    if peak is not None:
+        return (
+            f"{text}; predicted peak {fit.peak_throughput:.1f} req/s at concurrency {peak:.0f} "
+            f"({fit.response_time_ms(peak):.2f} ms mean latency by Little's law)"
+        )
+    if fit.peak_throughput is not None:
+        return f"{text}; throughput approaches {fit.peak_throughput:.1f} req/s without a peak"
+    return f"{text}; no saturation predicted"
+
+
+# (y-axis label, series) per timeline panel; series are (column, label, colour).
+TIMELINE_PANELS = (
+    ("Requests / second", (("rps", "req/s", "#0B6EFD"),)),
+    (
+        "Milliseconds",
+        (
+            ("p50_ms", "p50", "#198754"),
+            ("p95_ms", "p95", "#FD7E14"),
+            ("p99_ms", "p99", "#DC3545"),
+            ("max_ms", "max", "#6C757D"),
+        ),
+    ),
+    ("Errors / interval", (("errors", "errors", "#DC3545"),)),
+)
+
+
+def timeline_series(
+    runs: Sequence[TimelineRun],
+) -> tuple[str, List[tuple[tuple[float, float] | None, Dict[str, tuple[list, list]]]]]:
+    """Downsampled series per run on a shared time axis, with the warm-up span.
+
+    Returns the time unit and, per run, the warm-up span and every column as
+    `(times, values)` reduced by LTTB; `TIMELINE_POINTS` is shared across runs
+    in proportion to their length.
+    """
+    origin = min(run.started_at for run in runs)
+    span = max(run.at[-1] for run in runs) - origin
+    unit, scale = ("minutes", 60.0) if span > TIMELINE_MINUTES_AFTER else ("seconds", 1.0)
+    total = sum(len(run) for run in runs)
+    result = []
+    for run in runs:
+        times = [(at - origin) / scale for at in run.at]
+        points = max(3, TIMELINE_POINTS * len(run) // max(total, 1))
+        warmup = run.warmup_span()
+        if warmup is not None:
+            warmup = ((warmup[0] - origin) / scale, (warmup[1] - origin) / scale)
+        columns = {
+            name: lttb(times, run.series[name], points)
+            for _, series in TIMELINE_PANELS
+            for name, _, _ in series
+        }
+        result.append((warmup, columns))
+    return unit, result
+
+
+def render_timeline(
+    dataset: BenchmarkDataset,
+    runs: Sequence[TimelineRun],
+    output_dir: Path,
+    formats: Sequence[str],
+    dpi: int,
+) -> Dict[str, Path]:
+    """Chart throughput, latency quantiles and errors per interval over time."""
+    timer = _profiler.timer(dataset.slug)
+    plt = _pyplot()
+    unit, series_by_run = timeline_series(runs)
+    fig, axes = plt.subplots(3, 1, figsize=(12, 8), sharex=True)
+    for position, (warmup, columns) in enumerate(series_by_run):
+        for axis, (_, series) in zip(axes, TIMELINE_PANELS):
+            if warmup is not None:
+                axis.axvspan(
+                    *warmup,
+                    color="#ADB5BD",
+                    alpha=0.25,
+                    linewidth=0,
+                    label="warm-up" if position == 0 and axis is axes[0] else None,
+                )
+            for name, label, color in series:
+                xs, ys = columns[name]
+                axis.plot(
+                    xs,
+                    ys,
+                    color=color,
+                    linewidth=0.8,
+                    linestyle=":" if name == "max_ms" else "-",
+                    label=label if position == 0 else None,
+                )
+    for axis, (ylabel, _) in zip(axes, TIMELINE_PANELS):
+        axis.set_ylabel(ylabel)
+        axis.grid(True, linestyle="--", alpha=0.4)
+        axis.legend(loc="upper right", fontsize=8)
+    axes[2].set_xlabel(f"{unit.capitalize()} since the first run started")
+    fig.suptitle(f"{dataset.title} – timeline ({len(runs)} run(s))")
+    fig.tight_layout(rect=(0, 0, 1, 0.96))
+    timer.lap("timeline.figure", figures=1)
+
+    output_paths: Dict[str, Path] = {}
+    for image_format in formats:
+        suffix = image_format.lower().lstrip(".")
+        output_path = output_dir / f"{dataset.slug}.timeline.{suffix}"
+        fig.savefig(output_path, dpi=dpi, format=suffix)
+        output_paths[f"timeline.{suffix}"] = output_path
+        print(f"[plot-bench] wrote {output_path}")
+        timer.lap(f"timeline.savefig.{suffix}", files=1, bytes=output_path.stat().st_size)
+    plt.close(fig)
+    return output_paths
+
+
+def render_timeline_svg(
+    dataset: BenchmarkDataset, runs: Sequence[TimelineRun], output_dir: Path
+) -> Dict[str, Path]:
+    """`render_timeline` for the SVG backend."""
+    timer = _profiler.timer(dataset.slug)
+    unit, series_by_run = timeline_series(runs)
+    panels = [svg_chart.Panel(ylabel=ylabel) for ylabel, _ in TIMELINE_PANELS]
+    panels[-1].xlabel = f"{unit.capitalize()} since the first run started"
+    for position, (warmup, columns) in enumerate(series_by_run):
+        for panel, (_, series) in zip(panels, TIMELINE_PANELS):
+            if warmup is not None:
+                panel.spans.append(svg_chart.Span(*warmup))
+            for name, label, color in series:
+                xs, ys = columns[name]
+                panel.series.append(
+                    svg_chart.Series(
+                        label if position == 0 else None,
+                        xs,
+                        ys,
+                        color=color,
+                        dash="2 2" if name == "max_ms" else None,
+                        marker=None,
+                        width=0.9,
+                    )
+                )
+    document = svg_chart.render_figure(
+        panels,
+        columns=1,
+        panel_width=1200,
+        panel_height=250,
+        title=f"{dataset.title} – timeline ({len(runs)} run(s))",
+    )
+    timer.lap("timeline.figure", figures=1)
+    output_path = output_dir / f"{dataset.slug}.timeline.svg"
+    output_path.write_text(document, encoding="utf-8")
+    print(f"[plot-bench] wrote {output_path}")
+    timer.lap("timeline.savefig.svg", files=1, bytes=output_path.stat().st_size)
+    return {"timeline.svg": output_path}
+
+
+def plot_throughput(plt, datasets: List[BenchmarkDataset], title_prefix: str):
+    fig, ax = plt.subplots(figsize=(7.5, 4.5))
+    for dataset in datasets:
+        ax.plot(*dataset.points.rps, marker="o", label=dataset.title)
+
+    ax.set_title(f"{title_prefix} – throughput")
+    ax.set_xlabel("Concurrent requests")
+    ax.set_ylabel("Requests / second")
+    ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.6)
+    ax.legend(loc="best")
+    return fig
+
+
+def plot_latency(plt, datasets: List[BenchmarkDataset], title_prefix: str):
+    fig, ax = plt.subplots(figsize=(7.5, 4.5))
+    for dataset in datasets:
+        p50 = dataset.points.latencies.get("latency_p50")
+        p99 = dataset.points.latencies.get("latency_p99")
+        if p50 is not None:
+            ax.plot(*p50, marker="o", label=f"{dataset.title} p50")
+        if p99 is not None:
+            ax.plot(*p99, marker="o", linestyle="--", label=f"{dataset.title} p99")
+
+    ax.set_title(f"{title_prefix} – latency")
+    ax.set_xlabel("Concurrent requests")
+    ax.set_ylabel("Latency (ms)")
+    ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.6)
+    ax.legend(loc="best")
+    return fig
+
+
+def write_overview_svg(
+    datasets: List[BenchmarkDataset], output_dir: Path, title_prefix: str
+) -> None:
+    """`write_overview` for the SVG backend."""
+    throughput = svg_chart.Panel(xlabel="Concurrent requests", ylabel="Requests / second")
+    latency = svg_chart.Panel(xlabel="Concurrent requests", ylabel="Latency (ms)")
+    for index, dataset in enumerate(datasets):
+        color = svg_chart.PALETTE[index % len(svg_chart.PALETTE)]
+        throughput.series.append(svg_chart.Series(dataset.title, *dataset.points.rps, color))
+        for key, dash in (("latency_p50", None), ("latency_p99", "6 3")):
+            values = dataset.points.latencies.get(key)
+            if values is not None:
+                label = f"{dataset.title} {LATENCY_LABELS[key]}"
+                latency.series.append(svg_chart.Series(label, *values, color, dash=dash))
+    for name, panel in (("throughput", throughput), ("latency", latency)):
+        document = svg_chart.render_figure(
+            [panel], panel_width=750, panel_height=450, title=f"{title_prefix} – {name}"
+        )
+        path = output_dir / f"{name}.svg"
+        path.write_text(document, encoding="utf-8")
+        print(f"[plot-bench] wrote {path}")
+
+
+def write_overview(
+    datasets: List[BenchmarkDataset],
+    output_dir: Path,
+    formats: Sequence[str],
+    dpi: int,
+    title_prefix: str,
+    backend: str = "matplotlib",
+) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if backend == "svg":
+        write_overview_svg(datasets, output_dir, title_prefix)
+        return
+    plt = _pyplot()
+    throughput_fig = plot_throughput(plt, datasets, title_prefix)
+    latency_fig = plot_latency(plt, datasets, title_prefix)
+    for suffix in formats:
+        throughput_path = output_dir / f"throughput.{suffix}"
+        latency_path = output_dir / f"latency.{suffix}"
+        throughput_fig.savefig(throughput_path, dpi=dpi, bbox_inches="tight")
+        latency_fig.savefig(latency_path, dpi=dpi, bbox_inches="tight")
+        print(f"[plot-bench] wrote {throughput_path}")
+        print(f"[plot-bench] wrote {latency_path}")
+    plt.close(throughput_fig)
+    plt.close(latency_fig)
+
+
+def write_markdown_index(
+    manifest: List[tuple[BenchmarkDataset, Dict[str, Path]]],
+    output_dir: Path,
+    index_path: Path,
+    preferred_format: str,
+    comparison: str | None = None,
+) -> None:
+    if not manifest:
+        return
+    if not index_path.is_absolute():
+        index_path = output_dir / index_path
     index_path.parent.mkdir(parents=True, exist_ok=True)
     lines: List[str] = []
     lines.append("# Benchmark charts")
     lines.append("")
-    lines.append(f"Generated on {datetime.utcnow().isoformat()}Z.")
+    lines.append(f"Generated on {_utc_timestamp()}.")
     lines.append("")
     for dataset, outputs in manifest:
         lines.append(f"## {dataset.title}")
@@ -508,42 +1744,1275 @@ def write_markdown_index(
             rel_path = rel_path.replace(os.sep, "/")
             lines.append(f"![{dataset.title}]({rel_path})")
             lines.append("")
+        timeline_chart = outputs.get(f"timeline.{preferred_format}")
+        if timeline_chart:
+            rel_path = os.path.relpath(timeline_chart, index_path.parent).replace(os.sep, "/")
+            lines.append(f"![{dataset.title} timeline]({rel_path})")
+            lines.append("")
+        if dataset.knee is not None:
+            lines.append(f"Saturation knee at concurrency {dataset.knee}.")
+            lines.append("")
+        if dataset.usl is not None:
+            lines.append(f"{describe_usl(dataset.usl)}.")
+            lines.append("")
+        if dataset.reconciliation:
+            lines.append("| Concurrency | Percentile | Client ms | Server ms | Outside kernel ms |")
+            lines.append("| ---: | --- | ---: | ---: | ---: |")
+            for row in dataset.reconciliation:
+                label = LATENCY_LABELS.get(row["latency"], row["latency"])
+                lines.append(
+                    f"| {row['concurrency']} | {label} | {row['client_ms']:.2f} "
+                    f"| {row['server_ms']:.2f} | {row['overhead_ms']:.2f} |"
+                )
+            lines.append("")
         if dataset.metadata:
             lines.append("| Key | Value |")
             lines.append("| --- | ----- |")
             for key, value in sorted(dataset.metadata.items()):
                 lines.append(f"| {key} | {value} |")
             lines.append("")
+    if comparison:
+        lines.append(comparison)
     index_path.write_text("\n".join(lines), encoding="utf-8")
     print(f"[plot-bench] wrote {index_path}")
 
 
-def main() -> int:
-    args = parse_args()
-    csv_files = discover_csv_files(args.paths, recursive=args.recursive)
-    if not csv_files:
-        _warn("No CSV files discovered. Nothing to do.")
-        return 1
-    manifest: List[tuple[BenchmarkDataset, Dict[str, Path]]] = []
-    for csv_path in csv_files:
-        try:
-            dataset = load_dataset(csv_path)
-        except ValueError as exc:
-            _warn(f"Skipping {csv_path}: {exc}")
-            continue
-        try:
-            outputs = render_dataset(dataset, args.output, args.formats, args.dpi)
-        except ValueError as exc:
-            _warn(f"Failed to render {csv_path}: {exc}")
-            continue
-        manifest.append((dataset, outputs))
-    if not manifest:
-        _warn("No charts were generated.")
+def process_dataset(
+    csv_path: Path,
+    output_dir: Path,
+    formats: Sequence[str],
+    dpi: int,
+    checkpoint_dir: Path | None = None,
+    backend: str = "matplotlib",
+) -> tuple[BenchmarkDataset, Dict[str, Path]] | None:
+    """Load and render a single dataset, reporting recoverable failures."""
+    try:
+        dataset = load_dataset(csv_path, checkpoint_dir=checkpoint_dir)
+    except ValueError as exc:
+        _warn(f"Skipping {csv_path}: {exc}")
+        return None
+    try:
+        with _profiler.stage("timeline.read", dataset.slug) as counts:
+            path = timeline_path(csv_path)
+            runs = read_timeline(path) if path.is_file() else []
+            counts["intervals"] = sum(len(run) for run in runs)
+        if backend == "svg":
+            outputs = render_dataset_svg(dataset, output_dir)
+            if runs:
+                outputs.update(render_timeline_svg(dataset, runs, output_dir))
+        else:
+            outputs = render_dataset(dataset, output_dir, formats, dpi)
+            if runs:
+                outputs.update(render_timeline(dataset, runs, output_dir, formats, dpi))
+    except ValueError as exc:
+        _warn(f"Failed to render {csv_path}: {exc}")
+        return None
+    return dataset, outputs
+
+
+def _init_worker() -> None:
+    _pyplot()
+
+
+def _process_in_worker(
+    profile: bool, *args
+) -> tuple[tuple[BenchmarkDataset, Dict[str, Path]] | None, List[dict], str, str]:
+    """`process_dataset` in a pool worker, handing back its --profile records.
+
+    Output is captured and returned too, so the parent prints each dataset's
+    lines in one piece instead of interleaving the workers.
+    """
+    # Forked workers start with a copy of the parent's records; only report new ones.
+    _profiler.enabled, _profiler.records = profile, []
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        result = process_dataset(*args)
+    return result, _profiler.drain(), stdout.getvalue(), stderr.getvalue()
+
+
+def _collect(future) -> tuple[BenchmarkDataset, Dict[str, Path]] | None:
+    """Result of a `_process_in_worker` future, replaying its output here."""
+    result, records, stdout, stderr = future.result()
+    _profiler.extend(records)
+    sys.stdout.write(stdout)
+    sys.stdout.flush()
+    sys.stderr.write(stderr)
+    sys.stderr.flush()
+    return result
+
+
+def render_all(
+    csv_files: Sequence[Path],
+    output_dir: Path,
+    formats: Sequence[str],
+    dpi: int,
+    *,
+    jobs: int = 1,
+    checkpoint_dir: Path | None = None,
+    backend: str = "matplotlib",
+) -> List[tuple[BenchmarkDataset, Dict[str, Path]] | None]:
+    """Render every dataset, fanning out to `jobs` worker processes.
+
+    Results line up with `csv_files`; failed datasets are reported as None. Unexpected errors are
+    confined to their dataset; datasets caught in a crashed pool are retried in
+    a dedicated worker so a single bad file cannot take down the batch.
+    """
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(csv_files))
+    if jobs <= 1:
+        return [
+            process_dataset(csv_path, output_dir, formats, dpi, checkpoint_dir, backend)
+            for csv_path in csv_files
+        ]
+
+    results: Dict[int, tuple[BenchmarkDataset, Dict[str, Path]] | None] = {}
+    retry: List[int] = []
+    # The SVG backend never needs matplotlib in the workers.
+    initializer = _init_worker if backend == "matplotlib" else None
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer) as pool:
+        futures = [
+            pool.submit(
+                _process_in_worker,
+                _profiler.enabled,
+                csv_path,
+                output_dir,
+                formats,
+                dpi,
+                checkpoint_dir,
+                backend,
+            )
+            for csv_path in csv_files
+        ]
+        for position, future in enumerate(futures):
+            try:
+                results[position] = _collect(future)
+            except BrokenProcessPool:
+                retry.append(position)
+            except Exception as exc:  # noqa: BLE001 - isolate per-dataset failures
+                _warn(f"Failed to process {csv_files[position]}: {exc}")
+    for position in retry:
+        with ProcessPoolExecutor(max_workers=1, initializer=initializer) as pool:
+            future = pool.submit(
+                _process_in_worker,
+                _profiler.enabled,
+                csv_files[position],
+                output_dir,
+                formats,
+                dpi,
+                checkpoint_dir,
+                backend,
+            )
+            try:
+                results[position] = _collect(future)
+            except Exception as exc:  # noqa: BLE001 - isolate per-dataset failures
+                _warn(f"Failed to process {csv_files[position]}: {exc}")
+    return [results.get(position) for position in range(len(csv_files))]
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_digest(path: Path, previous: dict | None) -> dict:
+    """Hash `path`, reusing `previous` when name, size and mtime are unchanged."""
+    stat = path.stat()
+    if (
+        previous
+        and previous.get("name") == path.name
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime_ns") == stat.st_mtime_ns
+    ):
+        return previous
+    return {
+        "name": path.name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _sha256_file(path),
+    }
+
+
+def fingerprint_dataset(
+    csv_path: Path,
+    formats: Sequence[str],
+    dpi: int,
+    previous: dict | None,
+    backend: str = "matplotlib",
+) -> dict:
+    """Compute the render-cache key for a dataset.
+
+    The key covers the CSV bytes, the metadata, histogram, server metrics and
+    timeline sidecars, the render options (including the backend) and
+    `TOOL_VERSION`.
+    """
+    previous = previous or {}
+    csv_digest = _file_digest(csv_path, previous.get("csv"))
+    meta_path = find_metadata_file(csv_path)
+    meta_digest = _file_digest(meta_path, previous.get("meta")) if meta_path else None
+    hist_path = histogram_path(csv_path)
+    hist_digest = _file_digest(hist_path, previous.get("hist")) if hist_path.is_file() else None
+    server_path = server_metrics_path(csv_path)
+    server_digest = (
+        _file_digest(server_path, previous.get("server")) if server_path.is_file() else None
+    )
+    timeline = timeline_path(csv_path)
+    timeline_digest = (
+        _file_digest(timeline, previous.get("timeline")) if timeline.is_file() else None
+    )
+    key_source = json.dumps(
+        [
+            TOOL_VERSION,
+            csv_digest["sha256"],
+            meta_digest["sha256"] if meta_digest else None,
+            hist_digest["sha256"] if hist_digest else None,
+            server_digest["sha256"] if server_digest else None,
+            timeline_digest["sha256"] if timeline_digest else None,
+            list(formats),
+            dpi,
+            backend,
+        ]
+    )
+    return {
+        "key": hashlib.sha256(key_source.encode("utf-8")).hexdigest(),
+        "csv": csv_digest,
+        "meta": meta_digest,
+        "hist": hist_digest,
+        "server": server_digest,
+        "timeline": timeline_digest,
+    }
+
+
+def load_render_cache(output_dir: Path) -> Dict[str, dict]:
+    path = output_dir / CACHE_FILENAME
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as exc:
+        _warn(f"Ignoring unreadable render cache {path}: {exc}")
+        return {}
+    entries = payload.get("entries") if isinstance(payload, dict) else None
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_render_cache(output_dir: Path, entries: Dict[str, dict]) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / CACHE_FILENAME
+    staging = path.with_name(path.name + ".tmp")
+    payload = {"tool_version": TOOL_VERSION, "entries": entries}
+    staging.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(staging, path)
+
+
+def _cached_outputs(entry: dict | None, key: str, output_dir: Path) -> Dict[str, Path] | None:
+    if not entry or entry.get("key") != key:
+        return None
+    outputs = {fmt: output_dir / name for fmt, name in entry.get("outputs", {}).items()}
+    if not outputs or not all(path.is_file() for path in outputs.values()):
+        return None
+    return outputs
+
+
+def _cached_dataset(csv_path: Path, entry: dict) -> BenchmarkDataset:
+    """Rebuild the index-facing parts of a dataset without parsing the CSV."""
+    return BenchmarkDataset(
+        csv_path=csv_path,
+        scenario=entry.get("scenario") or csv_path.stem,
+        title=entry.get("title") or csv_path.stem,
+        concurrency=_concat([], "q"),
+        rps=_concat([], "d"),
+        latencies={},
+        metadata=dict(entry.get("metadata") or {}),
+        reconciliation=list(entry.get("reconciliation") or []),
+        knee=entry.get("knee"),
+        usl=UslFit.from_dict(entry["usl"]) if entry.get("usl") else None,
+        usl_curve=UslCurve(*entry["usl_curve"]) if entry.get("usl_curve") else None,
+    )
+
+
+def prune_stale_outputs(
+    previous: Dict[str, dict], current: Dict[str, dict], output_dir: Path
+) -> None:
+    """Delete charts recorded by the previous run that are no longer produced."""
+    keep = {name for entry in current.values() for name in entry.get("outputs", {}).values()}
+    for entry in previous.values():
+        for name in entry.get("outputs", {}).values():
+            # Only ever touch plain file names inside the output directory.
+            if name in keep or Path(name).name != name:
+                continue
+            stale = output_dir / name
+            if stale.is_file():
+                stale.unlink()
+                print(f"[plot-bench] pruned {stale}")
+
+
+def render_cached(
+    csv_files: Sequence[Path],
+    output_dir: Path,
+    formats: Sequence[str],
+    dpi: int,
+    *,
+    jobs: int = 1,
+    force: bool = False,
+    load_columns: bool = False,
+    checkpoint_dir: Path | None = None,
+    backend: str = "matplotlib",
+) -> List[tuple[BenchmarkDataset, Dict[str, Path]]]:
+    """Render datasets whose cache key changed and reuse charts for the rest.
+
+    Cache hits skip both parsing and rendering unless `load_columns` is set
+    (the overview charts need the data). `force` re-renders everything.
+    """
+    previous = load_render_cache(output_dir)
+    entries: Dict[str, dict] = {}
+    slots: List[tuple[BenchmarkDataset, Dict[str, Path]] | None] = [None] * len(csv_files)
+    fingerprints: List[dict] = []
+    pending: List[int] = []
+    for position, csv_path in enumerate(csv_files):
+        entry = previous.get(csv_path.stem)
+        with _profiler.stage("fingerprint", csv_path.stem):
+            fingerprint = fingerprint_dataset(csv_path, formats, dpi, entry, backend)
+        fingerprints.append(fingerprint)
+        outputs = None if force else _cached_outputs(entry, fingerprint["key"], output_dir)
+        if outputs is None:
+            pending.append(position)
+            continue
+        try:
+            if load_columns:
+                dataset = load_dataset(csv_path, checkpoint_dir=checkpoint_dir)
+            else:
+                dataset = _cached_dataset(csv_path, entry)
+        except ValueError:
+            pending.append(position)
+            continue
+        print(f"[plot-bench] cached {csv_path}")
+        slots[position] = (dataset, outputs)
+        entries[csv_path.stem] = entry
+
+    rendered = render_all(
+        [csv_files[position] for position in pending],
+        output_dir,
+        formats,
+        dpi,
+        jobs=jobs,
+        checkpoint_dir=checkpoint_dir,
+        backend=backend,
+    )
+    for position, result in zip(pending, rendered):
+        if result is None:
+            continue
+        dataset, outputs = result
+        slots[position] = result
+        entries[dataset.slug] = {
+            **fingerprints[position],
+            "source": str(dataset.csv_path),
+            "scenario": dataset.scenario,
+            "title": dataset.title,
+            "metadata": dataset.metadata,
+            "reconciliation": dataset.reconciliation,
+            "knee": dataset.knee,
+            "usl": dataset.usl.to_dict() if dataset.usl is not None else None,
+            "usl_curve": list(dataset.usl_curve) if dataset.usl_curve is not None else None,
+            "outputs": {fmt: path.name for fmt, path in outputs.items()},
+        }
+
+    # Datasets filtered out of this run stay cached as long as their CSV exists.
+    processed = {csv_path.stem for csv_path in csv_files}
+    for slug, entry in previous.items():
+        if slug not in processed and Path(entry.get("source", "")).is_file():
+            entries[slug] = entry
+    prune_stale_outputs(previous, entries, output_dir)
+    save_render_cache(output_dir, entries)
+    return [slot for slot in slots if slot is not None]
+
+
+def _column_max(values) -> float:
+    return float(values.max()) if np is not None else float(max(values))
+
+
+def describe_dataset(dataset: BenchmarkDataset) -> str:
+    concurrency = dataset.concurrency
+    bits = [
+        f"{dataset.rows} rows",
+        f"concurrency {concurrency[0]}-{concurrency[-1]}",
+        f"peak {_column_max(dataset.rps):.1f} req/s",
+    ]
+    if dataset.knee is not None:
+        bits.append(f"knee at {dataset.knee}")
+    for key, values in sorted(dataset.latencies.items()):
+        bits.append(f"max {LATENCY_LABELS.get(key, key)} {_column_max(values):.2f} ms")
+    lines = [f"{dataset.slug}: " + ", ".join(bits)]
+    if dataset.usl is not None:
+        lines.append(f"  {describe_usl(dataset.usl)}")
+    for row in dataset.reconciliation:
+        label = LATENCY_LABELS.get(row["latency"], row["latency"])
+        lines.append(
+            f"  concurrency {row['concurrency']} {label}:"
+            f" client {row['client_ms']:.2f} ms, server {row['server_ms']:.2f} ms,"
+            f" outside kernel {row['overhead_ms']:.2f} ms"
+        )
+    return "\n".join(lines)
+
+
+def summarize(
+    csv_files: Sequence[Path],
+    output_dir: Path,
+    formats: Sequence[str],
+    dpi: int,
+    *,
+    index: Path | None = None,
+    comparison: str | None = None,
+    verbose: bool = False,
+    checkpoint_dir: Path | None = None,
+    backend: str = "matplotlib",
+) -> int:
+    """Parse-only mode backing --validate-only and --summary.
+
+    Charts already recorded in the render cache are linked from the index;
+    nothing is rendered and matplotlib is never imported.
+    """
+    cache = load_render_cache(output_dir) if index else {}
+    manifest: List[tuple[BenchmarkDataset, Dict[str, Path]]] = []
+    failures = 0
+    for csv_path in csv_files:
+        try:
+            dataset = load_dataset(csv_path, checkpoint_dir=checkpoint_dir)
+        except ValueError as exc:
+            _warn(f"Invalid dataset {csv_path}: {exc}")
+            failures += 1
+            continue
+        if verbose:
+            print(f"[plot-bench] {describe_dataset(dataset)}")
+        outputs: Dict[str, Path] = {}
+        entry = cache.get(dataset.slug)
+        if entry:
+            key = fingerprint_dataset(csv_path, formats, dpi, entry, backend)["key"]
+            outputs = _cached_outputs(entry, key, output_dir) or {}
+        manifest.append((dataset, outputs))
+    if index:
+        with _profiler.stage("index") as counts:
+            write_markdown_index(manifest, output_dir, index, formats[0], comparison)
+            counts["datasets"] = len(manifest)
+    print(f"[plot-bench] {len(manifest)} dataset(s) valid, {failures} invalid")
+    return 1 if failures else 0
+
+
+def _to_list(values) -> List[float]:
+    return values.tolist() if np is not None else list(values)
+
+
+def _concurrency_runs(concurrency) -> Iterator[tuple[int, int, int]]:
+    """Yield `(level, start, stop)` for each run of equal values in a sorted column."""
+    if np is not None:
+        bounds = [0, *(np.flatnonzero(np.diff(concurrency)) + 1).tolist(), len(concurrency)]
+    else:
+        bounds = [0]
+        bounds.extend(
+            index
+            for index in range(1, len(concurrency))
+            if concurrency[index] != concurrency[index - 1]
+        )
+        bounds.append(len(concurrency))
+    for start, stop in zip(bounds, bounds[1:]):
+        yield int(concurrency[start]), start, stop
+
+
+def collect_samples(datasets: Sequence[BenchmarkDataset], scenario: str | None = None) -> Samples:
+    """Group throughput/latency values by `(scenario, concurrency)` across datasets."""
+    samples: Samples = {}
+    for dataset in datasets:
+        columns = {"throughput": dataset.rps, **dataset.latencies}
+        for level, start, stop in _concurrency_runs(dataset.concurrency):
+            group = samples.setdefault((scenario or dataset.scenario, level), {})
+            for metric, values in columns.items():
+                group.setdefault(metric, []).extend(_to_list(values[start:stop]))
+    return samples
+
+
+USL_LABELS: Dict[str, str] = {
+    "throughput_per_client": "λ (req/s per client)",
+    "contention": "Contention σ",
+    "coherency": "Coherency κ",
+    "peak_concurrency": "Peak concurrency",
+    "peak_throughput": "Peak req/s",
+}
+
+
+def compare_usl_fits(
+    baseline: Sequence[BenchmarkDataset],
+    candidate: Sequence[BenchmarkDataset],
+    scenario: str | None = None,
+) -> List[dict]:
+    """USL coefficients of both sides per scenario, pooling every sweep of a side."""
+
+    def fits(datasets: Sequence[BenchmarkDataset]) -> Dict[str, UslFit]:
+        points: Dict[str, tuple[List[float], List[float]]] = {}
+        for dataset in datasets:
+            levels, rates = points.setdefault(scenario or dataset.scenario, ([], []))
+            levels.extend(_to_list(dataset.concurrency))
+            rates.extend(_to_list(dataset.rps))
+        fitted = {name: fit_usl(levels, rates) for name, (levels, rates) in points.items()}
+        return {name: fit for name, fit in fitted.items() if fit is not None}
+
+    before, after = fits(baseline), fits(candidate)
+    return [
+        {
+            "scenario": name,
+            "baseline": before[name].to_dict(),
+            "candidate": after[name].to_dict(),
+            "delta_pct": {
+                key: delta for key, (_, _, delta) in compare_usl(before[name], after[name]).items()
+            },
+        }
+        for name in sorted(before.keys() & after.keys())
+    ]
+
+
+def _usl_value(value: float | None) -> str:
+    if value is None:
+        return "–"
+    return f"{value:.1f}" if abs(value) >= 1 else f"{value:.4g}"
+
+
+def render_usl_markdown(comparisons: Sequence[dict]) -> str:
+    """Markdown table of USL coefficients per scenario, baseline vs candidate."""
+    if not comparisons:
+        return ""
+    lines = [
+        "### Scalability model",
+        "",
+        "| Scenario | Coefficient | Baseline | Candidate | Δ |",
+        "| --- | --- | ---: | ---: | ---: |",
+    ]
+    for entry in comparisons:
+        for key, label in USL_LABELS.items():
+            delta = entry["delta_pct"].get(key)
+            lines.append(
+                f"| {entry['scenario']} | {label} | {_usl_value(entry['baseline'][key])} "
+                f"| {_usl_value(entry['candidate'][key])} "
+                f"| {'–' if delta is None else f'{delta:+.1f}%'} |"
+            )
+    lines.append("")
+    return "\n".join(lines)
+
+
+def load_comparison(report_path: Path) -> str:
+    """Render the Markdown tables for a `compare --json` report."""
+    payload = json.loads(report_path.read_text(encoding="utf-8"))
+    rows = [ComparisonRow.from_dict(row) for row in payload.get("rows", [])]
+    table = render_markdown(
+        rows,
+        threshold=float(payload.get("threshold_pct", 5.0)),
+        confidence=float(payload.get("confidence", 0.95)),
+        labels=LATENCY_LABELS,
+    )
+    usl = render_usl_markdown(payload.get("usl", []))
+    return f"{table}\n{usl}" if usl else table
+
+
+def parse_compare_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="plot-bench.py compare",
+        description="Compare candidate benchmark runs against a baseline and gate on regressions.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--baseline", nargs="+", type=Path, required=True, help="Baseline CSV files/directories."
+    )
+    parser.add_argument(
+        "--candidate", nargs="+", type=Path, required=True, help="Candidate CSV files/directories."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=5.0,
+        help="Regression threshold in percent (throughput drop or latency increase).",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of the bootstrap intervals for repeated runs.",
+    )
+    parser.add_argument("--resamples", type=int, default=2000, help="Bootstrap resamples.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for reproducible resampling.")
+    parser.add_argument(
+        "--gate-point-estimates",
+        action="store_true",
+        help="Judge groups with a single run on either side by their point estimate "
+        "instead of reporting them as inconclusive.",
+    )
+    parser.add_argument("--json", type=Path, help="Write a machine-readable report here.")
+    parser.add_argument("--markdown", type=Path, help="Write the Markdown table here.")
+    parser.add_argument(
+        "--no-recursive",
+        dest="recursive",
+        action="store_false",
+        help="Only inspect the top level of provided directories for CSV files.",
+    )
+    parser.set_defaults(recursive=True)
+    return parser.parse_args(argv)
+
+
+def compare_main(argv: Sequence[str]) -> int:
+    args = parse_compare_args(argv)
+    baseline = load_datasets(args.baseline, recursive=args.recursive)
+    candidate = load_datasets(args.candidate, recursive=args.recursive)
+    if not baseline or not candidate:
+        _warn("Both --baseline and --candidate need at least one valid dataset.")
         return 1
+
+    # Two single-scenario sides (e.g. "baseline-1.0" vs "baseline-1.1") are
+    # compared with each other even though their labels differ.
+    base_scenarios = {dataset.scenario for dataset in baseline}
+    cand_scenarios = {dataset.scenario for dataset in candidate}
+    label = None
+    if len(base_scenarios) == 1 and len(cand_scenarios) == 1 and base_scenarios != cand_scenarios:
+        label = f"{base_scenarios.pop()} vs {cand_scenarios.pop()}"
+
+    rows = compare_samples(
+        collect_samples(baseline, label),
+        collect_samples(candidate, label),
+        threshold=args.threshold,
+        confidence=args.confidence,
+        resamples=args.resamples,
+        seed=args.seed,
+        point_estimates=args.gate_point_estimates,
+    )
+    if not rows:
+        _warn("No scenario/concurrency pairs are shared by baseline and candidate.")
+        return 1
+
+    regressions = [row for row in rows if row.status == "regression"]
+    for row in rows:
+        metric = LATENCY_LABELS.get(row.metric, row.metric)
+        print(
+            f"[plot-bench] {row.scenario} @ {row.concurrency} {metric}: "
+            f"{row.baseline_mean:.2f} -> {row.candidate_mean:.2f} ({row.delta_pct:+.1f}%) "
+            f"{row.status}"
+        )
+    usl = compare_usl_fits(baseline, candidate, label)
+    for entry in usl:
+        for key, label_text in USL_LABELS.items():
+            delta = entry["delta_pct"][key]
+            print(
+                f"[plot-bench] {entry['scenario']} USL {label_text}: "
+                f"{_usl_value(entry['baseline'][key])} -> {_usl_value(entry['candidate'][key])}"
+                + ("" if delta is None else f" ({delta:+.1f}%)")
+            )
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "tool_version": TOOL_VERSION,
+            "generated_at": _utc_timestamp(),
+            "threshold_pct": args.threshold,
+            "confidence": args.confidence,
+            "resamples": args.resamples,
+            "point_estimates": args.gate_point_estimates,
+            "baseline": [str(dataset.csv_path) for dataset in baseline],
+            "candidate": [str(dataset.csv_path) for dataset in candidate],
+            "regressions": len(regressions),
+            "rows": [row.to_dict() for row in rows],
+            "usl": usl,
+        }
+        args.json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"[plot-bench] wrote {args.json}")
+    if args.markdown:
+        args.markdown.parent.mkdir(parents=True, exist_ok=True)
+        table = render_markdown(
+            rows, threshold=args.threshold, confidence=args.confidence, labels=LATENCY_LABELS
+        )
+        usl_table = render_usl_markdown(usl)
+        args.markdown.write_text(
+            f"{table}\n{usl_table}" if usl_table else table, encoding="utf-8"
+        )
+        print(f"[plot-bench] wrote {args.markdown}")
+    print(f"[plot-bench] {len(rows)} comparison(s), {len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+def parse_metrics_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="plot-bench.py metrics",
+        description="Summarise server-side rates and quantiles between two /metrics scrapes.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("before", type=Path, help="Scrape saved before the measured window.")
+    parser.add_argument("after", type=Path, help="Scrape saved after the measured window.")
+    parser.add_argument(
+        "--elapsed",
+        type=float,
+        help="Seconds between the scrapes (defaults to the difference of the file mtimes).",
+    )
+    parser.add_argument(
+        "--quantiles",
+        nargs="+",
+        type=float,
+        default=[0.5, 0.95, 0.99],
+        help="Quantiles estimated from histogram bucket deltas.",
+    )
+    parser.add_argument("--namespace", default="bamboo", help="Metric namespace prefix.")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("docs/benchmarks/charts"),
+        help="Directory where the server-side chart is written.",
+    )
+    parser.add_argument(
+        "--name", default="server-metrics", help="Chart file stem, e.g. the dataset slug."
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=["png"], help="Image formats for the chart."
+    )
+    parser.add_argument("--dpi", type=int, default=150, help="Resolution for raster formats.")
+    parser.add_argument("--no-chart", action="store_true", help="Skip rendering the chart.")
+    parser.add_argument("--json", type=Path, help="Write the per-series rows here.")
+    parser.add_argument("--markdown", type=Path, help="Write the Markdown tables here.")
+    return parser.parse_args(argv)
+
+
+def render_server_metrics(
+    rows: Sequence[dict],
+    output_dir: Path,
+    name: str,
+    formats: Sequence[str],
+    dpi: int,
+    quantiles: Sequence[float],
+) -> Dict[str, Path]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    plt = _pyplot()
+    labels = [f"{row['method']} {row['route']} {row['status']}".strip() for row in rows]
+    positions = list(range(len(rows)))
+    height = max(3.0, 0.4 * len(rows) + 1.5)
+    fig, axes = plt.subplots(1, 2, figsize=(12, height), sharey=True)
+
+    axes[0].barh(positions, [row["rate_rps"] for row in rows], color="#0B6EFD")
+    axes[0].set_yticks(positions)
+    axes[0].set_yticklabels(labels)
+    axes[0].invert_yaxis()
+    axes[0].set_title("Server throughput")
+    axes[0].set_xlabel("Requests / second")
+    axes[0].grid(True, axis="x", linestyle="--", alpha=0.4)
+
+    width = 0.8 / max(1, len(quantiles))
+    for slot, quantile in enumerate(quantiles):
+        key = f"p{quantile * 100:g}_ms"
+        offsets = [position - 0.4 + width * (slot + 0.5) for position in positions]
+        axes[1].barh(
+            offsets, [row[key] for row in rows], height=width, label=f"p{quantile * 100:g}"
+        )
+    axes[1].set_title("Server latency (histogram_quantile)")
+    axes[1].set_xlabel("Milliseconds")
+    axes[1].grid(True, axis="x", linestyle="--", alpha=0.4)
+    axes[1].legend()
+
+    fig.suptitle(f"{name} – /metrics")
+    fig.tight_layout(rect=(0, 0, 1, 0.95))
+    output_paths: Dict[str, Path] = {}
+    for image_format in formats:
+        suffix = image_format.lower().lstrip(".")
+        output_path = output_dir / f"{name}.server.{suffix}"
+        fig.savefig(output_path, dpi=dpi, format=suffix)
+        output_paths[suffix] = output_path
+        print(f"[plot-bench] wrote {output_path}")
+    plt.close(fig)
+    return output_paths
+
+
+def _json_row(row: dict) -> dict:
+    # NaN is not valid JSON; report undefined quantiles as null.
+    return {
+        key: None if isinstance(value, float) and math.isnan(value) else value
+        for key, value in row.items()
+    }
+
+
+def metrics_main(argv: Sequence[str]) -> int:
+    args = parse_metrics_args(argv)
+    prefix = f"{args.namespace}_"
+    try:
+        before = read_snapshot(args.before, prefix=prefix)
+        after = read_snapshot(args.after, prefix=prefix)
+    except (OSError, UnicodeDecodeError, ValueError) as exc:
+        _warn(f"Could not read scrape: {exc}")
+        return 1
+    elapsed = args.elapsed
+    if elapsed is None:
+        elapsed = args.after.stat().st_mtime - args.before.stat().st_mtime
+    if elapsed <= 0:
+        _warn("Scrape interval is not positive; pass --elapsed explicitly.")
+        return 1
+
+    rows = summarize_http(
+        before, after, elapsed, namespace=args.namespace, quantiles=args.quantiles
+    )
+    breakers = summarize_circuit_breakers(before, after, namespace=args.namespace)
+    if not rows:
+        _warn("No HTTP requests were recorded between the two scrapes.")
+        return 1
+
+    for row in rows:
+        bits = ", ".join(
+            f"p{quantile * 100:g} {row[f'p{quantile * 100:g}_ms']:.2f} ms"
+            for quantile in args.quantiles
+        )
+        print(
+            f"[plot-bench] {row['method']} {row['route']} {row['status']}: "
+            f"{row['requests']:.0f} requests, {row['rate_rps']:.1f} req/s, {bits}"
+        )
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "tool_version": TOOL_VERSION,
+            "generated_at": _utc_timestamp(),
+            "before": str(args.before),
+            "after": str(args.after),
+            "elapsed_seconds": elapsed,
+            "quantiles": args.quantiles,
+            "rows": [_json_row(row) for row in rows],
+            "circuit_breakers": [_json_row(row) for row in breakers],
+        }
+        args.json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"[plot-bench] wrote {args.json}")
+    if args.markdown:
+        args.markdown.parent.mkdir(parents=True, exist_ok=True)
+        args.markdown.write_text(
+            render_metrics_markdown(rows, breakers, quantiles=args.quantiles, elapsed=elapsed),
+            encoding="utf-8",
+        )
+        print(f"[plot-bench] wrote {args.markdown}")
+    if not args.no_chart:
+        formats = split_formats(args.formats)
+        try:
+            _pyplot()
+        except ImportError:
+            _warn("matplotlib is required to render charts; pass --no-chart to skip it.")
+            return 1
+        render_server_metrics(rows, args.output, args.name, formats, args.dpi, args.quantiles)
+    return 0
+
+
+def parse_query_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="plot-bench.py query",
+        description="Select runs from the SQLite run index and optionally chart them.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        default=[Path("docs/benchmarks/data")],
+        help="CSV file(s) or directories to search; the index is refreshed from them too.",
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=Path(".cache/plot-bench/runs.sqlite"),
+        help="SQLite run index, created on first use.",
+    )
+    parser.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        metavar="FIELD=VALUE",
+        help=(
+            "Filter on a CSV column or metadata key; repeatable. Also accepts !=, <, <=, >, "
+            ">= and globs, e.g. --where php_version=8.4* --where concurrency>=64."
+        ),
+    )
+    parser.add_argument("--since", help="Only datasets recorded on or after this date.")
+    parser.add_argument(
+        "--since-commit",
+        help="Only datasets recorded on or after the first one measured at this commit.",
+    )
+    parser.add_argument(
+        "--no-refresh",
+        action="store_true",
+        help="Query the index as it is, without scanning the paths for changes.",
+    )
+    parser.add_argument("--json", type=Path, help="Write the matching runs here.")
+    parser.add_argument(
+        "--chart", metavar="NAME", help="Chart the matching runs as <NAME>.<format> in --output."
+    )
+    parser.add_argument("--title", help="Chart title (defaults to the shared scenario).")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("docs/benchmarks/charts"),
+        help="Directory where the --chart output is written.",
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=["png"], help="Image formats for the chart."
+    )
+    parser.add_argument("--dpi", type=int, default=144, help="Resolution for raster formats.")
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default="matplotlib", help="Chart renderer."
+    )
+    parser.add_argument(
+        "--no-recursive",
+        dest="recursive",
+        action="store_false",
+        help="Only inspect the top level of provided directories for CSV files.",
+    )
+    parser.set_defaults(recursive=True)
+    return parser.parse_args(argv)
+
+
+def dataset_from_runs(
+    name: str,
+    runs: Sequence[dict],
+    metadata: Dict[str, Dict[str, str]],
+    title: str | None = None,
+) -> BenchmarkDataset:
+    """Chartable dataset of indexed runs; keeps the metadata all their files share."""
+    runs = sorted(runs, key=itemgetter("concurrency"))
+    concurrency = _int_array([run["concurrency"] for run in runs])
+    rps = _float_array([run["requests_per_second"] for run in runs])
+    latencies: Dict[str, Sequence[float]] = {}
+    for percentile in PERCENTILES:
+        values = [run[f"{percentile}_ms"] for run in runs]
+        if all(value is None for value in values):
+            continue
+        if any(value is None for value in values):
+            _warn(f"Some runs lack {percentile}_ms; omitting it from the {name} chart")
+            continue
+        latencies[f"latency_{percentile}"] = _float_array(values)
+    shared = set.intersection(*(set(items.items()) for items in metadata.values()))
+    scenarios = {run["scenario"] for run in runs if run["scenario"]}
+    scenario = scenarios.pop() if len(scenarios) == 1 else name
+    shared_metadata = dict(sorted(shared))
+    usl = fit_usl(concurrency, rps)
+    return BenchmarkDataset(
+        csv_path=Path(f"{name}.csv"),
+        scenario=scenario,
+        title=title or shared_metadata.get("title") or scenario.replace("-", " ").title(),
+        concurrency=concurrency,
+        rps=rps,
+        latencies=latencies,
+        metadata=shared_metadata,
+        knee=find_knee(*level_means(concurrency, rps)),
+        usl=usl,
+        usl_curve=usl_curve(concurrency, rps, usl) if usl is not None else None,
+    )
+
+
+def _describe_run(run: dict) -> str:
+    p99 = run.get("p99_ms")
+    error_rate = run.get("error_rate")
+    return (
+        f"{run['recorded_on']} {run['scenario'] or '-'} @ {run['concurrency']}: "
+        f"{run['requests_per_second']:.1f} req/s"
+        + ("" if p99 is None else f", p99 {p99:.2f} ms")
+        + ("" if error_rate is None else f", error rate {error_rate:.4f}")
+        + f" ({Path(run['path']).name}:{run['line']})"
+    )
+
+
+def query_main(argv: Sequence[str]) -> int:
+    args = parse_query_args(argv)
+    try:
+        connection = open_index(args.db)
+    except sqlite3.Error as exc:
+        _warn(f"Could not open run index {args.db}: {exc}")
+        return 1
+    with closing(connection):
+        if not args.no_refresh:
+            started = time.perf_counter()
+            csv_files = discover_csv_files(args.paths, recursive=args.recursive)
+            stats = refresh_runs(
+                connection,
+                csv_files,
+                metadata_file=find_metadata_file,
+                load_metadata=load_metadata,
+            )
+            for error in stats.errors:
+                _warn(f"Not indexed: {error}")
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"[plot-bench] refreshed {args.db} in {elapsed:.1f} ms: {stats}")
+        started = time.perf_counter()
+        try:
+            runs = query_runs(
+                connection,
+                args.where,
+                since=args.since,
+                since_commit=args.since_commit,
+                paths=args.paths,
+                recursive=args.recursive,
+            )
+        except ValueError as exc:
+            _warn(str(exc))
+            return 1
+        elapsed = (time.perf_counter() - started) * 1000
+        metadata = metadata_for(connection, sorted({run["path"] for run in runs}))
+
+    for run in runs:
+        print(f"[plot-bench] {_describe_run(run)}")
+    print(f"[plot-bench] {len(runs)} matching run(s) in {elapsed:.1f} ms")
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "tool_version": TOOL_VERSION,
+            "generated_at": _utc_timestamp(),
+            "filters": args.where,
+            "since": args.since,
+            "since_commit": args.since_commit,
+            "runs": runs,
+            "metadata": metadata,
+        }
+        args.json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"[plot-bench] wrote {args.json}")
+    if not args.chart:
+        return 0
+    if not runs:
+        _warn("No runs match; nothing to chart.")
+        return 1
+    dataset = dataset_from_runs(args.chart, runs, metadata, args.title)
+    if args.backend == "svg":
+        render_dataset_svg(dataset, args.output)
+        return 0
+    try:
+        _pyplot()
+    except ImportError:
+        _warn("matplotlib is required to render charts; use --backend svg instead.")
+        return 1
+    render_dataset(dataset, args.output, split_formats(args.formats), args.dpi)
+    return 0
+
+
+def parse_archive_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="plot-bench.py archive",
+        description="Convert benchmark CSVs to compact .bba archives and back.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "action",
+        choices=("export", "import"),
+        help="export: CSV (+ .meta.json) -> archive; import: archive -> CSV (+ .meta.json).",
+    )
+    parser.add_argument(
+        "paths", nargs="+", type=Path, help="Files to convert, or directories to search."
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Directory for the converted files (default: next to each)."
+    )
+    parser.add_argument("--force", action="store_true", help="Overwrite existing files.")
+    parser.add_argument(
+        "--no-recursive",
+        dest="recursive",
+        action="store_false",
+        help="Only inspect the top level of provided directories.",
+    )
+    parser.set_defaults(recursive=True)
+    return parser.parse_args(argv)
+
+
+def _files_with_suffix(paths: Sequence[Path], suffix: str, recursive: bool) -> List[Path]:
+    found: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            pattern = f"*{suffix}"
+            found.extend(sorted(path.rglob(pattern) if recursive else path.glob(pattern)))
+        elif path.suffix.lower() == suffix and path.is_file():
+            found.append(path)
+        else:
+            _warn(f"Skipping {path} (not a {suffix} file or directory)")
+    return found
+
+
+def archive_main(argv: Sequence[str]) -> int:
+    args = parse_archive_args(argv)
+    export = args.action == "export"
+    sources = _files_with_suffix(args.paths, ".csv" if export else ARCHIVE_SUFFIX, args.recursive)
+    if not sources:
+        _warn("Nothing to convert.")
+        return 1
+    failures = 0
+    for source in sources:
+        directory = args.output or source.parent
+        target = directory / f"{source.stem}{ARCHIVE_SUFFIX if export else '.csv'}"
+        if target.exists() and not args.force:
+            _warn(f"{target} exists; pass --force to overwrite it")
+            continue
+        try:
+            if export:
+                candidate = find_metadata_file(source)
+                metadata = read_metadata_file(candidate) if candidate is not None else {}
+                rows = csv_to_archive(source, target, metadata)
+            else:
+                rows, metadata = archive_to_csv(source, target)
+                if metadata:
+                    sidecar = directory / f"{source.stem}.meta.json"
+                    sidecar.write_text(json.dumps(metadata, indent=2) + "\n", encoding="utf-8")
+        except (OSError, UnicodeDecodeError, ValueError) as exc:
+            _warn(f"Could not convert {source}: {exc}")
+            failures += 1
+            continue
+        print(
+            f"[plot-bench] wrote {target} ({rows} rows, "
+            f"{source.stat().st_size / 1024:.1f} KiB -> {target.stat().st_size / 1024:.1f} KiB)"
+        )
+    return 1 if failures else 0
+
+
+def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        return compare_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "metrics":
+        return metrics_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        return query_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "archive":
+        return archive_main(sys.argv[2:])
+    args = parse_args()
+    formats = split_formats(args.formats)
+    if not formats:
+        _warn("No output formats specified.")
+        return 1
+    if args.backend == "svg" and formats != ["svg"]:
+        # The default png is swapped silently; anything else was asked for.
+        if formats != ["png"]:
+            _warn("The svg backend only writes SVG; ignoring --formats.")
+        formats = ["svg"]
+    if args.cprofile and not args.profile:
+        _warn("--cprofile requires --profile.")
+        return 1
+    if args.profile:
+        return profile_main(args, formats)
+    return build(args, formats)
+
+
+def _dataset_files(args: argparse.Namespace) -> List[Path]:
+    csv_files = discover_csv_files(args.paths, recursive=args.recursive)
+    if args.datasets:
+        selected = {Path(name).stem for name in args.datasets}
+        csv_files = [csv_path for csv_path in csv_files if csv_path.stem in selected]
+    return csv_files
+
+
+def build(args: argparse.Namespace, formats: List[str]) -> int:
+    """Validate, summarise or render the datasets selected on the command line."""
+    with _profiler.stage("discover") as counts:
+        csv_files = _dataset_files(args)
+        counts["files"] = len(csv_files)
+    if not csv_files:
+        _warn("No CSV files discovered. Nothing to do.")
+        return 1
+    if args.validate_only or args.summary:
+        return summarize(
+            csv_files,
+            args.output,
+            formats,
+            args.dpi,
+            index=args.index,
+            comparison=load_comparison(args.comparison) if args.comparison else None,
+            verbose=args.summary,
+            checkpoint_dir=args.checkpoint_dir,
+            backend=args.backend,
+        )
+    if args.backend == "matplotlib":
+        try:
+            _pyplot()
+        except ImportError:
+            _warn(
+                "matplotlib is required to render charts. Install it with "
+                "'pip install matplotlib' or use --backend svg."
+            )
+            return 1
+    manifest = render_cached(
+        csv_files,
+        args.output,
+        formats,
+        args.dpi,
+        jobs=args.jobs,
+        force=args.force,
+        load_columns=args.overview,
+        checkpoint_dir=args.checkpoint_dir,
+        backend=args.backend,
+    )
+    if not manifest:
+        _warn("No charts were generated.")
+        return 1
+    if args.overview:
+        with _profiler.stage("overview") as counts:
+            write_overview(
+                [dataset for dataset, _ in manifest],
+                args.output,
+                formats,
+                args.dpi,
+                args.title_prefix,
+                args.backend,
+            )
+            counts["figures"] = 2
     if args.index:
-        write_markdown_index(manifest, args.output, args.index, args.formats[0])
+        with _profiler.stage("index") as counts:
+            comparison = load_comparison(args.comparison) if args.comparison else None
+            write_markdown_index(manifest, args.output, args.index, formats[0], comparison)
+            counts["datasets"] = len(manifest)
     return 0
 
 
+def profile_main(args: argparse.Namespace, formats: List[str]) -> int:
+    """`build` under --profile: write the JSON report and print its summary line."""
+    _profiler.enabled = True
+    started, before = time.perf_counter(), os.times()
+    status = build(args, formats)
+    wall = time.perf_counter() - started
+    # User + system time of this process and of the (reaped) worker processes.
+    cpu = sum(os.times()[:4]) - sum(before[:4])
+    _profiler.enabled = False
+    report = _profiler.report(
+        wall_s=wall,
+        cpu_s=cpu,
+        tool_version=TOOL_VERSION,
+        generated_at=_utc_timestamp(),
+        argv=sys.argv[1:],
+        python=platform.python_version(),
+        platform=platform.platform(),
+        numpy=np is not None,
+        backend=args.backend,
+        jobs=args.jobs,
+        exit_status=status,
+        cprofile=None,
+    )
+    slowest = report["slowest_dataset"]
+    if args.cprofile and slowest is not None:
+        csv_path = next(path for path in _dataset_files(args) if path.stem == slowest)
+        write_cprofile(csv_path, args, formats, args.cprofile)
+        report["cprofile"] = str(args.cprofile)
+    args.profile.parent.mkdir(parents=True, exist_ok=True)
+    args.profile.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[plot-bench] wrote {args.profile}")
+    print(f"[plot-bench] {summary_line(report)}")
+    return status
+
+
+def write_cprofile(
+    csv_path: Path, args: argparse.Namespace, formats: List[str], stats_path: Path
+) -> None:
+    """Load (and, unless only validating, render) one dataset again under cProfile."""
+    profile = cProfile.Profile()
+    if args.validate_only or args.summary:
+        profile.runcall(load_dataset, csv_path, checkpoint_dir=args.checkpoint_dir)
+    else:
+        profile.runcall(
+            process_dataset,
+            csv_path,
+            args.output,
+            formats,
+            args.dpi,
+            args.checkpoint_dir,
+            args.backend,
+        )
+    stats_path.parent.mkdir(parents=True, exist_ok=True)
+    profile.dump_stats(str(stats_path))
+    print(f"[plot-bench] wrote {stats_path} ({csv_path.stem})")
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Chart `/metrics` scrape cost against series count from `bin/bench/scrape`.
+
+Reads the CSV written by `php bin/bench/scrape --csv` (one row per label,
+series count and phase) and draws two SVG panels: scrape time
+(collect + render) and the peak memory a scrape adds, both against the number
+of exported series. Each label/phase pair becomes one line, so runs of two
+checkouts appended to the same CSV (`--label=before`, `--label=after`) land on
+the same chart.
+
+Usage examples
+--------------
+>>> python docs/tools/plot-scrape.py docs/benchmarks/data/scrape.csv
+>>> python docs/tools/plot-scrape.py scrape.csv --output docs/benchmarks/charts/scrape.svg
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from svg_chart import PALETTE, Panel, Series, render_figure
+
+FIELDS = ("label", "series", "phase", "collect_ms", "render_ms", "peak_kib")
+
+# Line styles per phase; colours follow the label.
+_DASHES = {"cold": "6 3", "warm": None, "cached": "2 3"}
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Chart bin/bench/scrape results: scrape time and memory against series count.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("csv", type=Path, help="CSV written by bin/bench/scrape --csv.")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="SVG to write (defaults to the CSV path with an .svg extension).",
+    )
+    parser.add_argument("--title", default="/metrics scrape cost", help="Figure title.")
+    return parser.parse_args(argv)
+
+
+Point = Tuple[int, float, float]
+
+
+def load(path: Path) -> Dict[Tuple[str, str], List[Point]]:
+    """(label, phase) -> sorted (series, scrape ms, peak KiB); repeated runs are averaged."""
+    samples: Dict[Tuple[str, str, int], List[Tuple[float, float]]] = defaultdict(list)
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        missing = [name for name in FIELDS if name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+        for row in reader:
+            key = (row["label"], row["phase"], int(row["series"]))
+            total = float(row["collect_ms"]) + float(row["render_ms"])
+            samples[key].append((total, float(row["peak_kib"])))
+    lines: Dict[Tuple[str, str], List[Point]] = defaultdict(list)
+    for (label, phase, series), values in sorted(samples.items()):
+        milliseconds = sum(value[0] for value in values) / len(values)
+        kib = sum(value[1] for value in values) / len(values)
+        lines[(label, phase)].append((series, milliseconds, kib))
+    return dict(lines)
+
+
+def figure(lines: Dict[Tuple[str, str], List[Point]], title: str) -> str:
+    timing = Panel(title="Scrape time", xlabel="Series", ylabel="Milliseconds (collect + render)")
+    memory = Panel(title="Scrape memory", xlabel="Series", ylabel="Peak KiB added by a scrape")
+    labels = sorted({label for label, _ in lines})
+    for (label, phase), points in lines.items():
+        name = f"{label} {phase}" if len(labels) > 1 else phase
+        color = PALETTE[labels.index(label) % len(PALETTE)]
+        dash = _DASHES.get(phase)
+        counts = [point[0] for point in points]
+        timing.series.append(Series(name, counts, [point[1] for point in points], color, dash))
+        memory.series.append(Series(name, counts, [point[2] for point in points], color, dash))
+    return render_figure([timing, memory], title=title)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    try:
+        lines = load(args.csv)
+    except (OSError, ValueError) as exc:
+        print(f"[plot-scrape] ERROR: {exc}", file=sys.stderr)
+        return 1
+    if not lines:
+        print(f"[plot-scrape] ERROR: no rows in {args.csv}", file=sys.stderr)
+        return 1
+    output = args.output or args.csv.with_suffix(".svg")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(figure(lines, args.title), encoding="utf-8")
+    print(f"[plot-scrape] wrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
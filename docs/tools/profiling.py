@@ -0,0 +1,186 @@
+"""Stage timings for `plot-bench.py --profile`.
+
+Every instrumented step of a build (discovery, parsing, metadata, fitting,
+figure construction, each `savefig`...) is recorded as one `StageRecord`:
+
+    {"stage": "savefig.png", "dataset": "20240528-baseline", "wall_s": 0.412,
+     "cpu_s": 0.405, "peak_rss_kb": 182340, "counts": {"files": 1, "bytes": 91234}}
+
+`wall_s` comes from `time.perf_counter` and `cpu_s` from `time.process_time`
+of the process that ran the stage (worker processes record their own stages
+and hand them back with their results). `peak_rss_kb` is the highest resident
+set size reached during the stage: on Linux the kernel's high-water mark is
+reset before each stage (`/proc/self/clear_refs`) and read back from
+`VmHWM`; elsewhere it is the process-wide `ru_maxrss`, which never decreases.
+
+Stages never nest, so per-dataset totals add up. A disabled `Profiler` hands
+out no-op timers and costs nothing measurable.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+_CLEAR_REFS = "/proc/self/clear_refs"
+_STATUS = "/proc/self/status"
+
+# Stages listed in the one-line summary.
+SUMMARY_STAGES = 3
+
+
+def _reset_peak() -> None:
+    try:
+        with open(_CLEAR_REFS, "w", encoding="ascii") as handle:
+            handle.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb() -> int:
+    """High-water resident set size of this process, in KiB."""
+    try:
+        with open(_STATUS, "r", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux and the BSDs KiB.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    dataset: str | None
+    wall_s: float
+    cpu_s: float
+    peak_rss_kb: int
+    counts: Dict[str, int] = field(default_factory=dict)
+    pid: int = 0
+
+
+class Timer:
+    """Lap timer: each `lap` records the stage that ran since the previous one."""
+
+    def __init__(self, records: List[StageRecord], dataset: str | None):
+        self._records = records
+        self.dataset = dataset
+        self.restart()
+
+    def restart(self) -> None:
+        _reset_peak()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def lap(self, stage: str, **counts: int) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        self._records.append(
+            StageRecord(stage, self.dataset, wall, cpu, peak_rss_kb(), counts, os.getpid())
+        )
+        self.restart()
+
+
+class _NullTimer:
+    dataset = None
+
+    def restart(self) -> None:
+        pass
+
+    def lap(self, stage: str, **counts: int) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """Collects `StageRecord`s while `enabled`; see the module docstring."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.records: List[StageRecord] = []
+
+    def timer(self, dataset: str | None = None) -> Timer | _NullTimer:
+        return Timer(self.records, dataset) if self.enabled else _NULL_TIMER
+
+    @contextmanager
+    def stage(self, stage: str, dataset: str | None = None) -> Iterator[Dict[str, int]]:
+        """Time the block as one stage; counts added to the yielded dict are recorded."""
+        counts: Dict[str, int] = {}
+        timer = self.timer(dataset)
+        yield counts
+        timer.lap(stage, **counts)
+
+    def drain(self) -> List[dict]:
+        """Hand the records over (as dicts, so they pickle cheaply) and forget them."""
+        records, self.records = self.records, []
+        return [asdict(record) for record in records]
+
+    def extend(self, records: Iterable[dict]) -> None:
+        self.records.extend(StageRecord(**record) for record in records)
+
+    def report(self, *, wall_s: float, cpu_s: float, **extra) -> dict:
+        """Totals per stage and per dataset, plus every raw record."""
+        stages: Dict[str, dict] = {}
+        datasets: Dict[str, dict] = {}
+        for record in self.records:
+            totals = [stages.setdefault(record.stage, _totals())]
+            if record.dataset is not None:
+                dataset = datasets.setdefault(record.dataset, {**_totals(), "stages": {}})
+                totals += [dataset, dataset["stages"].setdefault(record.stage, _totals())]
+            for bucket in totals:
+                bucket["calls"] += 1
+                bucket["wall_s"] += record.wall_s
+                bucket["cpu_s"] += record.cpu_s
+                bucket["peak_rss_kb"] = max(bucket["peak_rss_kb"], record.peak_rss_kb)
+                for name, value in record.counts.items():
+                    bucket["counts"][name] = bucket["counts"].get(name, 0) + value
+        slowest = max(datasets, key=lambda slug: datasets[slug]["wall_s"], default=None)
+        return {
+            **extra,
+            "wall_s": wall_s,
+            "cpu_s": cpu_s,
+            "peak_rss_kb": max((record.peak_rss_kb for record in self.records), default=0),
+            "stages": dict(sorted(stages.items(), key=lambda item: -item[1]["wall_s"])),
+            "datasets": datasets,
+            "slowest_dataset": slowest,
+            "records": [asdict(record) for record in self.records],
+        }
+
+
+def _totals() -> dict:
+    return {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_kb": 0, "counts": {}}
+
+
+def summary_line(report: dict) -> str:
+    """One line for the build log: totals, the costliest stages and the slowest dataset."""
+    datasets = report["datasets"]
+    rows = sum(entry["counts"].get("rows", 0) for entry in datasets.values())
+    figures = sum(entry["counts"].get("figures", 0) for entry in report["stages"].values())
+    line = (
+        f"profile: {len(datasets)} dataset(s), {rows} rows, {figures} figure(s) in "
+        f"{report['wall_s']:.2f} s wall / {report['cpu_s']:.2f} s CPU, "
+        f"peak {report['peak_rss_kb'] / 1024:.0f} MiB"
+    )
+    top = list(report["stages"].items())[:SUMMARY_STAGES]
+    if top:
+        line += "; " + ", ".join(f"{name} {entry['wall_s']:.2f} s" for name, entry in top)
+    slowest = report["slowest_dataset"]
+    if slowest is not None:
+        line += f"; slowest {slowest} {datasets[slowest]['wall_s']:.2f} s"
+    return line
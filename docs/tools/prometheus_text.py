@@ -0,0 +1,397 @@
+"""Single-pass reader for Prometheus text exposition snapshots of `/metrics`.
+
+`MetricsController::index()` renders the registry with `RenderTextFormat`, so a
+saved scrape contains `# HELP`/`# TYPE` comments followed by one sample per
+line::
+
+    # TYPE bamboo_http_request_duration_seconds histogram
+    bamboo_http_request_duration_seconds_bucket{method="GET",route="/",status="200",le="0.05"} 1523
+
+`parse_snapshot` streams those lines once, optionally skipping every family that
+does not start with a prefix, and keeps the samples keyed by name and sorted
+label pairs. Two snapshots taken around a benchmark window can then be
+diffed: counters become per-series rates (reset-aware), and histogram bucket
+deltas are turned into quantiles with the same interpolation as PromQL's
+`histogram_quantile()`.
+
+`bin/bench/http --server-metrics` stores such a pair of scrapes for every run in
+a `<dataset>.server.jsonl` sidecar; `merge_server_files` turns them into one
+server-side latency histogram per concurrency level.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_SAMPLE = re.compile(
+    r"^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)"
+    r"(?:\{(?P<labels>.*)\})?"
+    r"\s+(?P<value>\S+)"
+    r"(?:\s+-?\d+)?\s*$"
+)
+_LABEL = re.compile(r'\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*"((?:[^"\\]|\\.)*)"\s*,?')
+_ESCAPES = {"\\\\": "\\", '\\"': '"', "\\n": "\n"}
+_HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+
+
+@dataclass
+class MetricFamily:
+    name: str
+    type: str = "untyped"
+    help: str = ""
+    samples: Dict[Tuple[str, Labels], float] = field(default_factory=dict)
+
+
+@dataclass
+class Snapshot:
+    families: Dict[str, MetricFamily] = field(default_factory=dict)
+
+    def family(self, name: str) -> MetricFamily | None:
+        return self.families.get(name)
+
+
+def _unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return re.sub(r'\\[\\"n]', lambda match: _ESCAPES[match.group(0)], value)
+
+
+def parse_labels(text: str | None) -> Labels:
+    if not text:
+        return ()
+    return tuple(sorted((name, _unescape(value)) for name, value in _LABEL.findall(text)))
+
+
+def parse_snapshot(lines: Iterable[str], *, prefix: str | None = None) -> Snapshot:
+    """Parse exposition text in one pass, keeping only families starting with `prefix`."""
+    snapshot = Snapshot()
+    families = snapshot.families
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        if line[0] == "#":
+            parts = line.split(None, 3)
+            if len(parts) >= 3 and parts[1] in ("TYPE", "HELP"):
+                name = parts[2]
+                if prefix and not name.startswith(prefix):
+                    continue
+                family = families.setdefault(name, MetricFamily(name))
+                if parts[1] == "TYPE":
+                    family.type = parts[3].strip() if len(parts) > 3 else "untyped"
+                else:
+                    family.help = parts[3] if len(parts) > 3 else ""
+            continue
+        if prefix and not line.startswith(prefix):
+            continue
+        match = _SAMPLE.match(line)
+        if match is None:
+            raise ValueError(f"Malformed exposition line: {line[:120]}")
+        sample_name = match.group("name")
+        family_name = sample_name
+        for suffix in _HISTOGRAM_SUFFIXES:
+            if sample_name.endswith(suffix):
+                base = sample_name[: -len(suffix)]
+                if base in families and families[base].type in ("histogram", "summary"):
+                    family_name = base
+                break
+        family = families.get(family_name)
+        if family is None:
+            family = families[family_name] = MetricFamily(family_name)
+        family.samples[(sample_name, parse_labels(match.group("labels")))] = float(
+            match.group("value")
+        )
+    return snapshot
+
+
+def read_snapshot(path: Path, *, prefix: str | None = None) -> Snapshot:
+    with path.open("r", encoding="utf-8") as handle:
+        return parse_snapshot(handle, prefix=prefix)
+
+
+def counter_delta(before: float | None, after: float) -> float:
+    """Increase of a counter between two scrapes; a drop means the counter reset."""
+    if before is None or after < before:
+        return after
+    return after - before
+
+
+def histogram_quantile(quantile: float, buckets: Sequence[Tuple[float, float]]) -> float:
+    """Estimate a quantile from cumulative `(upper_bound, count)` buckets.
+
+    Mirrors PromQL: linear interpolation inside the bucket holding the rank,
+    the lower bound of the first bucket is 0, and a rank that falls into the
+    `+Inf` bucket returns the highest finite upper bound.
+    """
+    if quantile < 0:
+        return -math.inf
+    if quantile > 1:
+        return math.inf
+    ordered = sorted(buckets)
+    if len(ordered) < 2 or not math.isinf(ordered[-1][0]):
+        return math.nan
+    # Enforce monotonic cumulative counts (scrapes are not atomic).
+    monotonic: List[Tuple[float, float]] = []
+    highest = 0.0
+    for upper, count in ordered:
+        highest = max(highest, count)
+        monotonic.append((upper, highest))
+    observations = monotonic[-1][1]
+    if observations <= 0:
+        return math.nan
+    rank = quantile * observations
+    index = next(position for position, (_, count) in enumerate(monotonic) if count >= rank)
+    if index == len(monotonic) - 1:
+        return monotonic[-2][0]
+    upper, count = monotonic[index]
+    if index == 0 and upper <= 0:
+        return upper
+    lower = 0.0
+    if index > 0:
+        lower, previous = monotonic[index - 1]
+        count -= previous
+        rank -= previous
+    if count <= 0:
+        return upper
+    return lower + (upper - lower) * (rank / count)
+
+
+@dataclass
+class HistogramDelta:
+    """Bucket, sum and count increases for one (aggregated) histogram series."""
+
+    buckets: Dict[float, float] = field(default_factory=dict)
+    total: float = 0.0
+    count: float = 0.0
+
+    def quantile(self, quantile: float) -> float:
+        return histogram_quantile(quantile, list(self.buckets.items()))
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def merge(self, other: "HistogramDelta") -> "HistogramDelta":
+        for upper, count in other.buckets.items():
+            self.buckets[upper] = self.buckets.get(upper, 0.0) + count
+        self.total += other.total
+        self.count += other.count
+        return self
+
+
+def _group(labels: Labels, by: Sequence[str]) -> Labels:
+    lookup = dict(labels)
+    return tuple((name, lookup.get(name, "")) for name in by)
+
+
+def counter_deltas(
+    before: Snapshot, after: Snapshot, name: str, by: Sequence[str]
+) -> Dict[Labels, float]:
+    """Per-group counter increases for family `name`."""
+    family = after.family(name)
+    if family is None:
+        return {}
+    previous = before.family(name)
+    old = previous.samples if previous else {}
+    deltas: Dict[Labels, float] = {}
+    for key, value in family.samples.items():
+        group = _group(key[1], by)
+        deltas[group] = deltas.get(group, 0.0) + counter_delta(old.get(key), value)
+    return deltas
+
+
+def histogram_deltas(
+    before: Snapshot, after: Snapshot, name: str, by: Sequence[str]
+) -> Dict[Labels, HistogramDelta]:
+    """Per-group bucket increases of histogram family `name` between two scrapes."""
+    family = after.family(name)
+    if family is None:
+        return {}
+    previous = before.family(name)
+    old = previous.samples if previous else {}
+    # A series whose _count went down was reset; use its raw values.
+    reset: set[Labels] = set()
+    for (sample, labels), value in family.samples.items():
+        if sample == f"{name}_count" and value < old.get((sample, labels), 0.0):
+            reset.add(labels)
+    deltas: Dict[Labels, HistogramDelta] = {}
+    for (sample, labels), value in family.samples.items():
+        series = tuple(pair for pair in labels if pair[0] != "le")
+        base = None if series in reset else old.get((sample, labels), 0.0)
+        increase = counter_delta(base, value)
+        delta = deltas.setdefault(_group(series, by), HistogramDelta())
+        if sample == f"{name}_bucket":
+            upper = float(dict(labels).get("le", "+Inf"))
+            delta.buckets[upper] = delta.buckets.get(upper, 0.0) + increase
+        elif sample == f"{name}_sum":
+            delta.total += increase
+        elif sample == f"{name}_count":
+            delta.count += increase
+    return deltas
+
+
+def summarize_http(
+    before: Snapshot,
+    after: Snapshot,
+    elapsed: float,
+    *,
+    namespace: str = "bamboo",
+    quantiles: Sequence[float] = (0.5, 0.95, 0.99),
+    by: Sequence[str] = ("method", "route", "status"),
+) -> List[dict]:
+    """Request rates and latency quantiles (ms) per group for the HTTP families."""
+    requests = counter_deltas(before, after, f"{namespace}_http_requests_total", by)
+    durations = histogram_deltas(before, after, f"{namespace}_http_request_duration_seconds", by)
+    rows: List[dict] = []
+    for group in sorted(set(requests) | set(durations)):
+        count = requests.get(group, durations[group].count if group in durations else 0.0)
+        if not count:
+            continue
+        row: dict = dict(group)
+        row["requests"] = count
+        row["rate_rps"] = count / elapsed if elapsed > 0 else math.nan
+        delta = durations.get(group)
+        row["mean_ms"] = delta.mean() * 1000.0 if delta else math.nan
+        for quantile in quantiles:
+            value = delta.quantile(quantile) if delta else math.nan
+            row[f"p{quantile * 100:g}_ms"] = value * 1000.0
+        rows.append(row)
+    return rows
+
+
+def summarize_circuit_breakers(
+    before: Snapshot, after: Snapshot, *, namespace: str = "bamboo"
+) -> List[dict]:
+    """Failure/open increases and the final breaker state per method/route."""
+    by = ("method", "route")
+    failures = counter_deltas(before, after, f"{namespace}_http_circuit_breaker_failures_total", by)
+    opens = counter_deltas(before, after, f"{namespace}_http_circuit_breaker_open_total", by)
+    state_family = after.family(f"{namespace}_http_circuit_breaker_state")
+    states: Dict[Labels, float] = {}
+    if state_family is not None:
+        for (_, labels), value in state_family.samples.items():
+            states[_group(labels, by)] = value
+    rows = []
+    for group in sorted(set(failures) | set(opens) | set(states)):
+        row = dict(group)
+        row["failures"] = failures.get(group, 0.0)
+        row["opens"] = opens.get(group, 0.0)
+        row["state"] = states.get(group, math.nan)
+        rows.append(row)
+    return rows
+
+
+def server_metrics_path(csv_path: Path) -> Path:
+    """Sidecar written by `bin/bench/http --csv=... --server-metrics`."""
+    return csv_path.with_suffix(".server.jsonl")
+
+
+def record_delta(record: dict) -> HistogramDelta:
+    """Server-side latency histogram of one harness run.
+
+    Only series with the run's method are kept, and the `/metrics` route is
+    dropped so the scrapes themselves do not count as benchmark traffic.
+    """
+    if record.get("version") != 1:
+        raise ValueError(f"Unsupported server metrics version {record.get('version')!r}")
+    before = parse_snapshot(record.get("before") or [])
+    after = parse_snapshot(record.get("after") or [])
+    name = next(
+        (family for family in after.families if family.endswith("_http_request_duration_seconds")),
+        None,
+    )
+    if name is None:
+        raise ValueError("Scrape has no *_http_request_duration_seconds histogram")
+    path = urlsplit(str(record.get("metrics_url", ""))).path or "/metrics"
+    excluded = {path, f"GET {path}"}
+    method = record.get("method")
+    merged = HistogramDelta()
+    for group, delta in histogram_deltas(before, after, name, ("method", "route")).items():
+        labels = dict(group)
+        if labels["route"] in excluded or (method and labels["method"] != method):
+            continue
+        merged.merge(delta)
+    return merged
+
+
+def merge_server_files(
+    paths: Iterable[Path],
+    *,
+    key: Callable[[dict], object] = lambda record: None,
+) -> Dict[object, HistogramDelta]:
+    """Merge the per-run server histograms from `paths`, grouped by `key(record)`."""
+    merged: Dict[object, HistogramDelta] = {}
+    for path in paths:
+        with path.open("r", encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(
+                        f"Invalid server metrics JSON in {path} line {line_number}: {exc}"
+                    ) from exc
+                delta = record_delta(record)
+                group = key(record)
+                if group in merged:
+                    merged[group].merge(delta)
+                else:
+                    merged[group] = delta
+    return merged
+
+
+def _format(value: float, digits: int = 2) -> str:
+    return "n/a" if math.isnan(value) else f"{value:.{digits}f}"
+
+
+def render_markdown(
+    rows: Sequence[dict],
+    breakers: Sequence[dict],
+    *,
+    quantiles: Sequence[float],
+    elapsed: float,
+) -> str:
+    keys = [f"p{quantile * 100:g}_ms" for quantile in quantiles]
+    lines = [
+        "## Server-side metrics",
+        "",
+        f"Deltas between two `/metrics` scrapes {elapsed:.1f} s apart.",
+        "",
+        "| Method | Route | Status | Requests | Req/s | Mean ms | "
+        + " | ".join(f"p{quantile * 100:g} ms" for quantile in quantiles)
+        + " |",
+        "| --- | --- | --- | ---: | ---: | ---: |" + " ---: |" * len(keys),
+    ]
+    for row in rows:
+        cells = [
+            row.get("method", ""),
+            row.get("route", ""),
+            row.get("status", ""),
+            f"{row['requests']:.0f}",
+            _format(row["rate_rps"], 1),
+            _format(row["mean_ms"]),
+            *(_format(row[key]) for key in keys),
+        ]
+        lines.append("| " + " | ".join(cells) + " |")
+    if breakers:
+        lines += [
+            "",
+            "| Method | Route | Breaker failures | Opens | State |",
+            "| --- | --- | ---: | ---: | --- |",
+        ]
+        states = {0.0: "closed", 1.0: "half-open", 2.0: "open"}
+        for row in breakers:
+            lines.append(
+                f"| {row['method']} | {row['route']} | {row['failures']:.0f} "
+                f"| {row['opens']:.0f} | {states.get(row['state'], 'n/a')} |"
+            )
+    lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,481 @@
+"""Persistent SQLite index of benchmark runs for `plot-bench.py query`.
+
+Every CSV (or `.bba` archive) row becomes one `runs` row keyed on the resolved CSV path and its
+line number. A row holds the scenario, target, method, concurrency, throughput,
+percentile and error columns (`RUN_COLUMNS`). The `metadata` table holds the
+key/value pairs of the dataset's `.meta.json` sidecar (commit, php_version,
+openswoole_version...). `files` records how much of each CSV is indexed.
+
+`refresh` is incremental:
+
+* files whose size and mtime are unchanged are skipped after a `stat`;
+* the harness only appends rows, so a grown file with the same header and
+  unchanged bytes just before the indexed offset only has its new rows
+  inserted;
+* anything else (truncation, a rewritten header or body) replaces the file's
+  rows, and files that disappeared from disk are dropped;
+* sidecars are re-read only when their own size or mtime changes.
+
+`recorded_on` is the dataset date used by `since` filters: the `date` metadata
+key, else the `YYYYMMDD-` file name prefix, else the CSV modification date.
+
+Filters are `FIELD OP VALUE` strings such as `scenario=baseline*`,
+`php_version=8.4*` or `concurrency>=64`. `FIELD` is a `RUN_COLUMNS` entry,
+`path`, `recorded_on` or any metadata key. With `=` and `!=`, a value containing
+`*`, `?` or `[` is matched as a glob.
+
+The index is shared by every path it was ever refreshed from; pass `paths` to
+`query` to only return runs of files under those paths.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import os
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from bench_archive import ARCHIVE_SUFFIX, Archive, text_columns
+
+# Table layout version; databases written by another version are rebuilt.
+INDEX_VERSION = 1
+
+# Bytes before the indexed offset that must be unchanged to append rows.
+GUARD_BYTES = 4096
+
+# Percentiles kept per run (`p50_ms`..., or `latency_p50`... in legacy CSVs).
+PERCENTILES = ("p50", "p90", "p95", "p99", "p999")
+
+# Indexed CSV columns and their SQLite types, in table order.
+RUN_COLUMNS: Dict[str, str] = {
+    "scenario": "TEXT",
+    "target": "TEXT",
+    "method": "TEXT",
+    "concurrency": "INTEGER",
+    "duration_seconds": "REAL",
+    "requests": "INTEGER",
+    "requests_per_second": "REAL",
+    **{f"{name}_ms": "REAL" for name in PERCENTILES},
+    "error_count": "INTEGER",
+    "error_rate": "REAL",
+}
+
+# Columns a CSV must have to be indexed.
+REQUIRED_COLUMNS = ("concurrency", "requests_per_second")
+
+# Legacy chart schema names of `RUN_COLUMNS` entries.
+_ALIASES = {
+    "rps": "requests_per_second",
+    **{f"latency_{name}": f"{name}_ms" for name in PERCENTILES},
+}
+
+_SCHEMA = f"""
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    header TEXT NOT NULL,
+    indexed_bytes INTEGER NOT NULL,
+    guard TEXT NOT NULL,
+    next_line INTEGER NOT NULL,
+    meta_size INTEGER,
+    meta_mtime_ns INTEGER,
+    recorded_on TEXT NOT NULL
+);
+CREATE TABLE runs (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    line INTEGER NOT NULL,
+    {", ".join(f"{name} {kind}" for name, kind in RUN_COLUMNS.items())},
+    PRIMARY KEY (path, line)
+) WITHOUT ROWID;
+CREATE TABLE metadata (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (path, key)
+) WITHOUT ROWID;
+CREATE INDEX runs_scenario ON runs (scenario, concurrency);
+CREATE INDEX runs_concurrency ON runs (concurrency);
+CREATE INDEX metadata_value ON metadata (key, value);
+PRAGMA user_version = {INDEX_VERSION};
+"""
+
+_INSERT_RUN = (
+    f"INSERT INTO runs (path, line, {', '.join(RUN_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(RUN_COLUMNS) + 2))})"
+)
+
+_UPSERT_FILE = """
+INSERT INTO files (path, size, mtime_ns, header, indexed_bytes, guard, next_line,
+                   meta_size, meta_mtime_ns, recorded_on)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (path) DO UPDATE SET
+    size = excluded.size, mtime_ns = excluded.mtime_ns, header = excluded.header,
+    indexed_bytes = excluded.indexed_bytes, guard = excluded.guard,
+    next_line = excluded.next_line, meta_size = excluded.meta_size,
+    meta_mtime_ns = excluded.meta_mtime_ns, recorded_on = excluded.recorded_on
+"""
+
+_CONDITION = re.compile(r"^\s*([A-Za-z_][\w.-]*)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$")
+_DATE_PREFIX = re.compile(r"^(\d{4})(\d{2})(\d{2})(?:\D|$)")
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+
+@dataclass
+class RefreshStats:
+    """What one `refresh` call changed."""
+
+    added: int = 0
+    appended: int = 0
+    replaced: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    rows: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.added} added, {self.appended} appended, {self.replaced} replaced, "
+            f"{self.unchanged} unchanged, {self.removed} removed, {self.rows} row(s) inserted"
+        )
+
+
+def open_index(path: Path) -> sqlite3.Connection:
+    """Open (creating or rebuilding if needed) the index database at `path`."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+    if connection.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+        connection.executescript(
+            "DROP TABLE IF EXISTS runs; DROP TABLE IF EXISTS metadata; "
+            "DROP TABLE IF EXISTS files;" + _SCHEMA
+        )
+    return connection
+
+
+def normalize_date(value: str) -> str:
+    """`YYYY-MM-DD` for an ISO date/timestamp or a `YYYYMMDD` string."""
+    text = value.strip()
+    match = _DATE_PREFIX.match(text)
+    try:
+        if match:
+            return date(*map(int, match.groups())).isoformat()
+        return datetime.fromisoformat(text[:10]).date().isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r} (expected YYYY-MM-DD or YYYYMMDD)") from None
+
+
+def _recorded_on(csv_path: Path, metadata: Dict[str, str], mtime_ns: int) -> str:
+    if metadata.get("date"):
+        try:
+            return normalize_date(metadata["date"])
+        except ValueError:
+            pass
+    match = _DATE_PREFIX.match(csv_path.name)
+    if match:
+        try:
+            return date(*map(int, match.groups())).isoformat()
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(mtime_ns / 1e9).date().isoformat()
+
+
+def _guard(handle, header_bytes: int, offset: int) -> str:
+    start = max(header_bytes, offset - GUARD_BYTES)
+    handle.seek(start)
+    return hashlib.sha256(handle.read(offset - start)).hexdigest()
+
+
+def _convert(kind: str, raw: str):
+    raw = raw.strip()
+    if not raw:
+        return None
+    if kind == "TEXT":
+        return raw
+    try:
+        number = float(raw)
+    except ValueError:
+        return None
+    if number != number:
+        return None
+    return int(number) if kind == "INTEGER" else number
+
+
+def _header_columns(header: str) -> Dict[str, int]:
+    fieldnames = next(csv.reader([header]), None)
+    if not fieldnames:
+        raise ValueError("CSV file is missing a header row")
+    positions: Dict[str, int] = {}
+    # Canonical names win over their legacy aliases.
+    for index, name in enumerate(fieldnames):
+        name = name.strip()
+        if name in RUN_COLUMNS:
+            positions[name] = index
+    for index, name in enumerate(fieldnames):
+        canonical = _ALIASES.get(name.strip())
+        if canonical is not None:
+            positions.setdefault(canonical, index)
+    for name in REQUIRED_COLUMNS:
+        if name not in positions:
+            raise ValueError(f"Required column {name!r} missing from CSV")
+    return positions
+
+
+def _parse_rows(
+    records: Iterable[Sequence[str]], positions: Dict[str, int], path: str, first_line: int
+) -> List[tuple]:
+    layout = [(positions.get(name), kind, name) for name, kind in RUN_COLUMNS.items()]
+    rows = []
+    for line, record in enumerate(records, start=first_line):
+        if not record:
+            continue
+        values = [path, line]
+        for position, kind, name in layout:
+            raw = record[position] if position is not None and position < len(record) else ""
+            value = _convert(kind, raw)
+            if value is None and name in REQUIRED_COLUMNS:
+                raise ValueError(f"Invalid {name} value {raw!r} at line {line}")
+            values.append(value)
+        rows.append(tuple(values))
+    return rows
+
+
+def _read_csv(csv_path: Path, path: str, previous) -> Tuple[bool, tuple, List[tuple]]:
+    """Parse the rows not yet indexed; returns (appending, file state, rows)."""
+    if csv_path.suffix == ARCHIVE_SUFFIX:
+        # Archives are written in one go: always re-indexed as a whole.
+        with Archive(csv_path) as archive:
+            header = ",".join(archive.fieldnames)
+            records = list(zip(*text_columns(archive)))
+        rows = _parse_rows(records, _header_columns(header), path, 2)
+        return False, (header, csv_path.stat().st_size, "", 2 + len(records)), rows
+    with csv_path.open("rb") as handle:
+        header_bytes = handle.readline()
+        header = header_bytes.decode("utf-8")
+        positions = _header_columns(header)
+        size = os.fstat(handle.fileno()).st_size
+        start, first_line = len(header_bytes), 2
+        appending = (
+            previous is not None
+            and previous["header"] == header
+            and previous["indexed_bytes"] <= size
+            and _guard(handle, start, previous["indexed_bytes"]) == previous["guard"]
+        )
+        if appending:
+            start, first_line = previous["indexed_bytes"], previous["next_line"]
+        handle.seek(start)
+        payload = handle.read(size - start)
+        # A trailing partial row (the harness is mid-write) is left for next time.
+        boundary = payload.rfind(b"\n") + 1
+        indexed_bytes = start + boundary
+        guard = _guard(handle, len(header_bytes), indexed_bytes)
+    records = csv.reader(io.StringIO(payload[:boundary].decode("utf-8"), newline=""))
+    rows = _parse_rows(records, positions, path, first_line)
+    next_line = first_line + payload[:boundary].count(b"\n")
+    return appending, (header, indexed_bytes, guard, next_line), rows
+
+
+def refresh(
+    connection: sqlite3.Connection,
+    csv_files: Sequence[Path],
+    *,
+    metadata_file: Callable[[Path], Path | None],
+    load_metadata: Callable[[Path], Dict[str, str]],
+) -> RefreshStats:
+    """Bring the index up to date with `csv_files` (see the module docstring).
+
+    `metadata_file` locates a dataset's sidecar and `load_metadata` parses it.
+    Invalid files are reported in `RefreshStats.errors` and keep their previous
+    rows, if any.
+    """
+    stats = RefreshStats()
+    known = {row["path"]: row for row in connection.execute("SELECT * FROM files")}
+    seen = set()
+    with connection:
+        for csv_path in csv_files:
+            path = str(csv_path.resolve())
+            seen.add(path)
+            previous = known.get(path)
+            try:
+                stat = csv_path.stat()
+                sidecar = metadata_file(csv_path)
+                meta_stat = sidecar.stat() if sidecar is not None else None
+                meta_signature = (
+                    (meta_stat.st_size, meta_stat.st_mtime_ns) if meta_stat else (None, None)
+                )
+                csv_changed = previous is None or (previous["size"], previous["mtime_ns"]) != (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                )
+                meta_changed = (
+                    previous is None
+                    or (previous["meta_size"], previous["meta_mtime_ns"]) != meta_signature
+                )
+                if not csv_changed and not meta_changed:
+                    stats.unchanged += 1
+                    continue
+                # Archives carry their own metadata block.
+                archived = csv_path.suffix == ARCHIVE_SUFFIX
+                metadata = load_metadata(csv_path) if meta_changed or archived else None
+                if csv_changed:
+                    appending, state, rows = _read_csv(csv_path, path, previous)
+                else:
+                    appending, rows = True, []
+                    state = tuple(
+                        previous[key] for key in ("header", "indexed_bytes", "guard", "next_line")
+                    )
+            except (OSError, UnicodeDecodeError, ValueError) as exc:
+                stats.errors.append(f"{csv_path}: {exc}")
+                continue
+
+            if metadata is None:
+                recorded_on = previous["recorded_on"]
+            else:
+                recorded_on = _recorded_on(csv_path, metadata, stat.st_mtime_ns)
+            connection.execute(
+                _UPSERT_FILE,
+                (path, stat.st_size, stat.st_mtime_ns, *state, *meta_signature, recorded_on),
+            )
+            if metadata is not None:
+                connection.execute("DELETE FROM metadata WHERE path = ?", (path,))
+                connection.executemany(
+                    "INSERT INTO metadata (path, key, value) VALUES (?, ?, ?)",
+                    [(path, key, value) for key, value in metadata.items()],
+                )
+            if not appending:
+                connection.execute("DELETE FROM runs WHERE path = ?", (path,))
+            connection.executemany(_INSERT_RUN, rows)
+            stats.rows += len(rows)
+            if previous is None:
+                stats.added += 1
+            elif not csv_changed:
+                stats.unchanged += 1
+            elif appending:
+                stats.appended += 1
+            else:
+                stats.replaced += 1
+
+        for path in known.keys() - seen:
+            if not Path(path).exists():
+                connection.execute("DELETE FROM files WHERE path = ?", (path,))
+                stats.removed += 1
+    return stats
+
+
+def parse_condition(text: str) -> Tuple[str, str, str]:
+    """Split `FIELD OP VALUE` (e.g. `concurrency>=64`) into its parts."""
+    match = _CONDITION.match(text)
+    if match is None:
+        raise ValueError(f"Invalid filter {text!r} (expected FIELD=VALUE, FIELD>=VALUE, ...)")
+    return match.group(1), match.group(2), match.group(3)
+
+
+def _comparison(column: str, op: str, value, params: List) -> str:
+    if op in ("=", "!=") and isinstance(value, str) and _GLOB_CHARS.search(value):
+        op = "GLOB" if op == "=" else "NOT GLOB"
+    params.append(value)
+    return f"{column} {op} ?"
+
+
+def _scope(paths: Sequence[Path], recursive: bool, params: List) -> str:
+    """Clause keeping files that are one of `paths` or lie in one of them."""
+    alternatives = []
+    for path in paths:
+        resolved = str(path.resolve())
+        if not path.is_dir():
+            alternatives.append("files.path = ?")
+            params.append(resolved)
+            continue
+        prefix = resolved.rstrip(os.sep) + os.sep
+        # Prefix comparison rather than GLOB: directory names may hold `*` or `[`.
+        clause = "substr(files.path, 1, ?) = ?"
+        params.extend([len(prefix), prefix])
+        if not recursive:
+            clause += " AND instr(substr(files.path, ?), ?) = 0"
+            params.extend([len(prefix) + 1, os.sep])
+        alternatives.append(f"({clause})")
+    return f"({' OR '.join(alternatives)})" if alternatives else "0"
+
+
+def query(
+    connection: sqlite3.Connection,
+    conditions: Sequence[str] = (),
+    *,
+    since: str | None = None,
+    since_commit: str | None = None,
+    paths: Sequence[Path] | None = None,
+    recursive: bool = True,
+) -> List[dict]:
+    """Runs matching every condition, oldest dataset first.
+
+    `since` keeps datasets recorded on or after a date; `since_commit` on or
+    after the earliest dataset whose `commit` metadata starts with that hash.
+    `paths` keeps runs of those files, or of files in those directories (only
+    their top level unless `recursive`); `None` searches the whole index.
+    """
+    clauses: List[str] = []
+    params: List = []
+    if paths is not None:
+        clauses.append(_scope(paths, recursive, params))
+    for text in conditions:
+        name, op, value = parse_condition(text)
+        if name in RUN_COLUMNS:
+            kind = RUN_COLUMNS[name]
+            converted = value
+            if kind != "TEXT" and not _GLOB_CHARS.search(value):
+                converted = _convert(kind, value)
+            if converted is None:
+                raise ValueError(f"Filter {text!r} needs a numeric value")
+            clauses.append(_comparison(f"runs.{name}", op, converted, params))
+        elif name in ("path", "recorded_on"):
+            clauses.append(_comparison(f"files.{name}", op, value, params))
+        else:
+            # Datasets without the key never match, whatever the operator.
+            params.append(name)
+            match = _comparison("value", op, value, params)
+            clauses.append(
+                "EXISTS (SELECT 1 FROM metadata WHERE metadata.path = runs.path "
+                f"AND key = ? AND {match})"
+            )
+    if since is not None:
+        clauses.append("files.recorded_on >= ?")
+        params.append(normalize_date(since))
+    if since_commit is not None:
+        earliest = connection.execute(
+            "SELECT MIN(files.recorded_on) FROM files JOIN metadata USING (path) "
+            "WHERE metadata.key = 'commit' AND metadata.value GLOB ?",
+            (f"{since_commit}*",),
+        ).fetchone()[0]
+        if earliest is None:
+            raise ValueError(f"No indexed dataset records commit {since_commit!r}")
+        clauses.append("files.recorded_on >= ?")
+        params.append(earliest)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = connection.execute(
+        f"SELECT runs.*, files.recorded_on FROM runs JOIN files USING (path) {where} "
+        "ORDER BY files.recorded_on, runs.path, runs.line",
+        params,
+    )
+    return [dict(row) for row in rows]
+
+
+def metadata_for(connection: sqlite3.Connection, paths: Sequence[str]) -> Dict[str, Dict[str, str]]:
+    """Indexed sidecar metadata of each path in `paths`."""
+    found: Dict[str, Dict[str, str]] = {path: {} for path in paths}
+    wanted = list(found)
+    for start in range(0, len(wanted), 500):
+        chunk = wanted[start : start + 500]
+        rows = connection.execute(
+            f"SELECT path, key, value FROM metadata WHERE path IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        )
+        for row in rows:
+            found[row["path"]][row["key"]] = row["value"]
+    return found
@@ -0,0 +1,349 @@
+"""Dependency-free SVG line charts for `plot-bench.py --backend svg`.
+
+matplotlib is the slowest part of a render and is not installed in the docs
+build. The charts `plot-bench.py` draws are simple (line series with markers,
+shaded bands, vertical markers, a legend and a caption), so this module writes
+them directly as SVG text. A figure is a grid of `Panel`s; each panel scales
+its own axes to the data and picks 1/2/5 x 10^n tick steps.
+
+Usage examples
+--------------
+>>> panel = Panel(title="Throughput", xlabel="Concurrent clients", ylabel="Requests")
+>>> panel.series.append(Series("rps", [16, 32, 64], [2100.0, 2590.5, 2610.1]))
+>>> Path("chart.svg").write_text(render_figure([panel], title="Baseline"), encoding="utf-8")
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from textwrap import wrap
+from typing import List, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# matplotlib's default colour cycle, so both backends draw the same colours.
+PALETTE = (
+    "#1f77b4",
+    "#ff7f0e",
+    "#2ca02c",
+    "#d62728",
+    "#9467bd",
+    "#8c564b",
+    "#e377c2",
+    "#7f7f7f",
+    "#bcbd22",
+    "#17becf",
+)
+
+FONT = "DejaVu Sans, Helvetica, Arial, sans-serif"
+
+# Panel margins in pixels: room for tick labels and axis titles.
+MARGIN_LEFT = 64
+MARGIN_RIGHT = 16
+MARGIN_TOP = 28
+MARGIN_BOTTOM = 44
+
+TITLE_HEIGHT = 32
+CAPTION_LINE_HEIGHT = 14
+CAPTION_WIDTH = 110
+
+
+@dataclass
+class Series:
+    label: str | None
+    xs: Sequence[float]
+    ys: Sequence[float]
+    color: str | None = None
+    dash: str | None = None  # SVG stroke-dasharray, e.g. "6 3"
+    marker: str | None = "circle"  # "circle", "cross" or None
+    width: float = 1.8
+
+
+@dataclass
+class Band:
+    xs: Sequence[float]
+    lower: Sequence[float]
+    upper: Sequence[float]
+    color: str
+    opacity: float = 0.15
+
+
+@dataclass
+class VLine:
+    x: float
+    color: str
+    label: str | None = None
+    dash: str = "2 3"
+
+
+@dataclass
+class Span:
+    start: float
+    stop: float
+    color: str = "#ADB5BD"
+    opacity: float = 0.25
+
+
+@dataclass
+class Point:
+    x: float
+    y: float
+    color: str
+    label: str | None = None
+
+
+@dataclass
+class Panel:
+    title: str = ""
+    xlabel: str = ""
+    ylabel: str = ""
+    series: List[Series] = field(default_factory=list)
+    bands: List[Band] = field(default_factory=list)
+    vlines: List[VLine] = field(default_factory=list)
+    spans: List[Span] = field(default_factory=list)
+    points: List[Point] = field(default_factory=list)
+    legend: bool = True
+
+
+def nice_ticks(low: float, high: float, count: int = 6) -> List[float]:
+    """Round tick values covering [low, high] with a 1, 2 or 5 x 10^n step."""
+    if not math.isfinite(low) or not math.isfinite(high):
+        return [0.0, 1.0]
+    if high <= low:
+        high = low + (abs(low) or 1.0)
+    raw = (high - low) / max(count - 1, 1)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(factor * magnitude for factor in (1, 2, 5, 10) if factor * magnitude >= raw)
+    first = math.floor(low / step) * step
+    ticks = [round(first, 12)]
+    # The last tick is the first one at or above `high`.
+    while ticks[-1] < high - step * 1e-9:
+        ticks.append(round(first + step * len(ticks), 12))
+    return ticks
+
+
+def format_tick(value: float, step: float) -> str:
+    if step >= 1 or value == 0:
+        return f"{value:.0f}"
+    decimals = max(0, -math.floor(math.log10(step)))
+    return f"{value:.{decimals}f}"
+
+
+def _finite(values: Sequence[float]) -> List[float]:
+    return [value for value in values if value is not None and math.isfinite(value)]
+
+
+class _Axes:
+    """Maps data coordinates of one panel onto its pixel box."""
+
+    def __init__(self, panel: Panel, left: float, top: float, width: float, height: float):
+        xs = _finite([x for series in panel.series for x in series.xs])
+        xs += _finite([x for band in panel.bands for x in band.xs])
+        xs += _finite([line.x for line in panel.vlines] + [point.x for point in panel.points])
+        xs += _finite([edge for span in panel.spans for edge in (span.start, span.stop)])
+        ys = _finite([y for series in panel.series for y in series.ys])
+        ys += _finite([y for band in panel.bands for y in (*band.lower, *band.upper)])
+        ys += _finite([point.y for point in panel.points])
+        x_low, x_high = (min(xs), max(xs)) if xs else (0.0, 1.0)
+        y_high = max(ys) if ys else 1.0
+        # A 5% margin on x as in matplotlib; y starts at zero for non-negative
+        # data so that small differences are not magnified.
+        pad = (x_high - x_low) * 0.05 or abs(x_low) * 0.05 or 1.0
+        self.x_low, self.x_high = x_low - pad, x_high + pad
+        self.y_ticks = nice_ticks(min(0.0, min(ys)) if ys else 0.0, y_high)
+        self.y_low, self.y_high = self.y_ticks[0], self.y_ticks[-1]
+        self.x_ticks = [
+            tick
+            for tick in nice_ticks(self.x_low, self.x_high)
+            if self.x_low <= tick <= self.x_high
+        ]
+        self.left, self.top, self.width, self.height = left, top, width, height
+
+    def x(self, value: float) -> float:
+        return self.left + (value - self.x_low) / (self.x_high - self.x_low) * self.width
+
+    def y(self, value: float) -> float:
+        span = (self.y_high - self.y_low) or 1.0
+        return self.top + self.height - (value - self.y_low) / span * self.height
+
+
+def _text(x: float, y: float, text: str, **attrs: object) -> str:
+    # `class_` stands in for the reserved word; other underscores become dashes.
+    extra = "".join(
+        f' {key.rstrip("_").replace("_", "-")}="{value}"' for key, value in attrs.items()
+    )
+    return f'<text x="{x:.1f}" y="{y:.1f}"{extra}>{escape(text)}</text>'
+
+
+def _path(axes: _Axes, xs: Sequence[float], ys: Sequence[float]) -> str:
+    """Polyline path data; non-finite values break the line."""
+    parts, pen_down = [], False
+    for x, y in zip(xs, ys):
+        if x is None or y is None or not (math.isfinite(x) and math.isfinite(y)):
+            pen_down = False
+            continue
+        parts.append(f"{'L' if pen_down else 'M'}{axes.x(x):.1f} {axes.y(y):.1f}")
+        pen_down = True
+    return "".join(parts)
+
+
+def _marker(kind: str, x: float, y: float, color: str) -> str:
+    if kind == "cross":
+        return (
+            f'<path d="M{x - 3:.1f} {y - 3:.1f}L{x + 3:.1f} {y + 3:.1f}'
+            f'M{x - 3:.1f} {y + 3:.1f}L{x + 3:.1f} {y - 3:.1f}" stroke="{color}"/>'
+        )
+    return f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="{color}"/>'
+
+
+def _render_panel(panel: Panel, left: float, top: float, width: float, height: float) -> List[str]:
+    inner_left, inner_top = left + MARGIN_LEFT, top + MARGIN_TOP
+    axes = _Axes(
+        panel,
+        inner_left,
+        inner_top,
+        width - MARGIN_LEFT - MARGIN_RIGHT,
+        height - MARGIN_TOP - MARGIN_BOTTOM,
+    )
+    bottom = inner_top + axes.height
+    right = inner_left + axes.width
+    out = ['<g class="panel">']
+    clip = f"clip{int(left)}x{int(top)}"
+    out.append(
+        f'<clipPath id="{clip}"><rect x="{inner_left:.1f}" y="{inner_top:.1f}" '
+        f'width="{axes.width:.1f}" height="{axes.height:.1f}"/></clipPath>'
+    )
+
+    y_step = axes.y_ticks[1] - axes.y_ticks[0] if len(axes.y_ticks) > 1 else 1.0
+    for tick in axes.y_ticks:
+        y = axes.y(tick)
+        out.append(f'<path d="M{inner_left:.1f} {y:.1f}H{right:.1f}" class="grid"/>')
+        label = format_tick(tick, y_step)
+        out.append(_text(inner_left - 6, y + 3, label, text_anchor="end", class_="tick"))
+    x_step = axes.x_ticks[1] - axes.x_ticks[0] if len(axes.x_ticks) > 1 else 1.0
+    for tick in axes.x_ticks:
+        x = axes.x(tick)
+        out.append(f'<path d="M{x:.1f} {inner_top:.1f}V{bottom:.1f}" class="grid"/>')
+        label = format_tick(tick, x_step)
+        out.append(_text(x, bottom + 14, label, text_anchor="middle", class_="tick"))
+
+    out.append(f'<g clip-path="url(#{clip})">')
+    for span in panel.spans:
+        x0, x1 = axes.x(span.start), axes.x(span.stop)
+        out.append(
+            f'<rect x="{x0:.1f}" y="{inner_top:.1f}" width="{max(x1 - x0, 0.5):.1f}" '
+            f'height="{axes.height:.1f}" fill="{span.color}" fill-opacity="{span.opacity}"/>'
+        )
+    for band in panel.bands:
+        upper = [f"{axes.x(x):.1f},{axes.y(y):.1f}" for x, y in zip(band.xs, band.upper)]
+        lower = [f"{axes.x(x):.1f},{axes.y(y):.1f}" for x, y in zip(band.xs, band.lower)]
+        out.append(
+            f'<polygon points="{" ".join(upper + lower[::-1])}" fill="{band.color}" '
+            f'fill-opacity="{band.opacity}"/>'
+        )
+    for line in panel.vlines:
+        x = axes.x(line.x)
+        out.append(
+            f'<path d="M{x:.1f} {inner_top:.1f}V{bottom:.1f}" stroke="{line.color}" '
+            f'stroke-dasharray="{line.dash}" stroke-width="1.2"/>'
+        )
+        if line.label:
+            out.append(_text(x + 4, bottom - 6, line.label, fill=line.color, class_="note"))
+    legend: List[Tuple[str, str, str | None]] = []
+    for index, series in enumerate(panel.series):
+        color = series.color or PALETTE[index % len(PALETTE)]
+        dash = f' stroke-dasharray="{series.dash}"' if series.dash else ""
+        out.append(
+            f'<path d="{_path(axes, series.xs, series.ys)}" fill="none" stroke="{color}" '
+            f'stroke-width="{series.width}"{dash}/>'
+        )
+        if series.marker:
+            for x, y in zip(series.xs, series.ys):
+                if x is not None and y is not None and math.isfinite(x) and math.isfinite(y):
+                    out.append(_marker(series.marker, axes.x(x), axes.y(y), color))
+        if series.label:
+            legend.append((series.label, color, series.dash))
+    for point in panel.points:
+        x, y = axes.x(point.x), axes.y(point.y)
+        out.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="5" fill="{point.color}"/>')
+        if point.label:
+            out.append(
+                _text(x, y - 9, point.label, text_anchor="middle", fill=point.color, class_="note")
+            )
+    out.append("</g>")
+
+    out.append(
+        f'<rect x="{inner_left:.1f}" y="{inner_top:.1f}" width="{axes.width:.1f}" '
+        f'height="{axes.height:.1f}" fill="none" stroke="#333"/>'
+    )
+    middle = inner_left + axes.width / 2
+    if panel.title:
+        out.append(_text(middle, inner_top - 8, panel.title, text_anchor="middle", class_="title"))
+    if panel.xlabel:
+        out.append(_text(middle, bottom + 32, panel.xlabel, text_anchor="middle"))
+    if panel.ylabel:
+        cx, cy = left + 14, inner_top + axes.height / 2
+        out.append(
+            f'<text x="{cx:.1f}" y="{cy:.1f}" text-anchor="middle" '
+            f'transform="rotate(-90 {cx:.1f} {cy:.1f})">{escape(panel.ylabel)}</text>'
+        )
+    if panel.legend and legend:
+        out.extend(_legend(legend, inner_left + 8, inner_top + 8))
+    out.append("</g>")
+    return out
+
+
+def _legend(entries: Sequence[Tuple[str, str, str | None]], x: float, y: float) -> List[str]:
+    width = 34 + 6.5 * max(len(label) for label, _, _ in entries)
+    out = [
+        f'<rect x="{x:.1f}" y="{y:.1f}" width="{width:.1f}" height="{8 + 16 * len(entries)}" '
+        'fill="#fff" fill-opacity="0.85" stroke="#ccc" rx="3"/>'
+    ]
+    for row, (label, color, dash) in enumerate(entries):
+        line_y = y + 12 + 16 * row
+        dash_attr = f' stroke-dasharray="{dash}"' if dash else ""
+        out.append(
+            f'<path d="M{x + 6:.1f} {line_y:.1f}h20" stroke="{color}" stroke-width="2"{dash_attr}/>'
+        )
+        out.append(_text(x + 30, line_y + 4, label, class_="legend"))
+    return out
+
+
+def render_figure(
+    panels: Sequence[Panel],
+    *,
+    columns: int | None = None,
+    panel_width: int = 600,
+    panel_height: int = 380,
+    title: str = "",
+    caption: str | None = None,
+) -> str:
+    """Lay `panels` out on a grid (one row by default) and return the SVG document."""
+    columns = columns or len(panels)
+    rows = math.ceil(len(panels) / columns)
+    caption_lines = wrap(caption, CAPTION_WIDTH) if caption else []
+    header = TITLE_HEIGHT if title else 0
+    width = panel_width * columns
+    height = header + panel_height * rows + CAPTION_LINE_HEIGHT * len(caption_lines) + 8
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="{FONT}" font-size="11">',
+        "<style>.grid{stroke:#b0b0b0;stroke-dasharray:4 4;stroke-opacity:.6}"
+        ".tick{font-size:10px;fill:#333}.title{font-size:13px}.note{font-size:9px}"
+        ".legend{font-size:10px}</style>",
+        f'<rect width="{width}" height="{height}" fill="#fff"/>',
+    ]
+    if title:
+        out.append(_text(width / 2, 22, title, text_anchor="middle", font_size="15"))
+    for index, panel in enumerate(panels):
+        row, column = divmod(index, columns)
+        out.extend(
+            _render_panel(
+                panel, column * panel_width, header + row * panel_height, panel_width, panel_height
+            )
+        )
+    for line_number, line in enumerate(caption_lines):
+        y = header + panel_height * rows + CAPTION_LINE_HEIGHT * (line_number + 1)
+        out.append(_text(width / 2, y, line, text_anchor="middle", font_size="9"))
+    out.append("</svg>")
+    return "\n".join(out) + "\n"
@@ -0,0 +1,232 @@
+"""Synthetic benchmark datasets for exercising the chart tooling at scale.
+
+Rows look like real harness output: every scenario gets its own Universal
+Scalability Law curve (a `capacity.UslFit` with random λ, σ and κ), so
+throughput rises, flattens and retrogrades with concurrency. Latencies follow
+Little's law (mean = concurrency / throughput) with a widening tail, and errors
+appear past the throughput peak. Each row is one run of a sweep; long files
+repeat the sweep with fresh noise, so concurrency is not sorted.
+
+Both CSV schemas are produced:
+
+* `harness`: `bench_csv.HARNESS_FIELDS`, as `bin/bench/http --csv` writes them.
+* `legacy`: `scenario,concurrency,rps,latency_p50,latency_p90,latency_p99`.
+
+A `<dataset>.meta.json` sidecar with a date, commit and versions can be written
+next to each file. Output only depends on the seed (and on whether NumPy is
+installed, which then draws the noise).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from bench_csv import HARNESS_FIELDS
+from capacity import UslFit
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Bumped whenever the generated bytes change, so cached datasets are rebuilt.
+VERSION = 1
+
+SCHEMAS = ("harness", "legacy")
+
+LEGACY_FIELDS = ("scenario", "concurrency", "rps", "latency_p50", "latency_p90", "latency_p99")
+
+# Concurrency levels of one sweep.
+LEVELS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+# Rows formatted and written per batch; bounds the memory held as strings.
+CHUNK_ROWS = 65536
+
+# First dataset date; corpus files are dated one day apart from here.
+FIRST_DATE = date(2024, 1, 1)
+
+# Columns produced by `_chunk`.
+_COLUMNS = (
+    "concurrency",
+    "duration",
+    "requests",
+    "rps",
+    "p50",
+    "p90",
+    "p95",
+    "p99",
+    "errors",
+    "error_rate",
+)
+
+# Rows are formatted with one template each; none of the labels need quoting.
+_HARNESS_ROW = "%d,%.1f,%d,%.1f,%.2f,%.2f,%.2f,%d,%.4f\n"
+_HARNESS_COLUMNS = (
+    "concurrency", "duration", "requests", "rps", "p50", "p95", "p99", "errors", "error_rate"
+)
+_LEGACY_ROW = "%d,%.1f,%.2f,%.2f,%.2f\n"
+_LEGACY_COLUMNS = ("concurrency", "rps", "p50", "p90", "p99")
+
+_ROUTES = (
+    ("baseline", "/", "GET"),
+    ("json", "/json", "GET"),
+    ("users", "/api/users", "GET"),
+    ("create-user", "/api/users", "POST"),
+    ("metrics", "/metrics", "GET"),
+)
+
+
+def _profile(rng: random.Random) -> dict:
+    """Throughput curve and noise levels of one synthetic scenario."""
+    return {
+        "usl": UslFit(
+            throughput_per_client=rng.uniform(200.0, 3000.0),
+            contention=rng.uniform(0.01, 0.08),
+            coherency=rng.uniform(1e-5, 5e-4),
+            levels=len(LEVELS),
+            r_squared=1.0,
+        ),
+        "noise": rng.uniform(0.01, 0.05),
+        "tail": rng.uniform(1.6, 2.4),
+    }
+
+
+def _chunk(
+    profile: dict, levels: Sequence[int], start: int, count: int, rng: random.Random, seed: int
+) -> Dict[str, list]:
+    """Columns of rows `start` to `start + count` (both schemas take theirs from here)."""
+    curve = [profile["usl"].throughput(level) for level in levels]
+    peak = levels[curve.index(max(curve))]
+    noise, tail = profile["noise"], profile["tail"]
+    if np is not None:
+        generator = np.random.default_rng(seed)
+        positions = np.arange(start, start + count) % len(levels)
+        concurrency = np.asarray(levels)[positions]
+        rps = np.asarray(curve)[positions] * generator.lognormal(0.0, noise, count)
+        spread = generator.lognormal(0.0, noise * 2, count)
+        duration = np.round(60.0 + generator.random(count), 1)
+        # Little's law gives the mean; the median sits a little below it.
+        median = 850.0 * concurrency / rps
+        overload = np.minimum(0.5, 0.002 * (concurrency / peak - 1) * spread)
+        requests = np.rint(rps * duration)
+        errors = np.rint(requests * np.where(concurrency > peak, overload, 0.0))
+        columns = {
+            "concurrency": concurrency,
+            "duration": duration,
+            "requests": requests.astype(np.int64),
+            "rps": rps,
+            "p50": median,
+            "p90": median * (1 + (tail - 1) * 0.6 * spread),
+            "p95": median * tail * spread,
+            "p99": median * tail * tail * spread,
+            "errors": errors.astype(np.int64),
+            "error_rate": np.divide(errors, requests, out=np.zeros(count), where=requests > 0),
+        }
+        return {name: values.tolist() for name, values in columns.items()}
+    columns: Dict[str, list] = {name: [] for name in _COLUMNS}
+    for index in range(start, start + count):
+        level = levels[index % len(levels)]
+        rps = curve[index % len(levels)] * rng.lognormvariate(0.0, noise)
+        spread = rng.lognormvariate(0.0, noise * 2)
+        duration = round(60.0 + rng.random(), 1)
+        median = 850.0 * level / rps
+        requests = round(rps * duration)
+        overload = min(0.5, 0.002 * (level / peak - 1) * spread) if level > peak else 0.0
+        errors = round(requests * overload)
+        row = (
+            level,
+            duration,
+            requests,
+            rps,
+            median,
+            median * (1 + (tail - 1) * 0.6 * spread),
+            median * tail * spread,
+            median * tail * tail * spread,
+            errors,
+            errors / requests if requests else 0.0,
+        )
+        for name, value in zip(_COLUMNS, row):
+            columns[name].append(value)
+    return columns
+
+
+def generate_csv(
+    path: Path,
+    rows: int,
+    *,
+    schema: str = "harness",
+    seed: int = 0,
+    levels: Sequence[int] = LEVELS,
+) -> int:
+    """Write `rows` synthetic runs of one scenario to `path`; returns the bytes written."""
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown schema {schema!r}; expected one of {', '.join(SCHEMAS)}")
+    rng = random.Random(seed)
+    name, route, method = _ROUTES[seed % len(_ROUTES)]
+    scenario = f"{name}-{seed}"
+    if schema == "harness":
+        header, names = HARNESS_FIELDS, _HARNESS_COLUMNS
+        template = f"{scenario},http://127.0.0.1:9501{route},{method}," + _HARNESS_ROW
+    else:
+        header, names = LEGACY_FIELDS, _LEGACY_COLUMNS
+        template = f"{scenario}," + _LEGACY_ROW
+    profile = _profile(rng)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        handle.write(",".join(header) + "\n")
+        for start in range(0, rows, CHUNK_ROWS):
+            count = min(CHUNK_ROWS, rows - start)
+            columns = _chunk(profile, levels, start, count, rng, seed * 7919 + start)
+            handle.write("".join(template % row for row in zip(*map(columns.get, names))))
+        return handle.tell()
+
+
+def write_metadata(csv_path: Path, *, seed: int = 0, recorded_on: date = FIRST_DATE) -> Path:
+    """`<dataset>.meta.json` with the keys real runs record."""
+    rng = random.Random(seed)
+    metadata = {
+        "date": recorded_on.isoformat(),
+        "commit": f"{rng.getrandbits(160):040x}",
+        "php_version": f"8.{rng.choice((2, 3, 4))}.{rng.randrange(30)}",
+        "openswoole_version": f"22.1.{rng.randrange(3)}",
+        "hardware": "synthetic",
+        "os": "Linux",
+        "notes": f"Synthetic dataset (seed {seed}).",
+    }
+    path = csv_path.with_suffix(".meta.json")
+    path.write_text(json.dumps(metadata, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def generate_corpus(
+    directory: Path,
+    files: int,
+    rows: int,
+    *,
+    schema: str = "mixed",
+    seed: int = 0,
+    metadata: bool = True,
+) -> List[Path]:
+    """Write `files` datasets of `rows` runs each, dated one day apart.
+
+    `schema="mixed"` alternates the harness and legacy schemas.
+    """
+    width = max(1, int(math.log10(max(files, 1))) + 1)
+    paths = []
+    for index in range(files):
+        file_schema = SCHEMAS[index % 2] if schema == "mixed" else schema
+        recorded_on = FIRST_DATE + timedelta(days=index)
+        file_seed = seed + index
+        route = _ROUTES[file_seed % len(_ROUTES)][0]
+        name = f"{recorded_on:%Y%m%d}-{route}-{index:0{width}d}.csv"
+        path = directory / name
+        generate_csv(path, rows, schema=file_schema, seed=file_seed)
+        if metadata:
+            write_metadata(path, seed=file_seed, recorded_on=recorded_on)
+        paths.append(path)
+    return paths
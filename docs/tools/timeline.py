@@ -0,0 +1,177 @@
+"""Read the per-interval timelines written by `bin/bench/http --timeline`.
+
+Each line of a `*.timeline.jsonl` file summarises one interval of one run::
+
+    {"version": 1, "run": "9f86d081", "scenario": "soak-1.0", "concurrency": 64,
+     "phase": "measure", "at": 1717000123.0, "seconds": 1.0, "requests": 2612,
+     "errors": 0, "p50_ms": 18.2, "p95_ms": 24.1, "p99_ms": 36.9, "max_ms": 81.4}
+
+`at` is the Unix time at which the interval ended and `phase` is `warmup` or
+`measure`. Lines of concurrent runs may interleave; they are grouped by `run`.
+
+Hour-long soak tests produce far more intervals than a chart has pixels, so
+series are reduced with Largest-Triangle-Three-Buckets (`lttb`) before they are
+plotted: the points are split into equal buckets and each bucket keeps the
+point that spans the largest triangle with its neighbours. Unlike averaging,
+this keeps isolated spikes such as a GC pause or a recycled worker visible.
+"""
+
+from __future__ import annotations
+
+import json
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Per-interval series of a run, in the order they are charted.
+SERIES = ("rps", "errors", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+
+
+@dataclass
+class TimelineRun:
+    """Interval columns of one harness run, in recording order."""
+
+    run: str
+    scenario: str
+    concurrency: int
+    at: array = field(default_factory=lambda: array("d"))
+    seconds: array = field(default_factory=lambda: array("d"))
+    warmup: array = field(default_factory=lambda: array("b"))
+    series: Dict[str, array] = field(
+        default_factory=lambda: {name: array("d") for name in SERIES}
+    )
+
+    def __len__(self) -> int:
+        return len(self.at)
+
+    def extend(self, records: Sequence[dict]) -> None:
+        """Append intervals column by column (much faster than row by row)."""
+        seconds = [float(record.get("seconds") or 0.0) for record in records]
+        requests = [int(record.get("requests") or 0) for record in records]
+        self.at.extend(array("d", [float(record["at"]) for record in records]))
+        self.seconds.extend(array("d", seconds))
+        self.warmup.extend(array("b", [record.get("phase") == "warmup" for record in records]))
+        rates = [count / span if span > 0 else 0.0 for count, span in zip(requests, seconds)]
+        self.series["rps"].extend(array("d", rates))
+        self.series["errors"].extend(
+            array("d", [float(record.get("errors") or 0) for record in records])
+        )
+        for name in SERIES[2:]:
+            self.series[name].extend(
+                array("d", [float(record.get(name) or 0.0) for record in records])
+            )
+
+    @property
+    def started_at(self) -> float:
+        return self.at[0] - self.seconds[0] if self.at else 0.0
+
+    def warmup_span(self) -> Tuple[float, float] | None:
+        """Unix start and end of the warm-up intervals, if any were recorded."""
+        ends = [at for at, warm in zip(self.at, self.warmup) if warm]
+        return (self.started_at, max(ends)) if ends else None
+
+
+def timeline_path(csv_path: Path) -> Path:
+    """Sidecar written by `bin/bench/http --csv=... --timeline`."""
+    return csv_path.with_suffix(".timeline.jsonl")
+
+
+def read_timeline(path: Path) -> List[TimelineRun]:
+    """Group every interval of `path` by run, ordered by run start."""
+    grouped: Dict[str, List[dict]] = {}
+    with path.open("r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                grouped.setdefault(str(record["run"]), []).append(record)
+            except (json.JSONDecodeError, KeyError, TypeError) as exc:
+                raise ValueError(f"Invalid timeline line {line_number} in {path}: {exc}") from exc
+    runs = []
+    for run_id, records in grouped.items():
+        run = TimelineRun(
+            run=run_id,
+            scenario=str(records[0].get("scenario") or ""),
+            concurrency=int(records[0].get("concurrency") or 0),
+        )
+        try:
+            run.extend(records)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid timeline record for run {run_id} in {path}: {exc}") from exc
+        runs.append(run)
+    return sorted(runs, key=lambda run: run.started_at)
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> Tuple[list, list]:
+    """Downsample a series to `threshold` points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Series that already fit are
+    returned unchanged (as lists).
+    """
+    count = len(xs)
+    if threshold >= count or threshold < 3:
+        return list(xs), list(ys)
+    if np is not None:
+        return _lttb_numpy(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float), threshold)
+    bounds = _bucket_bounds(count, threshold)
+    keep = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, stop = bounds[bucket], bounds[bucket + 1]
+        after = bounds[bucket + 2] if bucket + 2 < len(bounds) else count
+        following = slice(count - 1, count) if stop >= count - 1 else slice(stop, after)
+        next_xs, next_ys = xs[following], ys[following]
+        mean_x = sum(next_xs) / len(next_xs)
+        mean_y = sum(next_ys) / len(next_ys)
+        ax, ay = xs[anchor], ys[anchor]
+        best, best_area = start, -1.0
+        for index in range(start, stop):
+            area = abs((ax - mean_x) * (ys[index] - ay) - (ax - xs[index]) * (mean_y - ay))
+            if area > best_area:
+                best, best_area = index, area
+        keep.append(best)
+        anchor = best
+    keep.append(count - 1)
+    return [xs[index] for index in keep], [ys[index] for index in keep]
+
+
+def _bucket_bounds(count: int, threshold: int) -> List[int]:
+    """First index of each of the `threshold - 2` buckets, then the end of the last.
+
+    Both implementations use these bounds so they keep the same points. The
+    last bucket always ends just before the final point, whatever the rounding
+    of `every`.
+    """
+    every = (count - 2) / (threshold - 2)
+    bounds = [int(bucket * every) + 1 for bucket in range(threshold - 1)]
+    bounds[-1] = count - 1
+    return bounds
+
+
+def _lttb_numpy(xs, ys, threshold: int) -> Tuple[list, list]:
+    count = len(xs)
+    bounds = _bucket_bounds(count, threshold)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, count - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, stop = bounds[bucket], bounds[bucket + 1]
+        after = bounds[bucket + 2] if bucket + 2 < len(bounds) else count
+        if stop >= count - 1:
+            mean_x, mean_y = xs[-1], ys[-1]
+        else:
+            mean_x, mean_y = xs[stop:after].mean(), ys[stop:after].mean()
+        ax, ay = xs[anchor], ys[anchor]
+        areas = np.abs(
+            (ax - mean_x) * (ys[start:stop] - ay) - (ax - xs[start:stop]) * (mean_y - ay)
+        )
+        anchor = start + int(areas.argmax())
+        keep[bucket + 1] = anchor
+    return xs[keep].tolist(), ys[keep].tolist()
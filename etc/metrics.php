@@ -15,6 +15,14 @@ declare(strict_types=1);
  *    environments without OpenSwoole available.
  *  - `apcu` – uses APCu shared memory (requires the extension to be loaded).
  *
+ * `swoole_table.key_rows` sizes the registry listing every metric and series
+ * (two rows each, twice `value_rows` by default). With `high_cardinality`
+ * enabled, the value, registry and string tables are all grown to hold at
+ * least `max_series` series, e.g. per-route labels across hundreds of routes.
+ *
+ * `scrape_cache_ttl` (seconds) lets each worker serve its last rendered
+ * `/metrics` body for that long instead of collecting again; 0 disables it.
+ *
  * Histogram buckets can be overridden per metric by specifying the fully
  * qualified metric name. When no explicit entry exists, the `default` bucket
  * definition is used.
@@ -23,9 +31,17 @@ declare(strict_types=1);
  *     namespace: string,
  *     storage: array{
  *         driver: string,
- *         swoole_table?: array{value_rows?: int, string_rows?: int, string_size?: int},
+ *         swoole_table?: array{
+ *             value_rows?: int,
+ *             string_rows?: int,
+ *             string_size?: int,
+ *             key_rows?: int,
+ *             high_cardinality?: bool,
+ *             max_series?: int
+ *         },
  *         apcu?: array{prefix?: string}
  *     },
+ *     scrape_cache_ttl?: float,
  *     histogram_buckets: array<string, array<int, float>>
  * }
  */
@@ -37,11 +53,15 @@ return [
             'value_rows' => 16384,
             'string_rows' => 2048,
             'string_size' => 4096,
+            'key_rows' => 32768,
+            'high_cardinality' => filter_var($_ENV['BAMBOO_METRICS_HIGH_CARDINALITY'] ?? false, FILTER_VALIDATE_BOOLEAN),
+            'max_series' => 65536,
         ],
         'apcu' => [
             'prefix' => $_ENV['BAMBOO_METRICS_APCU_PREFIX'] ?? 'bamboo_prom',
         ],
     ],
+    'scrape_cache_ttl' => (float) ($_ENV['BAMBOO_METRICS_SCRAPE_CACHE_TTL'] ?? 0.0),
     'histogram_buckets' => [
         'default' => [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
         'bamboo_http_request_duration_seconds' => [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
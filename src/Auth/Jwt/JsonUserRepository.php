@@ -4,10 +4,28 @@ declare(strict_types=1);
 
 namespace Bamboo\Auth\Jwt;
 
+/**
+ * JSON file user store.
+ *
+ * Each worker keeps the decoded users indexed by lower-cased username and
+ * re-reads the file only when its inode, size or mtime changes. Writes go to
+ * a temporary file that is renamed over the store, so readers never see a
+ * partial file and every write changes the inode. Writers serialise on an
+ * exclusive lock of `<store>.lock`, held from re-reading the store until the
+ * rename, so concurrent registrations never overwrite each other.
+ */
 final class JsonUserRepository
 {
     private const PASSWORD_FIELD = 'password_hash';
 
+    /** @var array<int, array<string, mixed>> */
+    private array $users = [];
+
+    /** @var array<string, int> lower-cased username => offset in $users */
+    private array $index = [];
+
+    private ?string $signature = null;
+
     public function __construct(private string $storagePath)
     {
     }
@@ -22,7 +40,9 @@ final class JsonUserRepository
      */
     public function all(): array
     {
-        return $this->readUsers();
+        $this->refresh();
+
+        return $this->users;
     }
 
     /**
@@ -35,17 +55,10 @@ final class JsonUserRepository
             return null;
         }
 
-        foreach ($this->readUsers() as $user) {
-            if (!isset($user['username'])) {
-                continue;
-            }
+        $this->refresh();
+        $offset = $this->index[strtolower($username)] ?? null;
 
-            if (strcasecmp((string) $user['username'], $username) === 0) {
-                return $user;
-            }
-        }
-
-        return null;
+        return $offset === null ? null : $this->users[$offset];
     }
 
     /**
@@ -59,15 +72,9 @@ final class JsonUserRepository
             return null;
         }
 
-        $users = $this->readUsers();
-        foreach ($users as $user) {
-            if (!isset($user['username'])) {
-                continue;
-            }
-
-            if (strcasecmp((string) $user['username'], $username) === 0) {
-                return null;
-            }
+        $this->refresh();
+        if (isset($this->index[strtolower($username)])) {
+            return null;
         }
 
         $user = [
@@ -80,10 +87,19 @@ final class JsonUserRepository
             'created_at' => gmdate('c'),
         ];
 
-        $users[] = $user;
-        $this->writeUsers($users);
+        return $this->exclusively(function () use ($username, $user): ?array {
+            // Another worker may have registered the name since the check above.
+            $this->refresh();
+            if (isset($this->index[strtolower($username)])) {
+                return null;
+            }
 
-        return $user;
+            $users = $this->users;
+            $users[] = $user;
+            $this->writeUsers($users);
+
+            return $user;
+        });
     }
 
     /**
@@ -119,6 +135,50 @@ final class JsonUserRepository
         return $user;
     }
 
+    /**
+     * Reload the store when the file changed since it was last read or written.
+     */
+    private function refresh(): void
+    {
+        $signature = $this->fileSignature();
+        if ($signature === $this->signature) {
+            return;
+        }
+
+        $this->load($signature === null ? [] : $this->readUsers(), $signature);
+    }
+
+    /**
+     * @param array<int, array<string, mixed>> $users
+     */
+    private function load(array $users, ?string $signature): void
+    {
+        $index = [];
+        foreach ($users as $offset => $user) {
+            if (!isset($user['username'])) {
+                continue;
+            }
+
+            // The first entry wins, as it did when lookups scanned the file.
+            $index[strtolower((string) $user['username'])] ??= $offset;
+        }
+
+        $this->users = $users;
+        $this->index = $index;
+        $this->signature = $signature;
+    }
+
+    private function fileSignature(): ?string
+    {
+        clearstatcache(true, $this->storagePath);
+        $stat = @stat($this->storagePath);
+        if ($stat === false) {
+            return null;
+        }
+
+        return $stat['ino'] . ':' . $stat['size'] . ':' . $stat['mtime'];
+    }
+
     /**
      * @return array<int, array<string, mixed>>
      */
@@ -150,21 +210,62 @@ final class JsonUserRepository
     }
 
     /**
-     * @param array<int, array<string, mixed>> $users
+     * @template T
+     * @param callable(): T $callback
+     * @return T
      */
-    private function writeUsers(array $users): void
+    private function exclusively(callable $callback): mixed
     {
         $directory = dirname($this->storagePath);
         if (!is_dir($directory)) {
             @mkdir($directory, 0775, true);
         }
 
+        $lock = @fopen($this->storagePath . '.lock', 'c');
+        if ($lock === false) {
+            throw new JwtException('Unable to lock user repository.');
+        }
+
+        try {
+            if (!flock($lock, LOCK_EX)) {
+                throw new JwtException('Unable to lock user repository.');
+            }
+
+            return $callback();
+        } finally {
+            flock($lock, LOCK_UN);
+            fclose($lock);
+        }
+    }
+
+    /**
+     * Replace the store; callers hold the lock (see exclusively()).
+     *
+     * @param array<int, array<string, mixed>> $users
+     */
+    private function writeUsers(array $users): void
+    {
         $json = json_encode($users, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
         if ($json === false) {
             throw new JwtException('Unable to encode user repository.');
         }
 
-        file_put_contents($this->storagePath, $json . "\n", LOCK_EX);
+        $temp = $this->storagePath . '.' . uniqid('', true) . '.tmp';
+        if (file_put_contents($temp, $json . "\n") === false) {
+            throw new JwtException('Unable to write user repository.');
+        }
+
+        $mode = @fileperms($this->storagePath);
+        if ($mode !== false) {
+            @chmod($temp, $mode & 0777);
+        }
+
+        if (!rename($temp, $this->storagePath)) {
+            @unlink($temp);
+            throw new JwtException('Unable to write user repository.');
+        }
+
+        $this->load($users, $this->fileSignature());
     }
 
     /**
@@ -10,6 +10,8 @@ class RoutesCache extends Command {
     } catch (\RuntimeException $e) {
       echo "Routes not cached: {$e->getMessage()}\n"; return 1;
     }
-    echo "Routes cached -> {$file}\n"; return 0;
+    echo "Routes cached -> {$file}\n";
+    echo "Reload the HTTP server workers (SIGUSR1 to the master process) to serve the new routes.\n";
+    return 0;
   }
 }
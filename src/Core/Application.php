@@ -3,6 +3,7 @@ namespace Bamboo\Core;
 
 use Bamboo\Module\ModuleInterface;
 use Bamboo\Web\Kernel;
+use Bamboo\Web\Pipeline;
 use Bamboo\Web\RequestContext;
 use Bamboo\Web\RequestContextScope;
 use Psr\Http\Message\ResponseInterface;
@@ -13,6 +14,12 @@ class Application extends Container {
    * @var list<ModuleInterface>
    */
   protected array $modules = [];
+  /** @var array<string, Pipeline> */
+  protected array $pipelines = [];
+  /** @var array<string, object> */
+  protected array $middlewareInstances = [];
+  protected ?int $kernelRevision = null;
+  protected ?int $routerRevision = null;
   public function __construct(protected Config $config) {
     $this->singleton(Config::class, fn() => $config);
     $this->singleton('router', fn() => new Router());
@@ -30,11 +37,7 @@ class Application extends Container {
   protected function bootRoutes(): void {
     $router = $this->get('router');
     $cache = $this->config('cache.routes');
-    if ($cache && file_exists($cache)) {
-      $map = require $cache;
-      foreach ($map as $method => $paths) {
-        foreach ($paths as $path => $definition) { $router->addRoute($method, $path, $definition); }
-      }
+    if ($cache && $router->loadCache($cache)) {
       return;
     }
     require dirname(__DIR__, 2) . '/routes/http.php';
@@ -63,38 +66,34 @@ class Application extends Container {
       $kernelCacheKey = $routeSignature;
     }
 
+    $pipeline = $this->pipeline($router, $kernelCacheKey, $routeMiddleware);
+    return $pipeline->handle($request, fn(Request $request) => $router->toResponse($match, $request, $this));
+  }
+  /**
+   * The compiled middleware pipeline of a route signature. Pipelines and the
+   * middleware instances they share live for the worker; they are rebuilt
+   * when the kernel or the route table signals a change.
+   *
+   * @param list<string> $routeMiddleware
+   */
+  public function pipeline(Router $router, string $signature, array $routeMiddleware = []): Pipeline {
     $kernel = $this->get(Kernel::class);
-    $middleware = $kernel->forRoute($kernelCacheKey, $routeMiddleware);
-    $terminators = [];
-    $runner = array_reduce(
-      array_reverse($middleware),
-      function(callable $next, string $middlewareClass) use (&$terminators) {
-        return function(Request $request) use ($middlewareClass, $next, &$terminators) {
-          $instance = $this->instantiateMiddleware($middlewareClass);
-          if (!method_exists($instance, 'handle')) {
-            throw new \BadMethodCallException(sprintf('Middleware %s must define a handle() method.', $middlewareClass));
-          }
-          $isTerminable = is_callable([$instance, 'terminate']);
-          $requestForTerminate = $request;
-          $response = $instance->handle($request, function(Request $nextRequest) use ($next, $isTerminable, &$requestForTerminate) {
-            if ($isTerminable) {
-              $requestForTerminate = $nextRequest;
-            }
-            return $next($nextRequest);
-          });
-          if ($isTerminable) {
-            $terminators[] = [$instance, $requestForTerminate];
-          }
-          return $response;
-        };
-      },
-      fn(Request $request) => $router->toResponse($match, $request, $this)
-    );
-    $response = $runner($request);
-    foreach ($terminators as [$instance, $terminatorRequest]) {
-      $instance->terminate($terminatorRequest, $response);
+    $routerRevision = $router->revision();
+    if ($routerRevision !== $this->routerRevision) {
+      $this->routerRevision = $routerRevision;
+      $kernel->invalidate();
+    }
+    $kernelRevision = $kernel->revision();
+    if ($kernelRevision !== $this->kernelRevision) {
+      $this->kernelRevision = $kernelRevision;
+      $this->pipelines = [];
+      $this->middlewareInstances = [];
     }
-    return $response;
+
+    return $this->pipelines[$signature] ??= new Pipeline(array_map(
+      fn(string $middleware): object => $this->middlewareInstances[$middleware] ??= $this->instantiateMiddleware($middleware),
+      $kernel->forRoute($signature, $routeMiddleware)
+    ));
   }
   protected function instantiateMiddleware(string $middleware): object {
     if (!class_exists($middleware)) {
@@ -18,6 +18,8 @@ class Config {
    */
   protected array $items = [];
 
+  protected int $revision = 0;
+
   public function __construct(protected string $dir) {
     $this->items = $this->loadConfiguration();
   }
@@ -44,6 +46,29 @@ class Config {
     return $value;
   }
 
+  /**
+   * Incremented on every change made through set() or mergeMiddleware(), so
+   * state derived from the configuration (the middleware kernel) can be
+   * checked for staleness without comparing values.
+   */
+  public function revision(): int {
+    return $this->revision;
+  }
+
+  /**
+   * Replace the value at a dot-separated key.
+   */
+  public function set(string $key, mixed $value): void {
+    $target = &$this->items;
+    foreach (explode('.', $key) as $segment) {
+      if (!is_array($target)) $target = [];
+      $target = &$target[$segment];
+    }
+    $target = $value;
+    unset($target);
+    $this->revision++;
+  }
+
   /**
    * @param ModuleMiddleware $contribution
    */
@@ -107,6 +132,7 @@ class Config {
       'aliases' => $aliases,
     ];
     $this->items['middleware'] = $normalized;
+    $this->revision++;
   }
 
   /**
@@ -2,9 +2,11 @@
 namespace Bamboo\Core;
 
 use Closure;
+use FastRoute\DataGenerator\GroupCountBased as GroupCountBasedGenerator;
 use FastRoute\Dispatcher;
+use FastRoute\Dispatcher\GroupCountBased;
 use FastRoute\RouteCollector;
-use function FastRoute\simpleDispatcher;
+use FastRoute\RouteParser\Std;
 use Nyholm\Psr7\Response;
 use Psr\Http\Message\ResponseInterface;
 use Psr\Http\Message\ServerRequestInterface as Request;
@@ -18,13 +20,33 @@ use Psr\Http\Message\ServerRequestInterface as Request;
  *     signature: string,
  * }
  * @phpstan-type RouteMap array<string, array<string, RouteDefinitionArray>>
+ * @phpstan-type RouteCache array{format: int, routes: RouteMap, dispatch_data: array<int, mixed>}
  */
 class Router {
+  /**
+   * Layout of the files written by cacheTo(); older files hold a bare RouteMap.
+   */
+  public const CACHE_FORMAT = 2;
+
   /**
    * @var RouteMap
    */
   protected array $routes = [];
 
+  /**
+   * Compiled once per process and reused until the route table changes.
+   */
+  protected ?Dispatcher $dispatcher = null;
+  protected ?string $cacheFile = null;
+  protected ?string $cacheSignature = null;
+  protected int $revision = 0;
+  /**
+   * Routes registered through addRoute(); they survive cache (re)loads.
+   *
+   * @var RouteMap
+   */
+  protected array $registered = [];
+
   /**
    * @param callable|array<int|string, mixed>|RouteDefinition $action
    * @param list<string> $middleware
@@ -32,9 +54,16 @@ class Router {
    */
   public function addRoute(string $method, string $path, callable|array|RouteDefinition $action, array $middleware = [], array $middlewareGroups = []): void {
     $method = strtoupper($method);
-    $this->routes[$method][$path] = $this->normalizeRoute($method, $path, $action, $middleware, $middlewareGroups);
+    $this->routes[$method][$path] = $this->registered[$method][$path] = $this->normalizeRoute($method, $path, $action, $middleware, $middlewareGroups);
+    $this->dispatcher = null;
+    $this->revision++;
   }
 
+  /**
+   * Changes whenever the route table does (new routes, a reloaded cache).
+   */
+  public function revision(): int { return $this->revision; }
+
   /**
    * @param callable|array<int|string, mixed>|RouteDefinition $action
    * @param list<string> $middleware
@@ -68,6 +97,9 @@ class Router {
   public function all(): array { return $this->routes; }
 
   /**
+   * Export the route map together with the compiled dispatcher data, so
+   * loadCache() can serve requests without recompiling the routes.
+   *
    * @return void
    */
   public function cacheTo(string $file): void {
@@ -84,9 +116,103 @@ class Router {
       throw new \RuntimeException("Cannot cache routes containing closures: {$list}");
     }
 
-    $export = var_export($this->routes, true);
+    $export = var_export([
+      'format' => self::CACHE_FORMAT,
+      'routes' => $this->routes,
+      'dispatch_data' => $this->collect()->getData(),
+    ], true);
     $php = "<?php\nreturn {$export};\n";
-    @mkdir(dirname($file), 0777, true); file_put_contents($file, $php);
+    @mkdir(dirname($file), 0777, true);
+    // Workers may be reading the cache; swap the new file in atomically.
+    $temp = $file . '.' . uniqid('', true) . '.tmp';
+    file_put_contents($temp, $php);
+    if (!rename($temp, $file)) {
+      @unlink($temp);
+      throw new \RuntimeException("Unable to write route cache {$file}");
+    }
+  }
+
+  /**
+   * Replace the route table with the one cached in `$file` and reuse its
+   * precompiled dispatcher. Routes registered through addRoute() (e.g. by a
+   * module's boot()) are re-applied on top and win over cached routes with
+   * the same method and path; the dispatcher is then compiled on first use.
+   */
+  public function loadCache(string $file): bool {
+    $signature = $this->fileSignature($file);
+    if ($signature === null) return false;
+    if (function_exists('opcache_invalidate')) {
+      @opcache_invalidate($file, true);
+    }
+    $payload = require $file;
+    if (!is_array($payload)) {
+      throw new \RuntimeException("Route cache {$file} must return an array.");
+    }
+    if (($payload['format'] ?? null) === self::CACHE_FORMAT && isset($payload['routes'], $payload['dispatch_data'])) {
+      /** @var RouteCache $payload */
+      $this->routes = $payload['routes'];
+      $this->dispatcher = $this->registered ? null : new GroupCountBased($payload['dispatch_data']);
+    } else {
+      // Route maps cached before the dispatcher was; compiled on first match.
+      $this->routes = [];
+      foreach ($payload as $method => $paths) {
+        $method = strtoupper($method);
+        foreach ($paths as $path => $definition) { $this->routes[$method][$path] = $this->normalizeRoute($method, $path, $definition); }
+      }
+      $this->dispatcher = null;
+    }
+    foreach ($this->registered as $method => $paths) {
+      foreach ($paths as $path => $definition) { $this->routes[$method][$path] = $definition; }
+    }
+    $this->revision++;
+    $this->cacheFile = $file;
+    $this->cacheSignature = $signature;
+    return true;
+  }
+
+  /**
+   * The compiled FastRoute dispatcher for the current route table.
+   */
+  public function dispatcher(): Dispatcher {
+    return $this->dispatcher ??= new GroupCountBased($this->collect()->getData());
+  }
+
+  private function collect(): RouteCollector {
+    $collector = new RouteCollector(new Std(), new GroupCountBasedGenerator());
+    foreach ($this->routes as $method => $map) {
+      foreach ($map as $path => $definition) {
+        $collector->addRoute($method, $path, $definition);
+      }
+    }
+    return $collector;
+  }
+
+  /**
+   * Re-read the loaded route cache if it changed on disk since it was loaded.
+   * Matching never checks the file; the HTTP server calls this when a worker
+   * starts, so `routes.cache` followed by a worker reload applies new routes.
+   * A deleted or unreadable cache keeps the routes loaded last.
+   */
+  public function reload(): bool {
+    if ($this->cacheFile === null) return false;
+    $signature = $this->fileSignature($this->cacheFile);
+    if ($signature === null || $signature === $this->cacheSignature) return false;
+    try {
+      $this->loadCache($this->cacheFile);
+    } catch (\Throwable $e) {
+      $this->cacheSignature = $signature;
+      error_log(sprintf('[router] Ignoring unreadable route cache %s: %s', $this->cacheFile, $e->getMessage()));
+      return false;
+    }
+    $this->dispatcher();
+    return true;
+  }
+
+  private function fileSignature(string $file): ?string {
+    clearstatcache(true, $file);
+    $stat = @stat($file);
+    if ($stat === false) return null;
+    return $stat['ino'] . ':' . $stat['size'] . ':' . $stat['mtime'];
   }
 
   private function containsClosure(mixed $handler): bool {
@@ -108,15 +234,7 @@ class Router {
    * }
    */
   public function match(Request $request): array {
-    $dispatcher = simpleDispatcher(function(RouteCollector $r) {
-      foreach ($this->routes as $method => $map) {
-        foreach ($map as $path => $definition) {
-          $r->addRoute($method, $path, $definition);
-        }
-      }
-    });
-
-    $routeInfo = $dispatcher->dispatch($request->getMethod(), $request->getUri()->getPath());
+    $routeInfo = $this->dispatcher()->dispatch($request->getMethod(), $request->getUri()->getPath());
 
     return match ($routeInfo[0]) {
       Dispatcher::NOT_FOUND => ['status' => Dispatcher::NOT_FOUND],
@@ -0,0 +1,57 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Bamboo\Observability\Metrics;
+
+/**
+ * Per-worker cache of the rendered `/metrics` body.
+ *
+ * Scrapes landing on the same worker within `ttl` seconds get the previous
+ * body instead of collecting and rendering again. A TTL of zero disables it.
+ */
+final class ScrapeCache
+{
+    /** @var callable(): float */
+    private $clock;
+
+    private ?string $body = null;
+
+    private float $expiresAt = 0.0;
+
+    public function __construct(private float $ttl = 0.0, ?callable $clock = null)
+    {
+        $this->clock = $clock ?? static fn(): float => microtime(true);
+    }
+
+    public function enabled(): bool
+    {
+        return $this->ttl > 0.0;
+    }
+
+    /**
+     * @param callable(): string $render
+     */
+    public function remember(callable $render): string
+    {
+        if (!$this->enabled()) {
+            return $render();
+        }
+
+        $now = ($this->clock)();
+        if ($this->body !== null && $now < $this->expiresAt) {
+            return $this->body;
+        }
+
+        $this->body = $render();
+        $this->expiresAt = $now + $this->ttl;
+
+        return $this->body;
+    }
+
+    public function clear(): void
+    {
+        $this->body = null;
+        $this->expiresAt = 0.0;
+    }
+}
@@ -14,6 +14,26 @@ use Prometheus\Storage\Adapter;
 use Prometheus\Summary;
 use RuntimeException;
 
+/**
+ * Prometheus storage shared by every worker through OpenSwoole tables.
+ *
+ * Metric families and their sample keys are listed in a key registry: each key
+ * claims a numbered slot once (`incr` on a claim row decides the winner), so
+ * registering is two atomic increments the first time a series appears in the
+ * server and a per-worker array lookup afterwards. Lists have no size cap; the
+ * registry holds two rows per key. Summary series are deregistered once all
+ * their observations expire, which frees both rows.
+ *
+ * Scrapes are incremental in the same way: each worker keeps the decoded
+ * metadata, labels and sample order of every family and only reads the keys
+ * registered since its previous collect(), then the current values.
+ *
+ * @phpstan-type Family array{
+ *     meta: array<string, mixed>,
+ *     series: array<string, array<string, string>>,
+ *     order: list<string>|null
+ * }
+ */
 class SwooleTableAdapter implements Adapter
 {
     /**
@@ -22,7 +42,7 @@ class SwooleTableAdapter implements Adapter
     private const COLUMN_VALUE = 'value';
 
     /**
-     * Table column used for string payloads (metadata, indexes, summaries).
+     * Table column used for string payloads (metadata, label values, summaries).
      */
     private const COLUMN_PAYLOAD = 'payload';
 
@@ -30,10 +50,40 @@ class SwooleTableAdapter implements Adapter
 
     private const PREFIX_SAMPLE = 'sample:';
 
-    private const PREFIX_SAMPLES = 'samples:';
-
     private const PREFIX_LABELS = 'labels:';
 
+    /**
+     * Key registry columns: the registered key of a slot, the counters, and
+     * the slot a claim row won (plus one, so an unset column reads as none).
+     */
+    private const COLUMN_KEY = 'key';
+
+    private const COLUMN_COUNT = 'count';
+
+    private const COLUMN_SLOT = 'slot';
+
+    /**
+     * OpenSwoole table keys are at most 63 bytes, so registered keys fit.
+     */
+    private const KEY_SIZE = 64;
+
+    private const PREFIX_CLAIM = 'claim:';
+
+    private const PREFIX_SLOTS = 'slots:';
+
+    private const PREFIX_SLOT = 'slot:';
+
+    /**
+     * How long collect() waits for a claimed slot to be written before it
+     * treats the slot as abandoned (registry full, or deregistered unread).
+     */
+    private const ABANDONED_SLOT_SECONDS = 60;
+
+    /**
+     * Bumped by wipeStorage() so every worker drops its registration cache.
+     */
+    private const KEY_GENERATION = 'generation';
+
     /**
      * @var \OpenSwoole\Table
      */
@@ -44,7 +94,66 @@ class SwooleTableAdapter implements Adapter
      */
     private $stringTable;
 
-    public function __construct(int $valueRows = 16384, int $stringRows = 2048, int $stringSize = 4096)
+    /**
+     * @var \OpenSwoole\Table
+     */
+    private $keyTable;
+
+    /**
+     * Keys this worker knows to be registered (metric families and samples).
+     *
+     * @var array<string, true>
+     */
+    private array $registered = [];
+
+    /**
+     * Label identifiers by encoded label values, already stored by this worker.
+     *
+     * @var array<string, string>
+     */
+    private array $labelIdentifiers = [];
+
+    /**
+     * @var array<string, string>
+     */
+    private array $metricIdentifiers = [];
+
+    /**
+     * How far collect() has read each registry list.
+     *
+     * @var array<string, array{read: int, pending: array<int, int>}>
+     */
+    private array $listCursors = [];
+
+    /**
+     * Metric families known to collect(), by type.
+     *
+     * @var array<string, list<string>>
+     */
+    private array $familyKeys = [];
+
+    /**
+     * Decoded metadata and sample keys by label identifier and suffix; `order`
+     * is the sorted label identifiers, reset whenever a series is added.
+     *
+     * @var array<string, Family>
+     */
+    private array $families = [];
+
+    /**
+     * @var array<string, array<int|string, mixed>>
+     */
+    private array $decodedLabels = [];
+
+    private int $generation = 0;
+
+    private bool $overflowReported = false;
+
+    /**
+     * @param int|null $keyRows Key registry rows; two per metric family and per series
+     *                          (defaults to twice `$valueRows`).
+     */
+    public function __construct(int $valueRows = 16384, int $stringRows = 2048, int $stringSize = 4096, ?int $keyRows = null)
     {
         if (!class_exists('\\OpenSwoole\\Table')) {
             throw new StorageException('OpenSwoole extension is required for the SwooleTableAdapter.');
@@ -57,10 +166,18 @@ class SwooleTableAdapter implements Adapter
         $this->stringTable = new \OpenSwoole\Table($stringRows);
         $this->stringTable->column(self::COLUMN_PAYLOAD, \OpenSwoole\Table::TYPE_STRING, $stringSize);
         $this->stringTable->create();
+
+        $this->keyTable = new \OpenSwoole\Table($keyRows ?? 2 * $valueRows);
+        $this->keyTable->column(self::COLUMN_KEY, \OpenSwoole\Table::TYPE_STRING, self::KEY_SIZE);
+        $this->keyTable->column(self::COLUMN_COUNT, \OpenSwoole\Table::TYPE_INT);
+        $this->keyTable->column(self::COLUMN_SLOT, \OpenSwoole\Table::TYPE_INT);
+        $this->keyTable->create();
     }
 
     public function collect(bool $sortMetrics = true): array
     {
+        $this->syncGeneration();
+
         $metrics = [];
         $metrics = array_merge($metrics, $this->collectScalarMetrics(Counter::TYPE, $sortMetrics));
         $metrics = array_merge($metrics, $this->collectScalarMetrics(Gauge::TYPE, $sortMetrics));
@@ -148,6 +265,14 @@ class SwooleTableAdapter implements Adapter
         foreach ($this->stringTable as $key => $_row) {
             $this->stringTable->del($key);
         }
+
+        $generation = $this->readGeneration();
+        foreach ($this->keyTable as $key => $_row) {
+            $this->keyTable->del($key);
+        }
+
+        $this->keyTable->set(self::KEY_GENERATION, [self::COLUMN_COUNT => $generation + 1]);
+        $this->syncGeneration();
     }
 
     /**
@@ -156,10 +281,10 @@ class SwooleTableAdapter implements Adapter
     private function collectScalarMetrics(string $type, bool $sortMetrics): array
     {
         $results = [];
-        foreach ($this->getIndex($type) as $metaKey) {
-            $meta = $this->readMeta($metaKey);
-            if ($meta === null) {
-                continue;
+        foreach ($this->families($type) as $metaKey => $family) {
+            $meta = $family['meta'];
+            if ($sortMetrics && $family['order'] === null) {
+                $family['order'] = $this->families[$metaKey]['order'] = $this->sortedSeries($family['series']);
             }
 
             $data = [
@@ -170,25 +295,21 @@ class SwooleTableAdapter implements Adapter
                 'samples' => [],
             ];
 
-            foreach ($this->getSampleKeys($metaKey) as $sampleKey) {
-                $parsed = $this->parseSampleKey($sampleKey);
-                if ($parsed === null || $parsed['suffix'] !== 'value') {
+            $order = $sortMetrics ? $family['order'] : array_keys($family['series']);
+            foreach ($order as $labels) {
+                $sampleKey = $family['series'][$labels]['value'] ?? null;
+                if ($sampleKey === null) {
                     continue;
                 }
 
-                $value = $this->readValue($sampleKey);
                 $data['samples'][] = [
                     'name' => $meta['name'],
                     'labelNames' => [],
-                    'labelValues' => $this->decodeLabelValues($parsed['labels']),
-                    'value' => $value,
+                    'labelValues' => $this->labelValues((string) $labels),
+                    'value' => $this->readValue($sampleKey),
                 ];
             }
 
-            if ($sortMetrics) {
-                $this->sortSamples($data['samples']);
-            }
-
             $results[] = new MetricFamilySamples($data);
         }
 
@@ -201,10 +322,12 @@ class SwooleTableAdapter implements Adapter
     private function collectHistograms(): array
     {
         $results = [];
-        foreach ($this->getIndex(Histogram::TYPE) as $metaKey) {
-            $meta = $this->readMeta($metaKey);
-            if ($meta === null) {
-                continue;
+        foreach ($this->families(Histogram::TYPE) as $metaKey => $family) {
+            $meta = $family['meta'];
+            if ($family['order'] === null) {
+                $order = array_map('strval', array_keys($family['series']));
+                sort($order, SORT_STRING);
+                $family['order'] = $this->families[$metaKey]['order'] = $order;
             }
 
             $data = [
@@ -217,27 +340,15 @@ class SwooleTableAdapter implements Adapter
             ];
 
             $data['buckets'][] = '+Inf';
-            $histogramBuckets = [];
-
-            foreach ($this->getSampleKeys($metaKey) as $sampleKey) {
-                $parsed = $this->parseSampleKey($sampleKey);
-                if ($parsed === null || !str_starts_with($parsed['suffix'], 'bucket:')) {
-                    continue;
-                }
-
-                $bucket = substr($parsed['suffix'], strlen('bucket:'));
-                $histogramBuckets[$parsed['labels']][$bucket] = $this->readValue($sampleKey);
-            }
-
-            ksort($histogramBuckets);
 
-            foreach ($histogramBuckets as $labelIdentifier => $bucketValues) {
+            foreach ($family['order'] as $labels) {
+                $sampleKeys = $family['series'][$labels];
+                $decodedLabelValues = $this->labelValues($labels);
                 $acc = 0.0;
-                $decodedLabelValues = $this->decodeLabelValues($labelIdentifier);
                 foreach ($data['buckets'] as $bucket) {
                     $bucketKey = (string) $bucket;
-                    $count = $bucketValues[$bucketKey] ?? 0.0;
-                    $acc += $count;
+                    $sampleKey = $sampleKeys['bucket:' . $bucketKey] ?? null;
+                    $acc += $sampleKey === null ? 0.0 : $this->readValue($sampleKey);
                     $data['samples'][] = [
                         'name' => $meta['name'] . '_bucket',
                         'labelNames' => ['le'],
@@ -253,12 +364,12 @@ class SwooleTableAdapter implements Adapter
                     'value' => $acc,
                 ];
 
-                $sum = $bucketValues['sum'] ?? 0.0;
+                $sumKey = $sampleKeys['bucket:sum'] ?? null;
                 $data['samples'][] = [
                     'name' => $meta['name'] . '_sum',
                     'labelNames' => [],
                     'labelValues' => $decodedLabelValues,
-                    'value' => $sum,
+                    'value' => $sumKey === null ? 0.0 : $this->readValue($sumKey),
                 ];
             }
 
@@ -276,12 +387,8 @@ class SwooleTableAdapter implements Adapter
         $math = new Math();
         $results = [];
 
-        foreach ($this->getIndex(Summary::TYPE) as $metaKey) {
-            $meta = $this->readMeta($metaKey);
-            if ($meta === null) {
-                continue;
-            }
-
+        foreach ($this->families(Summary::TYPE) as $metaKey => $family) {
+            $meta = $family['meta'];
             $data = [
                 'name' => $meta['name'],
                 'help' => $meta['help'],
@@ -292,9 +399,9 @@ class SwooleTableAdapter implements Adapter
                 'samples' => [],
             ];
 
-            foreach ($this->getSampleKeys($metaKey) as $sampleKey) {
-                $parsed = $this->parseSampleKey($sampleKey);
-                if ($parsed === null || $parsed['suffix'] !== 'value') {
+            foreach ($family['series'] as $labels => $sampleKeys) {
+                $sampleKey = $sampleKeys['value'] ?? null;
+                if ($sampleKey === null) {
                     continue;
                 }
 
@@ -303,6 +410,8 @@ class SwooleTableAdapter implements Adapter
 
                 if ($values === []) {
                     $this->removeSummarySample($metaKey, $sampleKey);
+                    unset($this->families[$metaKey]['series'][$labels]);
+                    $this->families[$metaKey]['order'] = null;
                     continue;
                 }
 
@@ -310,7 +419,7 @@ class SwooleTableAdapter implements Adapter
                     return $left['value'] <=> $right['value'];
                 });
 
-                $decodedLabelValues = $this->decodeLabelValues($parsed['labels']);
+                $decodedLabelValues = $this->labelValues((string) $labels);
                 foreach ($data['quantiles'] as $quantile) {
                     $data['samples'][] = [
                         'name' => $meta['name'],
@@ -345,18 +454,86 @@ class SwooleTableAdapter implements Adapter
         return $results;
     }
 
+    /**
+     * Families of `$type` with their series, decoded once per worker: only
+     * keys registered since the previous scrape are read from the registry.
+     *
+     * @return array<string, Family>
+     */
+    private function families(string $type): array
+    {
+        foreach ($this->readNewKeys($this->indexKey($type)) as $metaKey) {
+            $this->familyKeys[$type][] = $metaKey;
+        }
+
+        $families = [];
+        foreach ($this->familyKeys[$type] ?? [] as $metaKey) {
+            if (!isset($this->families[$metaKey])) {
+                $meta = $this->readMeta($metaKey);
+                if ($meta === null) {
+                    continue;
+                }
+
+                $this->families[$metaKey] = ['meta' => $meta, 'series' => [], 'order' => null];
+            }
+
+            foreach ($this->readNewKeys($this->metricIdentifierFromMetaKey($metaKey)) as $sampleKey) {
+                $parsed = $this->parseSampleKey($sampleKey);
+                if ($parsed === null) {
+                    continue;
+                }
+
+                $this->families[$metaKey]['series'][$parsed['labels']][$parsed['suffix']] = $sampleKey;
+                $this->families[$metaKey]['order'] = null;
+            }
+
+            $families[$metaKey] = $this->families[$metaKey];
+        }
+
+        return $families;
+    }
+
+    /**
+     * Label identifiers ordered by their concatenated label values.
+     *
+     * @param array<string, array<string, string>> $series
+     * @return list<string>
+     */
+    private function sortedSeries(array $series): array
+    {
+        $sortKeys = [];
+        foreach (array_keys($series) as $labels) {
+            $sortKeys[(string) $labels] = implode('', $this->labelValues((string) $labels));
+        }
+
+        asort($sortKeys, SORT_STRING);
+
+        return array_map('strval', array_keys($sortKeys));
+    }
+
+    /**
+     * @return array<int|string, mixed>
+     */
+    private function labelValues(string $identifier): array
+    {
+        return $this->decodedLabels[$identifier] ??= $this->decodeLabelValues($identifier);
+    }
+
     /**
      * @param array<string, mixed> $data
      */
     private function ensureMeta(string $metaKey, array $data): void
     {
-        if ($this->readMeta($metaKey) !== null) {
+        $this->syncGeneration();
+        if (isset($this->registered[$metaKey])) {
             return;
         }
 
-        $meta = $this->metaData($data);
-        $this->writeMeta($metaKey, $meta);
-        $this->appendIndex($meta['type'], $metaKey);
+        if ($this->readMeta($metaKey) === null) {
+            $this->writeMeta($metaKey, $this->metaData($data));
+        }
+
+        $this->register($this->indexKey($data['type']), $metaKey);
     }
 
     /**
@@ -385,70 +562,150 @@ class SwooleTableAdapter implements Adapter
         $this->writeString($metaKey, $this->encodeJson($meta));
     }
 
-    private function appendIndex(string $type, string $metaKey): void
+    private function registerSampleKey(string $metaKey, string $sampleKey): void
     {
-        $indexKey = $this->indexKey($type);
-        $entries = $this->getIndex($type);
-        if (!in_array($metaKey, $entries, true)) {
-            $entries[] = $metaKey;
-            $this->writeString($indexKey, $this->encodeJson($entries));
-        }
+        $this->register($this->metricIdentifierFromMetaKey($metaKey), $sampleKey);
     }
 
     /**
-     * @return string[]
+     * Append `$key` to the registry list `$list` unless some worker already did.
      */
-    private function getIndex(string $type): array
+    private function register(string $list, string $key): void
     {
-        $indexKey = $this->indexKey($type);
-        $payload = $this->readString($indexKey);
-        if ($payload === null || $payload === '') {
-            return [];
+        if (isset($this->registered[$key])) {
+            return;
         }
 
-        $decoded = json_decode($payload, true);
-        if (!is_array($decoded)) {
-            return [];
+        $claimKey = $this->claimKey($key);
+        $claims = $this->keyTable->incr($claimKey, self::COLUMN_COUNT, 1);
+        if ($claims === false) {
+            $this->reportOverflow($key);
+            return;
+        }
+
+        if ((int) $claims === 1) {
+            $slots = $this->keyTable->incr(self::PREFIX_SLOTS . $list, self::COLUMN_COUNT, 1);
+            $stored = $slots !== false
+                && $this->keyTable->set($this->slotKey($list, (int) $slots - 1), [self::COLUMN_KEY => $key])
+                && $this->keyTable->set($claimKey, [self::COLUMN_SLOT => (int) $slots]);
+            if (!$stored) {
+                // Let a later update retry; readers skip the empty slot.
+                $this->keyTable->del($claimKey);
+                $this->reportOverflow($key);
+                return;
+            }
         }
 
-        return array_values(array_filter($decoded, static fn($entry) => is_string($entry) && $entry !== ''));
+        $this->registered[$key] = true;
     }
 
-    private function registerSampleKey(string $metaKey, string $sampleKey): void
+    /**
+     * Drop `$key` from the registry list `$list`, freeing its claim and slot
+     * rows. A later update registers the key again in a new slot.
+     */
+    private function deregister(string $list, string $key): void
     {
-        $indexKey = $this->sampleIndexKey($metaKey);
-        $entries = $this->getSampleKeys($metaKey);
-        if (!in_array($sampleKey, $entries, true)) {
-            $entries[] = $sampleKey;
-            $this->writeString($indexKey, $this->encodeJson($entries));
+        unset($this->registered[$key]);
+
+        $claimKey = $this->claimKey($key);
+        $slot = (int) $this->keyTable->get($claimKey, self::COLUMN_SLOT);
+        if ($slot === 0) {
+            // Not registered, or the winning worker has not written its slot yet.
+            return;
+        }
+
+        $this->keyTable->del($claimKey);
+        $slotKey = $this->slotKey($list, $slot - 1);
+        if ($this->keyTable->get($slotKey, self::COLUMN_KEY) === $key) {
+            $this->keyTable->del($slotKey);
         }
     }
 
+    private function claimKey(string $key): string
+    {
+        return self::PREFIX_CLAIM . hash('sha1', $key);
+    }
+
     /**
+     * Keys appended to `$list` since this worker last read it. Slots claimed
+     * but not written yet are retried on later calls, until they have been
+     * empty for ABANDONED_SLOT_SECONDS.
+     *
      * @return string[]
      */
-    private function getSampleKeys(string $metaKey): array
+    private function readNewKeys(string $list): array
     {
-        $indexKey = $this->sampleIndexKey($metaKey);
-        $payload = $this->readString($indexKey);
-        if ($payload === null || $payload === '') {
-            return [];
+        $cursor = $this->listCursors[$list] ?? ['read' => 0, 'pending' => []];
+        $count = (int) $this->keyTable->get(self::PREFIX_SLOTS . $list, self::COLUMN_COUNT);
+        $now = time();
+
+        $slots = $cursor['pending'];
+        for ($slot = $cursor['read']; $slot < $count; $slot++) {
+            $slots[$slot] = $now;
         }
 
-        $decoded = json_decode($payload, true);
-        if (!is_array($decoded)) {
-            return [];
+        $keys = [];
+        $pending = [];
+        foreach ($slots as $slot => $since) {
+            $key = $this->keyTable->get($this->slotKey($list, $slot), self::COLUMN_KEY);
+            if (is_string($key) && $key !== '') {
+                $keys[] = $key;
+            } elseif ($now - $since < self::ABANDONED_SLOT_SECONDS) {
+                $pending[$slot] = $since;
+            }
         }
 
-        return array_values(array_filter($decoded, static fn($entry) => is_string($entry) && $entry !== ''));
+        $this->listCursors[$list] = ['read' => max($cursor['read'], $count), 'pending' => $pending];
+
+        return $keys;
+    }
+
+    private function slotKey(string $list, int $slot): string
+    {
+        return self::PREFIX_SLOT . $list . ':' . $slot;
+    }
+
+    private function readGeneration(): int
+    {
+        return (int) $this->keyTable->get(self::KEY_GENERATION, self::COLUMN_COUNT);
+    }
+
+    /**
+     * Forget this worker's caches when another worker wiped the storage.
+     */
+    private function syncGeneration(): void
+    {
+        $generation = $this->readGeneration();
+        if ($generation === $this->generation) {
+            return;
+        }
+
+        $this->generation = $generation;
+        $this->registered = [];
+        $this->labelIdentifiers = [];
+        $this->listCursors = [];
+        $this->familyKeys = [];
+        $this->families = [];
+        $this->decodedLabels = [];
+    }
+
+    private function reportOverflow(string $key): void
+    {
+        if ($this->overflowReported) {
+            return;
+        }
+
+        $this->overflowReported = true;
+        error_log(sprintf(
+            '[metrics] Metric key registry is full; %s and later series are not exported. Raise metrics.storage.swoole_table.key_rows or enable high_cardinality.',
+            $key
+        ));
     }
 
     private function removeSummarySample(string $metaKey, string $sampleKey): void
     {
         $this->stringTable->del($sampleKey);
-        $entries = $this->getSampleKeys($metaKey);
-        $updated = array_values(array_filter($entries, static fn(string $entry): bool => $entry !== $sampleKey));
-        $this->writeString($this->sampleIndexKey($metaKey), $this->encodeJson($updated));
+        $this->deregister($this->metricIdentifierFromMetaKey($metaKey), $sampleKey);
     }
 
     private function incrementValue(string $key, float $value): float
@@ -513,6 +770,11 @@ class SwooleTableAdapter implements Adapter
             return;
         }
 
+        // Another worker may have deregistered the series after it expired.
+        if (isset($this->registered[$valueKey]) && !$this->keyTable->exists($this->claimKey($valueKey))) {
+            unset($this->registered[$valueKey]);
+        }
+
         $this->registerSampleKey($metaKey, $valueKey);
         $this->writeString($valueKey, $this->encodeJson($samples));
     }
@@ -581,11 +843,6 @@ class SwooleTableAdapter implements Adapter
         return 'index:' . $type;
     }
 
-    private function sampleIndexKey(string $metaKey): string
-    {
-        return self::PREFIX_SAMPLES . $this->metricIdentifierFromMetaKey($metaKey);
-    }
-
     /**
      * @param array<string, mixed> $data
      * @return array<string, mixed>
@@ -597,22 +854,16 @@ class SwooleTableAdapter implements Adapter
         return $meta;
     }
 
-    /**
-     * @param array<int, array{name: string, labelNames: array<int, string>, labelValues: array<int|string, scalar>, value: float|int}> $samples
-     */
-    private function sortSamples(array &$samples): void
-    {
-        usort($samples, static function (array $a, array $b): int {
-            return strcmp(implode('', $a['labelValues']), implode('', $b['labelValues']));
-        });
-    }
-
     /**
      * @param array<int|string, scalar|null> $values
      */
     private function encodeLabelValues(array $values): string
     {
         $json = $this->encodeJson($values);
+        if (isset($this->labelIdentifiers[$json])) {
+            return $this->labelIdentifiers[$json];
+        }
+
         $hash = substr(hash('sha1', $json), 0, 16);
         $storageKey = $this->labelStorageKey($hash);
 
@@ -620,7 +871,7 @@ class SwooleTableAdapter implements Adapter
             $this->stringTable->set($storageKey, [self::COLUMN_PAYLOAD => $json]);
         }
 
-        return $hash;
+        return $this->labelIdentifiers[$json] = $hash;
     }
 
     /**
@@ -649,7 +900,7 @@ class SwooleTableAdapter implements Adapter
 
     private function metricIdentifier(string $type, string $name): string
     {
-        return substr(hash('sha1', $type . ':' . $name), 0, 16);
+        return $this->metricIdentifiers[$type . ':' . $name] ??= substr(hash('sha1', $type . ':' . $name), 0, 16);
     }
 
     private function metricIdentifierFromMetaKey(string $metaKey): string
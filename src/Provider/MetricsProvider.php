@@ -7,6 +7,7 @@ namespace Bamboo\Provider;
 use Bamboo\Core\Application;
 use Bamboo\Observability\Metrics\CircuitBreakerMetrics;
 use Bamboo\Observability\Metrics\HttpMetrics;
+use Bamboo\Observability\Metrics\ScrapeCache;
 use Bamboo\Observability\Metrics\Storage\SwooleTableAdapter;
 use Prometheus\CollectorRegistry;
 use Prometheus\Exception\StorageException;
@@ -32,6 +33,13 @@ class MetricsProvider
 
         $app->singleton(RenderTextFormat::class, static fn(): RenderTextFormat => new RenderTextFormat());
 
+        $app->singleton(ScrapeCache::class, function (Application $app) {
+            $config = $app->config('metrics') ?? [];
+            $ttl = is_numeric($config['scrape_cache_ttl'] ?? null) ? (float) $config['scrape_cache_ttl'] : 0.0;
+
+            return new ScrapeCache(max(0.0, $ttl));
+        });
+
         $app->singleton(HttpMetrics::class, function (Application $app) {
             $config = $app->config('metrics') ?? [];
             $config['namespace'] = is_string($config['namespace'] ?? null) ? $config['namespace'] : 'bamboo';
@@ -83,9 +91,18 @@ class MetricsProvider
         $valueRows = isset($options['value_rows']) ? (int) $options['value_rows'] : 16384;
         $stringRows = isset($options['string_rows']) ? (int) $options['string_rows'] : 2048;
         $stringSize = isset($options['string_size']) ? (int) $options['string_size'] : 4096;
+        $keyRows = isset($options['key_rows']) ? (int) $options['key_rows'] : 2 * $valueRows;
+
+        if (!empty($options['high_cardinality'])) {
+            $maxSeries = isset($options['max_series']) ? (int) $options['max_series'] : 65536;
+            $valueRows = max($valueRows, $maxSeries);
+            $keyRows = max($keyRows, 2 * $maxSeries);
+            // Label sets are stored once each; most span several series (histogram buckets).
+            $stringRows = max($stringRows, intdiv($maxSeries, 8));
+        }
 
         try {
-            return new SwooleTableAdapter($valueRows, $stringRows, $stringSize);
+            return new SwooleTableAdapter($valueRows, $stringRows, $stringSize, $keyRows);
         } catch (StorageException $exception) {
             return new InMemory();
         }
@@ -5,6 +5,7 @@ declare(strict_types=1);
 namespace Bamboo\Web\Controller;
 
 use Bamboo\Core\Application;
+use Bamboo\Observability\Metrics\ScrapeCache;
 use Nyholm\Psr7\Response;
 use Prometheus\CollectorRegistry;
 use Prometheus\Exception\StorageException;
@@ -33,8 +34,11 @@ class MetricsController
         /** @var RenderTextFormat $renderer */
         $renderer = $this->app->get(RenderTextFormat::class);
 
+        $render = static fn(): string => $renderer->render($registry->getMetricFamilySamples());
+        $cache = $this->app->has(ScrapeCache::class) ? $this->app->get(ScrapeCache::class) : null;
+
         try {
-            $metrics = $registry->getMetricFamilySamples();
+            $body = $cache instanceof ScrapeCache ? $cache->remember($render) : $render();
         } catch (StorageException $exception) {
             return new Response(
                 503,
@@ -43,8 +47,6 @@ class MetricsController
             );
         }
 
-        $body = $renderer->render($metrics);
-
         return new Response(
             200,
             ['Content-Type' => RenderTextFormat::MIME_TYPE],
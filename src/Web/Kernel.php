@@ -24,9 +24,8 @@ class Kernel {
   protected array $expandedGlobal = [];
   /** @var array<string, list<string>> */
   protected array $resolved = [];
-  protected string $configHash = '';
-  protected ?string $routeCacheFile = null;
-  protected ?int $routeCacheMtime = null;
+  protected ?int $configRevision = null;
+  protected int $revision = 0;
 
   public function __construct(protected Config $configStore) {}
 
@@ -49,29 +48,35 @@ class Kernel {
     return $this->resolved[$signature];
   }
 
-  protected function refreshConfiguration(): void {
-    $middleware = $this->configStore->get('middleware') ?? [];
-    $hash = md5(serialize($middleware));
-    $routeCacheFileRaw = $this->configStore->get('cache.routes');
-    $routeCacheFile = is_string($routeCacheFileRaw) && $routeCacheFileRaw !== '' ? $routeCacheFileRaw : null;
-    $routeCacheMtime = null;
-    if ($routeCacheFile !== null && file_exists($routeCacheFile)) {
-      $mtime = filemtime($routeCacheFile);
-      $routeCacheMtime = $mtime === false ? null : $mtime;
-    }
+  /**
+   * Changes whenever resolved stacks are discarded; pipelines compiled from
+   * forRoute() results are stale once it does.
+   */
+  public function revision(): int {
+    $this->refreshConfiguration();
+    return $this->revision;
+  }
 
-    if ($hash !== $this->configHash) {
-      $this->config = $this->normalizeConfiguration($middleware);
-      $this->expandedGlobal = $this->expandEntries($this->config['global']);
-      $this->configHash = $hash;
-      $this->resolved = [];
-    }
+  /**
+   * Discard every resolved stack, e.g. after the route table changed.
+   */
+  public function invalidate(): void {
+    $this->resolved = [];
+    $this->revision++;
+  }
 
-    if ($routeCacheFile !== $this->routeCacheFile || $routeCacheMtime !== $this->routeCacheMtime) {
-      $this->routeCacheFile = $routeCacheFile;
-      $this->routeCacheMtime = $routeCacheMtime;
-      $this->resolved = [];
-    }
+  /**
+   * Re-read the middleware configuration when Config::revision() signals a
+   * change (Config::set(), module contributions).
+   */
+  protected function refreshConfiguration(): void {
+    $revision = $this->configStore->revision();
+    if ($revision === $this->configRevision) return;
+
+    $this->config = $this->normalizeConfiguration($this->configStore->get('middleware') ?? []);
+    $this->expandedGlobal = $this->expandEntries($this->config['global']);
+    $this->configRevision = $revision;
+    $this->invalidate();
   }
 
   /**
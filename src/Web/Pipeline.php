@@ -0,0 +1,71 @@
+<?php
+namespace Bamboo\Web;
+
+use Psr\Http\Message\ResponseInterface;
+use Psr\Http\Message\ServerRequestInterface as Request;
+
+/**
+ * A route's middleware stack, compiled once per worker and run for every
+ * request that matches the route. Instances are shared between requests, so
+ * middleware must keep per-request state on the request or RequestContext.
+ */
+final class Pipeline {
+  /** @var list<object> */
+  private array $middleware;
+  /** @var list<bool> */
+  private array $terminable = [];
+
+  /**
+   * @param list<object> $middleware outermost first; each must define handle()
+   */
+  public function __construct(array $middleware) {
+    $this->middleware = array_values($middleware);
+    foreach ($this->middleware as $instance) {
+      if (!method_exists($instance, 'handle')) {
+        throw new \BadMethodCallException(sprintf('Middleware %s must define a handle() method.', $instance::class));
+      }
+      $this->terminable[] = is_callable([$instance, 'terminate']);
+    }
+  }
+
+  public function count(): int {
+    return count($this->middleware);
+  }
+
+  /**
+   * Run `$request` through the stack into `$destination`, then call the
+   * terminable middleware (innermost first) with the final response.
+   *
+   * @param \Closure(Request): ResponseInterface $destination
+   */
+  public function handle(Request $request, \Closure $destination): ResponseInterface {
+    /** @var list<array{0: object, 1: Request}> $terminators */
+    $terminators = [];
+    $response = $this->call(0, $request, $destination, $terminators);
+    foreach ($terminators as [$instance, $terminatorRequest]) {
+      $instance->terminate($terminatorRequest, $response);
+    }
+    return $response;
+  }
+
+  /**
+   * @param \Closure(Request): ResponseInterface $destination
+   * @param list<array{0: object, 1: Request}> $terminators
+   */
+  private function call(int $index, Request $request, \Closure $destination, array &$terminators): ResponseInterface {
+    if (!isset($this->middleware[$index])) {
+      return $destination($request);
+    }
+
+    $instance = $this->middleware[$index];
+    $requestForTerminate = $request;
+    $response = $instance->handle($request, function(Request $nextRequest) use ($index, $destination, &$terminators, &$requestForTerminate) {
+      $requestForTerminate = $nextRequest;
+      return $this->call($index + 1, $nextRequest, $destination, $terminators);
+    });
+    if ($this->terminable[$index]) {
+      $terminators[] = [$instance, $requestForTerminate];
+    }
+    return $response;
+  }
+}
@@ -24,8 +24,10 @@ final class JsonUserRepositoryTest extends TestCase
 
     protected function tearDown(): void
     {
-        if (is_file($this->file)) {
-            @unlink($this->file);
+        foreach ([$this->file, $this->file . '.lock'] as $file) {
+            if (is_file($file)) {
+                @unlink($file);
+            }
         }
         parent::tearDown();
     }
@@ -66,4 +68,95 @@ final class JsonUserRepositoryTest extends TestCase
         $sanitized = $repo->sanitize($user);
         $this->assertArrayNotHasKey('password_hash', $sanitized);
     }
+
+    public function testLookupsAreCaseInsensitive(): void
+    {
+        $repo = new JsonUserRepository($this->file);
+        $repo->create('Dave', 'secret');
+
+        $this->assertSame('Dave', $repo->find('dave')['username'] ?? null);
+        $this->assertSame('Dave', $repo->find(' DAVE ')['username'] ?? null);
+        $this->assertNull($repo->create('dAVE', 'other'));
+        $this->assertCount(1, $repo->all());
+    }
+
+    public function testWritesAreVisibleToOtherWorkers(): void
+    {
+        $first = new JsonUserRepository($this->file);
+        $second = new JsonUserRepository($this->file);
+        $this->assertNull($second->find('erin'));
+
+        $first->create('erin', 'secret');
+        $this->assertNotNull($second->find('erin'));
+
+        $second->create('frank', 'secret');
+        $this->assertNotNull($first->find('frank'));
+        $this->assertSame(['erin', 'frank'], array_column($first->all(), 'username'));
+        $this->assertSame([], glob($this->file . '.*.tmp'));
+    }
+
+    public function testConcurrentRegistrationsAreAllKept(): void
+    {
+        if (!function_exists('pcntl_fork')) {
+            $this->markTestSkipped('The pcntl extension is required.');
+        }
+
+        // Both instances cached the empty store before either registered anyone.
+        $stale = new JsonUserRepository($this->file);
+        $this->assertSame([], $stale->all());
+
+        $workers = 4;
+        $perWorker = 5;
+        $children = [];
+        for ($worker = 0; $worker < $workers; $worker++) {
+            $pid = pcntl_fork();
+            if ($pid === -1) {
+                $this->fail('Unable to fork.');
+            }
+            if ($pid === 0) {
+                $repo = new JsonUserRepository($this->file);
+                for ($i = 0; $i < $perWorker; $i++) {
+                    $repo->create(sprintf('worker%d-user%d', $worker, $i), 'secret');
+                }
+                exit(0);
+            }
+            $children[] = $pid;
+        }
+        foreach ($children as $pid) {
+            pcntl_waitpid($pid, $status);
+        }
+
+        $this->assertNotNull($stale->create('parent', 'secret'));
+        $this->assertNull($stale->create('WORKER0-USER0', 'secret'));
+        $this->assertCount($workers * $perWorker + 1, (new JsonUserRepository($this->file))->all());
+    }
+
+    public function testExternalChangesAreReloaded(): void
+    {
+        $repo = new JsonUserRepository($this->file);
+        $repo->create('grace', 'secret');
+        $this->assertNotNull($repo->find('grace'));
+
+        file_put_contents($this->file, json_encode([['username' => 'heidi', 'password_hash' => 'x']]));
+        $this->assertNull($repo->find('grace'));
+        $this->assertNotNull($repo->find('heidi'));
+
+        unlink($this->file);
+        $this->assertNull($repo->find('heidi'));
+        $this->assertSame([], $repo->all());
+    }
+
+    public function testUnchangedFileIsNotReparsed(): void
+    {
+        file_put_contents($this->file, json_encode([['username' => 'ivan', 'password_hash' => 'x']]));
+        $repo = new JsonUserRepository($this->file);
+        $this->assertNotNull($repo->find('ivan'));
+
+        // Same inode, size and mtime: the indexed copy keeps being served.
+        $mtime = filemtime($this->file);
+        file_put_contents($this->file, json_encode([['username' => 'judy', 'password_hash' => 'x']]));
+        touch($this->file, $mtime);
+        $this->assertNotNull($repo->find('ivan'));
+        $this->assertNull($repo->find('judy'));
+    }
 }
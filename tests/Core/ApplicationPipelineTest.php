@@ -96,6 +96,17 @@ class TerminableBetaMiddleware {
   }
 }
 
+class CountingMiddleware {
+  public static int $instances = 0;
+
+  public function __construct() { self::$instances++; }
+
+  public function handle(Request $request, \Closure $next): ResponseInterface {
+    PipelineRecorder::$events[] = 'counting';
+    return $next($request);
+  }
+}
+
 class ArrayConfig extends Config {
   /**
    * @param array<string, mixed> $configuration
@@ -112,12 +123,12 @@ class ArrayConfig extends Config {
    */
   public function setMiddleware(array $middleware): void {
     $this->configuration['middleware'] = $middleware;
-    $this->items['middleware'] = $middleware;
+    $this->set('middleware', $middleware);
   }
 
   public function setRouteCache(?string $path): void {
     $this->configuration['cache']['routes'] = $path;
-    $this->items['cache']['routes'] = $path;
+    $this->set('cache.routes', $path);
   }
 }
 
@@ -303,10 +314,7 @@ class ApplicationPipelineTest extends TestCase {
     $this->assertSame([BetaMiddleware::class], $second);
   }
 
-  public function testKernelCacheInvalidatesWhenRouteCacheTimestampChanges(): void {
-    $temp = tempnam(sys_get_temp_dir(), 'bamboo_routes_');
-    touch($temp);
-
+  public function testKernelCacheInvalidatesOnExplicitSignal(): void {
     $config = $this->baseConfig([
       'global' => [],
       'groups' => [],
@@ -314,21 +322,76 @@ class ApplicationPipelineTest extends TestCase {
         'alpha' => AlphaMiddleware::class,
         'beta' => BetaMiddleware::class,
       ],
-    ], $temp);
+    ]);
 
     $kernel = new Kernel($config);
 
     $first = $kernel->forRoute('GET /cache', ['alpha']);
     $this->assertSame([AlphaMiddleware::class], $first);
+    $revision = $kernel->revision();
 
-    clearstatcache();
-    touch($temp, time() + 2);
-    clearstatcache();
+    $this->assertSame([AlphaMiddleware::class], $kernel->forRoute('GET /cache', ['beta']));
+    $this->assertSame($revision, $kernel->revision(), 'Unchanged configuration must not invalidate the cache.');
+
+    $kernel->invalidate();
 
     $second = $kernel->forRoute('GET /cache', ['beta']);
     $this->assertSame([BetaMiddleware::class], $second);
+    $this->assertNotSame($revision, $kernel->revision());
+  }
+
+  public function testPipelinesAreCompiledOnceWithSharedMiddleware(): void {
+    CountingMiddleware::$instances = 0;
+    $config = $this->baseConfig([
+      'global' => ['counting'],
+      'groups' => [],
+      'aliases' => [
+        'counting' => CountingMiddleware::class,
+        'alpha' => AlphaMiddleware::class,
+      ],
+    ]);
+    $app = $this->createApp($config);
+    $router = $app->get('router');
+    $router->get('/one', RouteDefinition::forHandler(fn() => new Response(200, [], 'one')));
+    $router->get('/two', RouteDefinition::forHandler(fn() => new Response(200, [], 'two'), middleware: ['alpha']));
+
+    $app->handle(new ServerRequest('GET', '/one'));
+    $pipeline = $app->pipeline($router, 'GET /one');
+    $app->handle(new ServerRequest('GET', '/one'));
+    $app->handle(new ServerRequest('GET', '/two'));
+
+    $this->assertSame($pipeline, $app->pipeline($router, 'GET /one'));
+    $this->assertSame(1, CountingMiddleware::$instances);
+    $this->assertSame(2, $app->pipeline($router, 'GET /two')->count());
+    $this->assertSame(['counting', 'counting', 'counting', 'alpha:before', 'alpha:after'], PipelineRecorder::$events);
+  }
+
+  public function testPipelinesAreRebuiltWhenConfigurationOrRoutesChange(): void {
+    $middleware = [
+      'global' => ['alpha'],
+      'groups' => [],
+      'aliases' => [
+        'alpha' => AlphaMiddleware::class,
+        'beta' => BetaMiddleware::class,
+      ],
+    ];
+    $config = $this->baseConfig($middleware);
+    $app = $this->createApp($config);
+    $router = $app->get('router');
+    $router->get('/swap', RouteDefinition::forHandler(fn() => new Response(200, [], 'ok')));
+
+    $this->assertSame('1', $app->handle(new ServerRequest('GET', '/swap'))->getHeaderLine('X-Alpha'));
+
+    $config->setMiddleware(['global' => ['beta']] + $middleware);
+    $response = $app->handle(new ServerRequest('GET', '/swap'));
+    $this->assertSame('', $response->getHeaderLine('X-Alpha'));
+    $this->assertSame('1', $response->getHeaderLine('X-Beta'));
 
-    @unlink($temp);
+    // Re-registering the route (as a reloaded route cache does) picks up its new middleware.
+    $router->get('/swap', RouteDefinition::forHandler(fn() => new Response(200, [], 'ok'), middleware: ['alpha']));
+    $response = $app->handle(new ServerRequest('GET', '/swap'));
+    $this->assertSame('1', $response->getHeaderLine('X-Alpha'));
+    $this->assertSame('1', $response->getHeaderLine('X-Beta'));
   }
 
   public function testKernelCachesSingleEntryForUnmatchedRoutes(): void {
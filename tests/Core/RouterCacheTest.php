@@ -4,6 +4,8 @@ namespace Tests\Core;
 
 use Bamboo\Console\Command\RoutesCache;
 use Bamboo\Core\Router;
+use FastRoute\Dispatcher;
+use Nyholm\Psr7\ServerRequest;
 use PHPUnit\Framework\TestCase;
 use Tests\Support\RouterTestApplication;
 
@@ -25,6 +27,8 @@ class RouterCacheTest extends TestCase {
     $cacheFile = $this->tempCacheFile();
     $router->cacheTo($cacheFile);
     $this->assertFileExists($cacheFile);
+    $cached = require $cacheFile;
+    $this->assertSame(Router::CACHE_FORMAT, $cached['format']);
     $this->assertSame([
       'GET' => [
         '/users' => [
@@ -42,7 +46,7 @@ class RouterCacheTest extends TestCase {
           'signature' => 'POST /users',
         ],
       ],
-    ], require $cacheFile);
+    ], $cached['routes']);
   }
 
   public function testCacheToRejectsClosures(): void {
@@ -84,6 +88,7 @@ class RouterCacheTest extends TestCase {
     }
     $this->assertSame(0, $exitCode);
     $this->assertStringContainsString("Routes cached -> {$cacheFile}", $output);
+    $this->assertStringContainsString('Reload the HTTP server workers', $output);
     $this->assertFileExists($cacheFile);
     $this->assertSame([
       'GET' => [
@@ -94,7 +99,139 @@ class RouterCacheTest extends TestCase {
           'signature' => 'GET /users',
         ],
       ],
-    ], require $cacheFile);
+    ], (require $cacheFile)['routes']);
+  }
+
+  public function testDispatcherIsCompiledOnceUntilRoutesChange(): void {
+    $router = new Router();
+    $router->get('/users', [DummyController::class, 'index']);
+    $dispatcher = $router->dispatcher();
+
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/users'))['status']);
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/users'))['status']);
+    $this->assertSame($dispatcher, $router->dispatcher());
+
+    $router->post('/users', [DummyController::class, 'store']);
+    $this->assertNotSame($dispatcher, $router->dispatcher());
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('POST', '/users'))['status']);
+  }
+
+  public function testLoadCacheRestoresRoutesAndVariables(): void {
+    $cacheFile = $this->tempCacheFile();
+    $source = new Router();
+    $source->get('/users/{id:\\d+}', [DummyController::class, 'index'], ['alpha']);
+    $source->cacheTo($cacheFile);
+
+    $router = new Router();
+    $this->assertTrue($router->loadCache($cacheFile));
+    $this->assertSame($source->all(), $router->all());
+
+    $match = $router->match(new ServerRequest('GET', '/users/42'));
+    $this->assertSame(Dispatcher::FOUND, $match['status']);
+    $this->assertSame(['id' => '42'], $match['vars']);
+    $this->assertSame('GET /users/{id:\\d+}', $match['route']['signature'] ?? null);
+    $this->assertSame(['alpha'], $match['route']['middleware'] ?? null);
+    $this->assertSame(Dispatcher::NOT_FOUND, $router->match(new ServerRequest('GET', '/users/abc'))['status']);
+  }
+
+  public function testLoadCacheDispatchesFromPrecompiledData(): void {
+    $cacheFile = $this->tempCacheFile();
+    $source = new Router();
+    $source->get('/users', [DummyController::class, 'index']);
+    $source->cacheTo($cacheFile);
+
+    // Only the compiled data knows the route: matching must not recompile.
+    $cached = require $cacheFile;
+    $cached['routes'] = [];
+    file_put_contents($cacheFile, "<?php\nreturn " . var_export($cached, true) . ";\n");
+
+    $router = new Router();
+    $this->assertTrue($router->loadCache($cacheFile));
+    $this->assertSame([], $router->all());
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/users'))['status']);
+  }
+
+  public function testReloadPicksUpAChangedCacheFile(): void {
+    $cacheFile = $this->tempCacheFile();
+    $first = new Router();
+    $first->get('/users', [DummyController::class, 'index']);
+    $first->cacheTo($cacheFile);
+
+    $router = new Router();
+    $router->loadCache($cacheFile);
+    $this->assertFalse($router->reload());
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/users'))['status']);
+    $this->assertSame(Dispatcher::NOT_FOUND, $router->match(new ServerRequest('GET', '/posts'))['status']);
+
+    $second = new Router();
+    $second->get('/posts', [DummyController::class, 'index']);
+    $second->cacheTo($cacheFile);
+
+    // Matching does not look at the file; only an explicit reload does.
+    $this->assertSame(Dispatcher::NOT_FOUND, $router->match(new ServerRequest('GET', '/posts'))['status']);
+    $revision = $router->revision();
+    $this->assertTrue($router->reload());
+    $this->assertNotSame($revision, $router->revision());
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/posts'))['status']);
+    $this->assertSame(Dispatcher::NOT_FOUND, $router->match(new ServerRequest('GET', '/users'))['status']);
+
+    // Deleting the cache keeps the routes that were loaded last.
+    unlink($cacheFile);
+    $this->assertFalse($router->reload());
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/posts'))['status']);
+  }
+
+  public function testRoutesRegisteredAfterLoadingSurviveReloads(): void {
+    $cacheFile = $this->tempCacheFile();
+    $first = new Router();
+    $first->get('/users', [DummyController::class, 'index']);
+    $first->get('/shared', [DummyController::class, 'index']);
+    $first->cacheTo($cacheFile);
+
+    $router = new Router();
+    $router->loadCache($cacheFile);
+    // e.g. a module's boot() registering its routes after the cache was loaded
+    $router->get('/module', [DummyController::class, 'store']);
+    $router->get('/shared', [DummyController::class, 'store'], ['alpha']);
+
+    $second = new Router();
+    $second->get('/posts', [DummyController::class, 'index']);
+    $second->get('/shared', [DummyController::class, 'index']);
+    $second->cacheTo($cacheFile);
+    $this->assertTrue($router->reload());
+
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/posts'))['status']);
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/module'))['status']);
+    $this->assertSame(Dispatcher::NOT_FOUND, $router->match(new ServerRequest('GET', '/users'))['status']);
+    $shared = $router->match(new ServerRequest('GET', '/shared'));
+    $this->assertSame([DummyController::class, 'store'], $shared['route']['handler'] ?? null);
+    $this->assertSame(['alpha'], $shared['route']['middleware'] ?? null);
+  }
+
+  public function testLoadCacheAcceptsLegacyRouteMaps(): void {
+    $cacheFile = $this->tempCacheFile();
+    $legacy = [
+      'GET' => [
+        '/legacy' => [
+          'handler' => [DummyController::class, 'index'],
+          'middleware' => [],
+          'middleware_groups' => [],
+          'signature' => 'GET /legacy',
+        ],
+      ],
+    ];
+    file_put_contents($cacheFile, "<?php\nreturn " . var_export($legacy, true) . ";\n");
+
+    $router = new Router();
+    $this->assertTrue($router->loadCache($cacheFile));
+    $this->assertSame($legacy, $router->all());
+    $this->assertSame(Dispatcher::FOUND, $router->match(new ServerRequest('GET', '/legacy'))['status']);
+  }
+
+  public function testLoadCacheIgnoresMissingFiles(): void {
+    $router = new Router();
+    $this->assertFalse($router->loadCache($this->tempCacheFile()));
+    $this->assertSame([], $router->all());
   }
 
   private function tempCacheFile(): string {
@@ -0,0 +1,46 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Tests\Observability;
+
+use Bamboo\Observability\Metrics\ScrapeCache;
+use PHPUnit\Framework\TestCase;
+
+class ScrapeCacheTest extends TestCase
+{
+    public function testBodyIsReusedUntilTheTtlExpires(): void
+    {
+        $now = 100.0;
+        $cache = new ScrapeCache(1.5, static function () use (&$now): float {
+            return $now;
+        });
+        $renders = 0;
+        $render = static function () use (&$renders): string {
+            $renders++;
+            return 'body ' . $renders;
+        };
+
+        $this->assertSame('body 1', $cache->remember($render));
+        $now += 1.0;
+        $this->assertSame('body 1', $cache->remember($render));
+        $now += 0.5;
+        $this->assertSame('body 2', $cache->remember($render));
+
+        $cache->clear();
+        $this->assertSame('body 3', $cache->remember($render));
+    }
+
+    public function testZeroTtlRendersEveryScrape(): void
+    {
+        $cache = new ScrapeCache(0.0);
+        $renders = 0;
+        $render = static function () use (&$renders): string {
+            return 'body ' . ++$renders;
+        };
+
+        $this->assertFalse($cache->enabled());
+        $this->assertSame('body 1', $cache->remember($render));
+        $this->assertSame('body 2', $cache->remember($render));
+    }
+}
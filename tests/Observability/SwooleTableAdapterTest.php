@@ -0,0 +1,197 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Tests\Observability;
+
+use Bamboo\Observability\Metrics\Storage\SwooleTableAdapter;
+use PHPUnit\Framework\TestCase;
+use Prometheus\CollectorRegistry;
+use Prometheus\MetricFamilySamples;
+
+class SwooleTableAdapterTest extends TestCase
+{
+    public function testSeriesBeyondTheOldIndexLimitAreAllCollected(): void
+    {
+        $registry = new CollectorRegistry(new SwooleTableAdapter(), false);
+        $counter = $registry->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route']);
+        for ($i = 0; $i < 500; $i++) {
+            $counter->inc(['/route/' . $i]);
+            $counter->inc(['/route/' . $i]);
+        }
+
+        $samples = $this->family($registry, 'app_hits_total')->getSamples();
+        $this->assertCount(500, $samples);
+        foreach ($samples as $sample) {
+            $this->assertSame(2.0, (float) $sample->getValue());
+        }
+    }
+
+    public function testWorkersRegisterEachSeriesOnce(): void
+    {
+        $adapter = new SwooleTableAdapter();
+        $workerOne = new CollectorRegistry($adapter, false);
+        $workerOne->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route'])->inc(['/a']);
+
+        // A forked worker shares the tables but starts with its own registration cache.
+        $workerTwo = new CollectorRegistry(clone $adapter, false);
+        $workerTwo->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route'])->inc(['/a']);
+        $workerTwo->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route'])->inc(['/b']);
+        $workerOne->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route'])->inc(['/b']);
+
+        $families = array_filter(
+            $workerOne->getMetricFamilySamples(),
+            static fn(MetricFamilySamples $family): bool => $family->getName() === 'app_hits_total'
+        );
+        $this->assertCount(1, $families);
+
+        $values = [];
+        foreach ($this->family($workerOne, 'app_hits_total')->getSamples() as $sample) {
+            $values[] = [$sample->getLabelValues(), (float) $sample->getValue()];
+        }
+        $this->assertSame([[['/a'], 2.0], [['/b'], 2.0]], $values);
+    }
+
+    public function testHistogramBucketsAreAccumulated(): void
+    {
+        $registry = new CollectorRegistry(new SwooleTableAdapter(), false);
+        $histogram = $registry->getOrRegisterHistogram('app', 'latency_seconds', 'Latency', ['route'], [0.1, 0.5]);
+        $histogram->observe(0.05, ['/a']);
+        $histogram->observe(0.3, ['/a']);
+        $histogram->observe(2.0, ['/a']);
+
+        $values = [];
+        foreach ($this->family($registry, 'app_latency_seconds')->getSamples() as $sample) {
+            $values[$sample->getName() . '|' . implode(',', $sample->getLabelValues())] = (float) $sample->getValue();
+        }
+
+        $this->assertSame([
+            'app_latency_seconds_bucket|/a,0.1' => 1.0,
+            'app_latency_seconds_bucket|/a,0.5' => 2.0,
+            'app_latency_seconds_bucket|/a,+Inf' => 3.0,
+            'app_latency_seconds_count|/a' => 3.0,
+            'app_latency_seconds_sum|/a' => 2.35,
+        ], $values);
+    }
+
+    public function testWipeStorageResetsEveryWorker(): void
+    {
+        $adapter = new SwooleTableAdapter();
+        $workerOne = new CollectorRegistry($adapter, false);
+        $workerTwo = new CollectorRegistry(clone $adapter, false);
+        $workerOne->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route'])->inc(['/a']);
+        $workerTwo->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route'])->inc(['/a']);
+
+        $adapter->wipeStorage();
+        $this->assertSame([], $workerOne->getMetricFamilySamples());
+
+        $workerTwo->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route'])->inc(['/a']);
+        $samples = $this->family($workerOne, 'app_hits_total')->getSamples();
+        $this->assertCount(1, $samples);
+        $this->assertSame(1.0, (float) $samples[0]->getValue());
+    }
+
+    public function testRepeatedScrapesPickUpNewSeriesAndValues(): void
+    {
+        $adapter = new SwooleTableAdapter();
+        $registry = new CollectorRegistry($adapter, false);
+        $scraper = new CollectorRegistry(clone $adapter, false);
+        $counter = $registry->getOrRegisterCounter('app', 'hits_total', 'Hits', ['route']);
+        $counter->inc(['/b']);
+
+        $this->assertSame([['/b', 1.0]], $this->scalarValues($scraper, 'app_hits_total'));
+
+        $counter->inc(['/b']);
+        $counter->inc(['/a']);
+        $registry->getOrRegisterGauge('app', 'in_flight', 'In flight', ['route'])->set(3, ['/a']);
+
+        $this->assertSame([['/a', 1.0], ['/b', 2.0]], $this->scalarValues($scraper, 'app_hits_total'));
+        $this->assertSame([['/a', 3.0]], $this->scalarValues($scraper, 'app_in_flight'));
+    }
+
+    public function testExpiredSummarySeriesLeaveTheRegistry(): void
+    {
+        $adapter = new SwooleTableAdapter();
+        $registry = new CollectorRegistry($adapter, false);
+        $scraper = new CollectorRegistry(clone $adapter, false);
+        $summary = $registry->getOrRegisterSummary('app', 'payload_bytes', 'Payload', ['route'], 60);
+        $summary->observe(10, ['/a']);
+        $summary->observe(20, ['/b']);
+        $this->assertSame(['/a', '/b'], $this->summaryRoutes($scraper, 'app_payload_bytes'));
+
+        $keyTable = $this->table($adapter, 'keyTable');
+        $rows = count($keyTable);
+        $this->expireSummarySamples($adapter);
+        $summary->observe(30, ['/b']);
+
+        $this->assertSame(['/b'], $this->summaryRoutes($scraper, 'app_payload_bytes'));
+        $this->assertCount($rows - 2, $keyTable);
+
+        // The writer still has the series cached as registered; it must register it again.
+        $summary->observe(40, ['/a']);
+        $this->assertSame(['/a', '/b'], $this->summaryRoutes($scraper, 'app_payload_bytes'));
+        $this->assertSame(['/a', '/b'], $this->summaryRoutes(new CollectorRegistry(clone $adapter, false), 'app_payload_bytes'));
+        $this->assertCount($rows, $keyTable);
+    }
+
+    /**
+     * @return list<string>
+     */
+    private function summaryRoutes(CollectorRegistry $registry, string $name): array
+    {
+        $routes = [];
+        foreach ($this->family($registry, $name)->getSamples() as $sample) {
+            if ($sample->getName() === $name . '_count') {
+                $routes[] = $sample->getLabelValues()[0];
+            }
+        }
+        sort($routes);
+
+        return $routes;
+    }
+
+    private function expireSummarySamples(SwooleTableAdapter $adapter): void
+    {
+        $stringTable = $this->table($adapter, 'stringTable');
+        foreach ($stringTable as $key => $row) {
+            if (str_starts_with((string) $key, 'sample:')) {
+                $samples = json_decode($row['payload'], true);
+                foreach ($samples as $index => $sample) {
+                    $samples[$index]['time'] = 0;
+                }
+                $stringTable->set((string) $key, ['payload' => json_encode($samples)]);
+            }
+        }
+    }
+
+    private function table(SwooleTableAdapter $adapter, string $property): \OpenSwoole\Table
+    {
+        $reflection = new \ReflectionProperty(SwooleTableAdapter::class, $property);
+
+        return $reflection->getValue($adapter);
+    }
+
+    /**
+     * @return list<array{0: string, 1: float}>
+     */
+    private function scalarValues(CollectorRegistry $registry, string $name): array
+    {
+        $values = [];
+        foreach ($this->family($registry, $name)->getSamples() as $sample) {
+            $values[] = [$sample->getLabelValues()[0], (float) $sample->getValue()];
+        }
+
+        return $values;
+    }
+
+    private function family(CollectorRegistry $registry, string $name): MetricFamilySamples
+    {
+        foreach ($registry->getMetricFamilySamples() as $family) {
+            if ($family->getName() === $name) {
+                return $family;
+            }
+        }
+
+        $this->fail('Metric family not found: ' . $name);
+    }
+}
@@ -0,0 +1,78 @@
+"""Round trips through the `.bba` format of docs/tools/bench_archive.py."""
+
+from __future__ import annotations
+
+import csv
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "docs" / "tools"))
+
+import bench_archive  # noqa: E402
+from bench_archive import Archive, archive_to_csv, csv_to_archive, read_metadata  # noqa: E402
+
+CSV = (
+    "scenario,concurrency,requests_per_second,p99_ms,ratio,error_count,target\n"
+    "baseline-1.0,1,1520.25,1.5,0.1,0,http://127.0.0.1:9501/\n"
+    "baseline-1.0,64,48211.7,12.875,0.30000000000000004,3,http://127.0.0.1:9501/\n"
+    '"baseline ""q""",4096,90210.125,,-2.5e-12,-1,"a,b"\n'
+)
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _rows(path: Path):
+    with path.open(encoding="utf-8", newline="") as handle:
+        return list(csv.reader(handle))
+
+
+@pytest.mark.parametrize("vectorised", [True, False])
+def test_archive_round_trips_every_value(tmp_path, monkeypatch, vectorised):
+    if not vectorised:
+        monkeypatch.setattr(bench_archive, "np", None)
+    source = tmp_path / "run.csv"
+    source.write_text(CSV, encoding="utf-8")
+    metadata = {"commit": "abc123", "php_version": "8.4.1"}
+
+    assert csv_to_archive(source, tmp_path / "run.bba", metadata) == 3
+    rows, restored_metadata = archive_to_csv(tmp_path / "run.bba", tmp_path / "back.csv")
+
+    assert rows == 3
+    assert restored_metadata == metadata
+    assert read_metadata(tmp_path / "run.bba") == metadata
+    original, restored = _rows(source), _rows(tmp_path / "back.csv")
+    assert restored[0] == original[0]
+    for before, after in zip(original[1:], restored[1:]):
+        for raw, text in zip(before, after):
+            if _is_number(raw):
+                assert float(text) == float(raw)
+            else:
+                assert text == raw
+
+
+def test_archive_picks_narrow_column_types(tmp_path):
+    source = tmp_path / "run.csv"
+    source.write_text(CSV, encoding="utf-8")
+    csv_to_archive(source, tmp_path / "run.bba")
+
+    with Archive(tmp_path / "run.bba") as archive:
+        kinds = {name: archive.kind(name) for name in archive.fieldnames}
+        assert archive.distinct("scenario") == {"baseline-1.0", 'baseline "q"'}
+
+    assert kinds == {
+        "scenario": "string",
+        "concurrency": "int",
+        "requests_per_second": "decimal",
+        "p99_ms": "float",
+        "ratio": "float",
+        "error_count": "int",
+        "target": "string",
+    }
@@ -0,0 +1,53 @@
+"""Regression classification in docs/tools/bench_compare.py."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "docs" / "tools"))
+
+from bench_compare import _classify, compare_samples  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    ("metric", "delta", "low", "high", "expected"),
+    [
+        ("throughput", -12.0, -15.0, -8.0, "regression"),
+        ("throughput", 12.0, 8.0, 15.0, "improved"),
+        ("throughput", -8.0, -12.0, -2.0, "inconclusive"),
+        ("throughput", -1.0, -3.0, 1.0, "ok"),
+        ("latency_p99", 12.0, 8.0, 15.0, "regression"),
+        ("latency_p99", -12.0, -15.0, -8.0, "improved"),
+    ],
+)
+def test_classify_requires_the_whole_interval_past_the_threshold(
+    metric, delta, low, high, expected
+):
+    assert _classify(metric, delta, low, high, 5.0) == expected
+
+
+@pytest.mark.parametrize(
+    ("delta", "default", "point_estimate"),
+    [(-12.0, "inconclusive", "regression"), (12.0, "inconclusive", "improved"), (3.0, "ok", "ok")],
+)
+def test_classify_without_interval_only_gates_on_request(delta, default, point_estimate):
+    assert _classify("throughput", delta, None, None, 5.0) == default
+    assert _classify("throughput", delta, None, None, 5.0, point_estimates=True) == point_estimate
+
+
+def test_compare_samples_attaches_intervals_to_repeated_runs():
+    baseline = {("json", 64): {"throughput": [1000.0, 1010.0, 990.0]}}
+    candidate = {("json", 64): {"throughput": [800.0, 810.0, 790.0]}}
+    single = {("json", 64): {"throughput": [800.0]}}
+
+    (repeated,) = compare_samples(baseline, candidate, resamples=500)
+    (lone,) = compare_samples(baseline, single, resamples=500)
+
+    assert repeated.status == "regression"
+    assert repeated.ci_low_pct < repeated.delta_pct < repeated.ci_high_pct < -5.0
+    assert lone.status == "inconclusive"
+    assert lone.ci_low_pct is None
+    assert compare_samples(baseline, single, point_estimates=True)[0].status == "regression"
@@ -0,0 +1,66 @@
+"""USL fitting in docs/tools/capacity.py."""
+
+from __future__ import annotations
+
+import math
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "docs" / "tools"))
+
+import capacity  # noqa: E402
+from capacity import MIN_USL_LEVELS, UslFit, fit_usl, usl_band  # noqa: E402
+
+TRUE = UslFit(1000.0, 0.05, 0.001, 0, 1.0)
+LEVELS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def _sweep(noise: float, repeats: int, seed: int = 7):
+    rng = random.Random(seed)
+    concurrency, throughput = [], []
+    for level in LEVELS:
+        for _ in range(repeats):
+            concurrency.append(level)
+            throughput.append(TRUE.throughput(level) * (1.0 + rng.gauss(0.0, noise)))
+    return concurrency, throughput
+
+
+def test_fit_usl_recovers_an_exact_curve():
+    fit = fit_usl(*_sweep(noise=0.0, repeats=1))
+
+    assert fit.levels == len(LEVELS)
+    assert fit.throughput_per_client == pytest.approx(1000.0, rel=1e-4)
+    assert fit.contention == pytest.approx(0.05, rel=1e-3)
+    assert fit.coherency == pytest.approx(0.001, rel=1e-3)
+    assert fit.peak_concurrency == pytest.approx(math.sqrt(0.95 / 0.001), rel=1e-3)
+    assert fit.r_squared == pytest.approx(1.0)
+
+
+def test_fit_usl_on_noisy_repeats_locates_the_peak():
+    fit = fit_usl(*_sweep(noise=0.03, repeats=5))
+
+    assert fit.peak_concurrency == pytest.approx(TRUE.peak_concurrency, rel=0.15)
+    assert fit.peak_throughput == pytest.approx(TRUE.peak_throughput, rel=0.05)
+    # Run-to-run spread cannot be explained by the model, so R² drops below 1.
+    assert 0.9 < fit.r_squared < 1.0
+
+
+def test_fit_usl_needs_enough_levels():
+    assert fit_usl(LEVELS[: MIN_USL_LEVELS - 1], [100.0] * (MIN_USL_LEVELS - 1)) is None
+
+
+@pytest.mark.parametrize("vectorised", [True, False])
+def test_usl_band_brackets_the_fit(monkeypatch, vectorised):
+    if not vectorised:
+        monkeypatch.setattr(capacity, "np", None)
+    concurrency, throughput = _sweep(noise=0.03, repeats=5)
+    fit = fit_usl(concurrency, throughput)
+    grid = [1.0, 16.0, 64.0]
+
+    lower, upper = usl_band(fit, concurrency, throughput, grid, resamples=100)
+
+    for n, low, high in zip(grid, lower, upper):
+        assert low <= fit.throughput(n) <= high
@@ -0,0 +1,68 @@
+"""Bucket layout of docs/tools/latency_histogram.py against the PHP harness."""
+
+from __future__ import annotations
+
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "docs" / "tools"))
+
+from latency_histogram import LatencyHistogram, bucket_bounds, bucket_index  # noqa: E402
+
+VALUES = [*range(0, 1024), 4095, 4096, 65_535, 65_536, 1_000_000, 2**31 - 1, 2**40 + 12_345]
+
+
+def _php_histogram_index(value: int, precision_bits: int = 7) -> int:
+    """Line-by-line transcription of `histogramIndex` in bin/bench/http."""
+    sub_buckets = 1 << precision_bits
+    if value < sub_buckets:
+        return max(0, value)
+    shift = 0
+    while value >= sub_buckets:
+        value >>= 1
+        shift += 1
+    half = sub_buckets >> 1
+    return sub_buckets + (shift - 1) * half + (value - half)
+
+
+@pytest.mark.parametrize("precision_bits", [3, 7, 10])
+def test_bucket_index_matches_the_harness_layout(precision_bits):
+    for value in VALUES:
+        assert bucket_index(value, precision_bits) == _php_histogram_index(value, precision_bits)
+        lowest, highest = bucket_bounds(bucket_index(value, precision_bits), precision_bits)
+        assert lowest <= value <= highest
+
+
+@pytest.mark.skipif(shutil.which("php") is None, reason="php is not installed")
+def test_bucket_index_matches_php_histogram_index():
+    source = (ROOT / "bin" / "bench" / "http").read_text(encoding="utf-8")
+    function = re.search(r"^function histogramIndex\(.*?^\}\n", source, re.S | re.M).group(0)
+    script = (
+        "const HISTOGRAM_PRECISION_BITS = 7;\n"
+        + function
+        + f"foreach ({VALUES!r} as $v) {{ echo histogramIndex($v), \"\\n\"; }}"
+    )
+    output = subprocess.run(
+        ["php", "-r", script], check=True, capture_output=True, text=True
+    ).stdout.split()
+
+    assert [int(index) for index in output] == [bucket_index(value) for value in VALUES]
+
+
+def test_merged_histograms_report_the_bucket_midpoint():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for value in range(1, 101):
+        first.record(value * 1000)
+    second.record(500_000)
+
+    merged = first.merge(second)
+
+    assert merged.count == 101
+    assert merged.percentile(50) == pytest.approx(51.0, rel=0.01)
+    assert merged.percentile(100) == 500.0
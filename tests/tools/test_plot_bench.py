@@ -0,0 +1,67 @@
+"""Regression tests for the CSV loader of docs/tools/plot-bench.py."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+TOOLS = Path(__file__).resolve().parents[2] / "docs" / "tools"
+sys.path.insert(0, str(TOOLS))
+_spec = importlib.util.spec_from_file_location("plot_bench", TOOLS / "plot-bench.py")
+plot_bench = importlib.util.module_from_spec(_spec)
+sys.modules["plot_bench"] = plot_bench
+_spec.loader.exec_module(plot_bench)
+
+HEADER = "scenario,concurrency,requests_per_second,p50_ms,p99_ms\n"
+
+
+def _write(path: Path, text: str) -> Path:
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_partial_last_row_is_skipped(tmp_path):
+    csv_path = _write(
+        tmp_path / "run.csv",
+        HEADER + "json,1,100.5,1.0,2.0\njson,2,180.25,1.5,3.0\njson-5,htt",
+    )
+
+    dataset = plot_bench.load_dataset(csv_path)
+
+    assert list(dataset.concurrency) == [1, 2]
+    assert list(dataset.rps) == [100.5, 180.25]
+
+
+def test_row_cut_mid_number_is_read_once_complete(tmp_path):
+    csv_path = _write(tmp_path / "run.csv", HEADER + "json,1,100.5,1.0,2.0\njson,4,31")
+    checkpoints = tmp_path / "checkpoints"
+
+    first = plot_bench.load_dataset(csv_path, checkpoint_dir=checkpoints)
+    assert list(first.rps) == [100.5]
+
+    with csv_path.open("a", encoding="utf-8") as handle:
+        handle.write("0.75,2.5,4.0\n")
+    second = plot_bench.load_dataset(csv_path, checkpoint_dir=checkpoints)
+
+    assert list(second.concurrency) == [1, 4]
+    assert list(second.rps) == [100.5, 310.75]
+    assert list(second.latencies["latency_p99"]) == [2.0, 4.0]
+
+
+def test_parallel_render_prints_each_dataset_in_order(tmp_path, capsys):
+    rows = "{0},1,100.0,1.0,2.0\n{0},2,180.0,1.5,3.0\n"
+    csv_files = [
+        _write(tmp_path / f"{name}.csv", HEADER + rows.format(name))
+        for name in ("alpha", "beta", "gamma")
+    ]
+
+    results = plot_bench.render_all(
+        csv_files, tmp_path / "out", ["svg"], 100, jobs=3, backend="svg"
+    )
+
+    assert all(result is not None for result in results)
+    lines = [line for line in capsys.readouterr().out.splitlines() if "wrote" in line]
+    datasets = [Path(line.split("wrote ", 1)[1]).stem.split("-")[0] for line in lines]
+    assert datasets == sorted(datasets)
+    assert set(datasets) == {"alpha", "beta", "gamma"}
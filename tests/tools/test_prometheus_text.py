@@ -0,0 +1,42 @@
+"""PromQL-compatible quantile estimates of docs/tools/prometheus_text.py."""
+
+from __future__ import annotations
+
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "docs" / "tools"))
+
+from prometheus_text import histogram_quantile  # noqa: E402
+
+BUCKETS = [(0.1, 10.0), (0.5, 60.0), (1.0, 90.0), (math.inf, 100.0)]
+
+
+@pytest.mark.parametrize(
+    ("quantile", "expected"),
+    [
+        (0.05, 0.05),  # first bucket interpolates from 0
+        (0.5, 0.42),
+        (0.9, 1.0),
+        (0.95, 1.0),  # rank in +Inf returns the highest finite bound
+        (-0.1, -math.inf),
+        (1.5, math.inf),
+    ],
+)
+def test_histogram_quantile_interpolates_like_promql(quantile, expected):
+    assert histogram_quantile(quantile, BUCKETS) == pytest.approx(expected)
+
+
+def test_histogram_quantile_repairs_non_monotonic_counts():
+    torn = [(0.1, 10.0), (0.5, 8.0), (1.0, 20.0), (math.inf, 20.0)]
+
+    assert histogram_quantile(0.5, torn) == pytest.approx(0.1)
+    assert histogram_quantile(0.75, torn) == pytest.approx(0.75)
+
+
+def test_histogram_quantile_needs_an_inf_bucket_and_observations():
+    assert math.isnan(histogram_quantile(0.5, [(0.1, 1.0), (0.5, 2.0)]))
+    assert math.isnan(histogram_quantile(0.5, [(0.1, 0.0), (math.inf, 0.0)]))
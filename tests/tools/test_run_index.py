@@ -0,0 +1,72 @@
+"""Incremental refresh of the SQLite run index in docs/tools/run_index.py."""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "docs" / "tools"))
+
+import run_index  # noqa: E402
+
+HEADER = "scenario,concurrency,requests_per_second,p99_ms\n"
+
+
+def _refresh(connection, *paths):
+    return run_index.refresh(
+        connection, list(paths), metadata_file=lambda path: None, load_metadata=lambda path: {}
+    )
+
+
+def _runs(connection):
+    return [
+        (row["line"], row["concurrency"], row["requests_per_second"])
+        for row in connection.execute("SELECT * FROM runs ORDER BY line")
+    ]
+
+
+def _touch(path: Path) -> None:
+    # Filesystems with coarse timestamps may not move mtime between two writes.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_refresh_appends_new_rows_and_skips_unchanged_files(tmp_path):
+    csv_path = tmp_path / "run.csv"
+    csv_path.write_text(HEADER + "json,1,100.5,2.0\njson,2,180.0,3.0\njson,4,2", encoding="utf-8")
+    connection = run_index.open_index(tmp_path / "index.sqlite")
+
+    stats = _refresh(connection, csv_path)
+    assert (stats.added, stats.rows) == (1, 2)
+    assert _runs(connection) == [(2, 1, 100.5), (3, 2, 180.0)]
+
+    with csv_path.open("a", encoding="utf-8") as handle:
+        handle.write("50.0,4.0\njson,8,410.0,6.0\n")
+    _touch(csv_path)
+    stats = _refresh(connection, csv_path)
+    assert (stats.appended, stats.replaced, stats.rows) == (1, 0, 2)
+    assert _runs(connection) == [(2, 1, 100.5), (3, 2, 180.0), (4, 4, 250.0), (5, 8, 410.0)]
+
+    stats = _refresh(connection, csv_path)
+    assert (stats.unchanged, stats.rows) == (1, 0)
+
+
+def test_refresh_replaces_rewritten_files_and_drops_deleted_ones(tmp_path):
+    csv_path = tmp_path / "run.csv"
+    other = tmp_path / "other.csv"
+    csv_path.write_text(HEADER + "json,1,100.5,2.0\njson,2,180.0,3.0\n", encoding="utf-8")
+    other.write_text(HEADER + "json,1,90.0,2.5\n", encoding="utf-8")
+    connection = run_index.open_index(tmp_path / "index.sqlite")
+    _refresh(connection, csv_path, other)
+
+    # The file grew, but a row before the indexed offset changed: not an append.
+    csv_path.write_text(
+        HEADER + "json,1,100.5,2.0\njson,2,170.0,3.0\njson,4,20.0,9.0\n", encoding="utf-8"
+    )
+    _touch(csv_path)
+    other.unlink()
+    stats = _refresh(connection, csv_path)
+
+    assert (stats.replaced, stats.appended, stats.removed, stats.rows) == (1, 0, 1, 3)
+    assert _runs(connection) == [(2, 1, 100.5), (3, 2, 170.0), (4, 4, 20.0)]
@@ -0,0 +1,54 @@
+"""Largest-Triangle-Three-Buckets downsampling in docs/tools/timeline.py."""
+
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "docs" / "tools"))
+
+import timeline  # noqa: E402
+
+pytest.importorskip("numpy")
+
+
+def _pure_python(monkeypatch, xs, ys, threshold):
+    with monkeypatch.context() as patch:
+        patch.setattr(timeline, "np", None)
+        return timeline.lttb(xs, ys, threshold)
+
+
+@pytest.mark.parametrize(
+    ("count", "threshold"), [(10, 3), (100, 7), (1000, 333), (1644, 553), (5000, 4999)]
+)
+def test_numpy_and_python_keep_the_same_points(monkeypatch, count, threshold):
+    rng = random.Random(count)
+    xs = [index * 0.5 for index in range(count)]
+    ys = [rng.gauss(100.0, 15.0) for _ in range(count)]
+
+    expected = _pure_python(monkeypatch, xs, ys, threshold)
+
+    assert timeline.lttb(xs, ys, threshold) == expected
+    assert len(expected[0]) == threshold
+    assert (expected[0][0], expected[0][-1]) == (xs[0], xs[-1])
+
+
+def test_every_small_size_keeps_the_same_points(monkeypatch):
+    # Rounding of the bucket width moves the last bounds for sizes like 32 -> 24.
+    rng = random.Random(0)
+    for count in range(4, 48):
+        xs = [float(index) for index in range(count)]
+        ys = [rng.random() for _ in range(count)]
+        for threshold in range(3, count):
+            expected = _pure_python(monkeypatch, xs, ys, threshold)
+            assert timeline.lttb(xs, ys, threshold) == expected, (count, threshold)
+
+
+def test_flat_series_keeps_the_first_point_of_each_bucket(monkeypatch):
+    xs = [float(index) for index in range(1644)]
+    ys = [1.0] * 1644
+
+    assert timeline.lttb(xs, ys, 553) == _pure_python(monkeypatch, xs, ys, 553)